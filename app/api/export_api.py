@@ -11,10 +11,30 @@ from datetime import datetime
 
 from . import export_bp
 from ..database import get_db
+from ..models import PageContentModel
 from ..utils import success_response, error_response
 from ..utils.validators import parse_iso_datetime
 
 
+def attach_content(db, links, batch_size=500):
+    """
+    为链接附加页面正文（正文按 content_hash 存于 page_contents 集合，早期文档内联在 text 字段）
+
+    Args:
+        db: 数据库
+        links: 链接文档列表
+        batch_size: 单次查询的最大正文数
+    """
+    hashes = list({link['content_hash'] for link in links if link.get('content_hash')})
+    texts = {}
+    for start in range(0, len(hashes), batch_size):
+        for doc in db.page_contents.find({'_id': {'$in': hashes[start:start + batch_size]}}):
+            texts[doc['_id']] = PageContentModel.decode(doc)
+    for link in links:
+        if link.get('content_hash'):
+            link['text'] = texts.get(link['content_hash'])
+
+
 @export_bp.route('', methods=['POST'])
 def export_data():
     """导出爬取数据"""
@@ -55,7 +75,10 @@ def export_data():
             query['domain'] = filters['domain']
 
         # 查询数据
-        links = list(db.crawled_links.find(query))
+        # JSON 导出默认附带正文（include_content=false 时不读取），CSV 不包含正文
+        include_content = format_type == 'json' and data.get('include_content', True) is not False
+        projection = None if include_content else {'text': 0}
+        links = list(db.crawled_links.find(query, projection))
         total_records = len(links)
 
         # 生成文件名
@@ -86,6 +109,9 @@ def export_data():
                             'website_id': str(link['website_id'])
                         })
         else:  # json
+            # 正文单独存储，需要时按批读取
+            if include_content:
+                attach_content(db, links)
             # 转换 ObjectId 和 datetime
             for link in links:
                 link['_id'] = str(link['_id'])
@@ -159,7 +185,10 @@ def batch_export_data():
             query['domain'] = filters['domain']
 
         # 查询数据
-        links = list(db.crawled_links.find(query))
+        # JSON 导出默认附带正文（include_content=false 时不读取），CSV 不包含正文
+        include_content = format_type == 'json' and data.get('include_content', True) is not False
+        projection = None if include_content else {'text': 0}
+        links = list(db.crawled_links.find(query, projection))
         total_records = len(links)
 
         # 生成文件名
@@ -190,6 +219,9 @@ def batch_export_data():
                             'website_id': str(link['website_id'])
                         })
         else:  # json
+            # 正文单独存储，需要时按批读取
+            if include_content:
+                attach_content(db, links)
             # 转换 ObjectId 和 datetime
             for link in links:
                 link['_id'] = str(link['_id'])
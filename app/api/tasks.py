@@ -13,11 +13,11 @@ from ..utils import success_response, error_response, paginate_response
 from ..services.crawler_service import CrawlerService
 
 
-def run_crawler_task(task_id, website_id, strategy, depth, max_links):
+def run_crawler_task(task_id, website_id, strategy, depth, max_links, replay=None):
     """在后台线程中运行爬虫任务"""
     try:
         crawler = CrawlerService()
-        crawler.crawl(task_id, website_id, strategy, depth, max_links)
+        crawler.crawl(task_id, website_id, strategy, depth, max_links, replay=replay)
     except Exception as e:
         print(f"爬虫任务执行失败: {str(e)}")
 
@@ -35,6 +35,10 @@ def create_crawl_task():
             return error_response('爬取策略不能为空')
         if data['strategy'] not in ['incremental', 'full']:
             return error_response('策略必须是 incremental 或 full')
+        if data.get('replay') not in [None, 'warc', 'store']:
+            return error_response('回放来源必须是 warc 或 store')
+        if data.get('replay') and data['strategy'] != 'full':
+            return error_response('回放模式只支持 full 策略')
 
         db = get_db()
         website_id = ObjectId(data['website_id'])
@@ -56,7 +60,8 @@ def create_crawl_task():
         task_doc = CrawlTaskModel.create(
             website_id=website_id,
             strategy=data['strategy'],
-            task_type='manual'
+            task_type='manual',
+            replay=data.get('replay')
         )
 
         # 插入数据库
@@ -71,7 +76,7 @@ def create_crawl_task():
         # 在后台线程中启动爬取任务
         thread = threading.Thread(
             target=run_crawler_task,
-            args=(task_id, website_id, data['strategy'], depth, max_links)
+            args=(task_id, website_id, data['strategy'], depth, max_links, data.get('replay'))
         )
         thread.daemon = True
         thread.start()
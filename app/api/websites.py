@@ -11,6 +11,7 @@ import io
 from . import websites_bp
 from ..database import get_db
 from ..models import WebsiteModel
+from ..models.website import BUDGET_FIELDS
 from ..utils import success_response, error_response, paginate_response, validate_url
 
 
@@ -35,6 +36,23 @@ def create_website():
         parsed_url = urlparse(data['url'])
         domain = parsed_url.netloc
 
+        # 验证抓取预算
+        is_valid, msg = WebsiteModel.validate_budget(data)
+        if not is_valid:
+            return error_response(msg)
+
+        # 验证抓取范围规则
+        if data.get('scope') is not None:
+            is_valid, msg = WebsiteModel.validate_scope(data['scope'])
+            if not is_valid:
+                return error_response(msg)
+
+        # 验证 URL 规范化规则
+        if data.get('canonical') is not None:
+            is_valid, msg = WebsiteModel.validate_canonical(data['canonical'])
+            if not is_valid:
+                return error_response(msg)
+
         # 检查 URL 是否已存在
         db = get_db()
         existing = db.websites.find_one({'url': data['url']})
@@ -47,7 +65,12 @@ def create_website():
             url=data['url'],
             domain=domain,
             crawl_depth=data.get('crawl_depth', 3),
-            max_links=data.get('max_links', 1000)
+            max_links=data.get('max_links', 1000),
+            scope=data.get('scope'),
+            canonical=data.get('canonical'),
+            max_pages=data.get('max_pages'),
+            max_bytes=data.get('max_bytes'),
+            time_budget=data.get('time_budget')
         )
 
         # 插入数据库
@@ -139,6 +162,24 @@ def update_website(website_id):
             update_data['crawl_depth'] = int(data['crawl_depth'])
         if 'max_links' in data:
             update_data['max_links'] = int(data['max_links'])
+        budget_fields = {key: data[key] for key in BUDGET_FIELDS if key in data}
+        if budget_fields:
+            is_valid, msg = WebsiteModel.validate_budget(budget_fields)
+            if not is_valid:
+                return error_response(msg)
+            update_data.update(budget_fields)
+        if 'scope' in data:
+            if data['scope'] is not None:
+                is_valid, msg = WebsiteModel.validate_scope(data['scope'])
+                if not is_valid:
+                    return error_response(msg)
+            update_data['scope'] = data['scope']
+        if 'canonical' in data:
+            if data['canonical'] is not None:
+                is_valid, msg = WebsiteModel.validate_canonical(data['canonical'])
+                if not is_valid:
+                    return error_response(msg)
+            update_data['canonical'] = data['canonical']
 
         # 更新数据库
         db.websites.update_one(
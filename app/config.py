@@ -5,6 +5,20 @@ import os
 from pathlib import Path
 
 
+def _parse_host_sizes(value):
+    """解析 "key1=20,key2=5" 格式的配置（如按主机的连接池大小、按类别的正文上限）"""
+    sizes = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        host, size = item.split('=', 1)
+        try:
+            sizes[host.strip()] = int(size)
+        except ValueError:
+            continue
+    return sizes
+
+
 class Config:
     _instance = None
 
@@ -24,8 +38,108 @@ class Config:
         # 确保目录存在
         os.makedirs(self.save_path, exist_ok=True)
 
+        # 爬虫引擎配置: async（并发抓取）/ sync（递归抓取）
+        self.crawl_engine = os.getenv('CRAWL_ENGINE', 'async')
+        # 全局最大并发请求数
+        self.crawl_max_concurrency = int(os.getenv('CRAWL_MAX_CONCURRENCY', 20))
+        # 单个主机最大并发请求数
+        self.crawl_per_host_limit = int(os.getenv('CRAWL_PER_HOST_LIMIT', 4))
+
+        # 默认抓取范围: same_host / same_domain / any（网站未配置 scope 时使用）
+        self.crawl_scope_mode = os.getenv('CRAWL_SCOPE_MODE', 'same_domain')
+        # 解析进程数，0 表示在抓取线程中解析（按部署机器的 CPU 核数设置）
+        self.crawl_parse_workers = int(os.getenv('CRAWL_PARSE_WORKERS', 0))
+
+        # 抓取预算（0 表示不限制）
+        self.crawl_max_pages = int(os.getenv('CRAWL_MAX_PAGES', 0))
+        self.crawl_max_bytes = int(os.getenv('CRAWL_MAX_BYTES', 0))
+        # 单个任务最长抓取时间（秒）
+        self.crawl_time_budget = float(os.getenv('CRAWL_TIME_BUDGET', 0))
+
+        # 链接校验模式: light（资源类链接只发 HEAD/Range 请求）/ full（全部完整下载）
+        self.link_validation_mode = os.getenv('LINK_VALIDATION_MODE', 'light')
+
+        # 响应正文上限（字节），超过时截断或中止；可按正文类别 html/xml/text/other 覆盖
+        self.crawl_max_body_bytes = int(os.getenv('CRAWL_MAX_BODY_BYTES', 5 * 1024 * 1024))
+        self.crawl_body_limits = _parse_host_sizes(os.getenv('CRAWL_BODY_LIMITS', ''))
+
+        # 编码检测样本长度（字节），HTTP 头、BOM、<meta> 均未声明编码时才对样本做 chardet 检测
+        self.encoding_sample_bytes = int(os.getenv('ENCODING_SAMPLE_BYTES', 32768))
+
+        # URL 规范化：默认去除的跟踪/会话参数（支持通配符）与末尾斜杠处理方式 strip/keep/add
+        self.canonical_strip_params = [p.strip() for p in os.getenv(
+            'CANONICAL_STRIP_PARAMS', 'utm_*,gclid,fbclid,msclkid,spm,jsessionid,phpsessid,aspsessionid*,sessionid'
+        ).split(',') if p.strip()]
+        self.canonical_trailing_slash = os.getenv('CANONICAL_TRAILING_SLASH', 'keep')
+
+        # 爬虫陷阱检测: drop 丢弃 / throttle 限流（每 N 个保留 1 个）/ off 关闭
+        self.trap_mode = os.getenv('TRAP_MODE', 'drop')
+        self.trap_max_per_pattern = int(os.getenv('TRAP_MAX_PER_PATTERN', 1000))
+        self.trap_max_query_params = int(os.getenv('TRAP_MAX_QUERY_PARAMS', 10))
+        self.trap_max_query_variants = int(os.getenv('TRAP_MAX_QUERY_VARIANTS', 100))
+        self.trap_max_segment_repeat = int(os.getenv('TRAP_MAX_SEGMENT_REPEAT', 3))
+        self.trap_max_path_depth = int(os.getenv('TRAP_MAX_PATH_DEPTH', 15))
+        self.trap_throttle_every = int(os.getenv('TRAP_THROTTLE_EVERY', 10))
+
+        # 已见 url 集合: fingerprint（64 位指纹哈希表）/ bloom（Bloom 过滤器，可能误判为已见）/ set（完整 url）
+        self.seen_set_kind = os.getenv('SEEN_SET_KIND', 'fingerprint')
+        self.seen_set_capacity = int(os.getenv('SEEN_SET_CAPACITY', 10000))
+        self.bloom_error_rate = float(os.getenv('BLOOM_ERROR_RATE', 0.001))
+        # 增量爬取时单次查询已存在链接的最大 url 数（$in 批量查询）
+        self.incremental_lookup_batch = int(os.getenv('INCREMENTAL_LOOKUP_BATCH', 500))
+        # 增量爬取时对已爬取的页面发送条件请求（ETag / Last-Modified），正文变化的页面重新解析
+        self.incremental_revalidate = os.getenv('INCREMENTAL_REVALIDATE', 'true').lower() == 'true'
+
+        # 处理流水线（抓取 -> 解析 -> 打分 -> 保存）：阶段间队列容量与各阶段线程数
+        self.pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', 100))
+        self.pipeline_fetch_workers = int(os.getenv('PIPELINE_FETCH_WORKERS', 10))
+        self.pipeline_parse_workers = int(os.getenv('PIPELINE_PARSE_WORKERS', 2))
+        self.pipeline_score_workers = int(os.getenv('PIPELINE_SCORE_WORKERS', 2))
+        self.pipeline_persist_workers = int(os.getenv('PIPELINE_PERSIST_WORKERS', 1))
+        # 流水线队列深度写入任务文档的间隔（秒）
+        self.pipeline_progress_interval = float(os.getenv('PIPELINE_PROGRESS_INTERVAL', 2))
+        # 保存阶段每批 upsert 的链接数（bulk_write 无序写入）
+        self.persist_batch_size = int(os.getenv('PERSIST_BATCH_SIZE', 500))
+        # 页面正文 zlib 压缩级别（正文按 SHA-256 去重存于 page_contents 集合）
+        self.content_compress_level = int(os.getenv('CONTENT_COMPRESS_LEVEL', 6))
+
+        # 内容寻址文件存储：页面正文按 SHA-256 分片保存，超出容量时淘汰最久未使用的文件（0 表示不限制）
+        # 未设置 CONTENT_STORE_PATH 时随 save_path 变化（见 content_store_path）
+        self._content_store_path = os.getenv('CONTENT_STORE_PATH')
+        self.content_store_max_bytes = int(os.getenv('CONTENT_STORE_MAX_BYTES', 1024 * 1024 * 1024))
+
+        # WARC 输出：原始请求/响应写入 .warc.gz（每条记录一个 gzip 成员），单个文件超过上限后轮转
+        self.warc_enabled = os.getenv('WARC_ENABLED', 'false').lower() == 'true'
+        # 未设置 WARC_DIR 时随 save_path 变化（见 warc_dir）
+        self._warc_dir = os.getenv('WARC_DIR')
+        self.warc_max_file_size = int(os.getenv('WARC_MAX_FILE_SIZE', 100 * 1024 * 1024))
+        # 待写入队列容量（队列满时丢弃记录并计入任务日志，不阻塞抓取线程）
+        self.warc_queue_size = int(os.getenv('WARC_QUEUE_SIZE', 1000))
+
+        # HTTP 连接池配置
+        self.http_pool_connections = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+        self.http_pool_maxsize = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+        # 按主机设置连接池大小，格式: "host1=20,host2=5"
+        self.http_host_pool_sizes = _parse_host_sizes(os.getenv('HTTP_HOST_POOL_SIZES', ''))
+
+        # DNS 缓存配置（秒）
+        self.dns_cache_ttl = int(os.getenv('DNS_CACHE_TTL', 300))
+        self.dns_negative_ttl = int(os.getenv('DNS_NEGATIVE_TTL', 60))
+        # 处理链接前按主机批量并行预解析
+        self.dns_prefetch = os.getenv('DNS_PREFETCH', 'true').lower() == 'true'
+
         self._initialized = True
 
+    @property
+    def content_store_path(self):
+        """文件存储目录，默认为 save_path 下的 store"""
+        return self._content_store_path or os.path.join(self.save_path, 'store')
+
+    @property
+    def warc_dir(self):
+        """WARC 输出目录，默认为 save_path 下的 warc"""
+        return self._warc_dir or os.path.join(self.save_path, 'warc')
+
     def set_save_path(self, path):
         """设置保存路径"""
         self.save_path = path
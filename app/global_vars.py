@@ -1,6 +1,7 @@
 """
 全局变量和资源管理
 """
+import time
 
 # 全局浏览器实例（延迟初始化）
 driver = None
@@ -8,6 +9,9 @@ driver = None
 # 任务停止标志字典 {task_id: should_stop}
 stop_flags = {}
 
+# 任务停止请求时间 {task_id: timestamp}（用于统计取消耗时）
+stop_requested_at = {}
+
 
 def init_driver():
     """初始化无头浏览器（Selenium/Chrome）"""
@@ -57,6 +61,7 @@ def set_stop_flag(task_id):
     """设置任务停止标志"""
     global stop_flags
     stop_flags[str(task_id)] = True
+    stop_requested_at.setdefault(str(task_id), time.time())
 
 
 def clear_stop_flag(task_id):
@@ -65,9 +70,15 @@ def clear_stop_flag(task_id):
     task_key = str(task_id)
     if task_key in stop_flags:
         del stop_flags[task_key]
+    stop_requested_at.pop(task_key, None)
 
 
 def should_stop(task_id):
     """检查任务是否应该停止"""
     global stop_flags
     return stop_flags.get(str(task_id), False)
+
+
+def get_stop_requested_at(task_id):
+    """获取任务停止请求时间（未请求停止时返回 None）"""
+    return stop_requested_at.get(str(task_id))
@@ -6,11 +6,13 @@ from .crawl_task import CrawlTaskModel
 from .crawled_link import CrawledLinkModel
 from .crawl_log import CrawlLogModel
 from .schedule import ScheduleModel
+from .page_content import PageContentModel
 
 __all__ = [
     'WebsiteModel',
     'CrawlTaskModel',
     'CrawledLinkModel',
     'CrawlLogModel',
-    'ScheduleModel'
+    'ScheduleModel',
+    'PageContentModel'
 ]
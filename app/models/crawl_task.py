@@ -13,7 +13,7 @@ class CrawlTaskModel:
 
     @staticmethod
     def create(website_id: ObjectId, strategy: str,
-               task_type: str = 'manual') -> Dict[str, Any]:
+               task_type: str = 'manual', replay: Optional[str] = None) -> Dict[str, Any]:
         """
         创建爬取任务文档
 
@@ -21,6 +21,7 @@ class CrawlTaskModel:
             website_id: 网站ID
             strategy: 爬取策略 (incremental/full)
             task_type: 任务类型 (scheduled/manual)
+            replay: 回放来源 (warc/store)，为空表示正常爬取
 
         Returns:
             任务文档字典
@@ -29,6 +30,7 @@ class CrawlTaskModel:
             'website_id': website_id,
             'task_type': task_type,
             'strategy': strategy,
+            'replay': replay,
             'status': 'pending',
             'started_at': None,
             'completed_at': None,
@@ -41,6 +43,7 @@ class CrawlTaskModel:
                 'precision_rate': 0.0
             },
             'screenshot_path': None,
+            'warc_files': [],
             'error_message': None
         }
 
@@ -68,7 +71,8 @@ class CrawlTaskModel:
 
     @staticmethod
     def update_statistics(total_links: int, valid_links: int,
-                         invalid_links: int, new_links: int = 0, valid_rate: float = 0.0, precision_rate: float = 0.0) -> Dict[str, Any]:
+                         invalid_links: int, new_links: int = 0, valid_rate: float = 0.0, precision_rate: float = 0.0,
+                         extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         更新任务统计信息
 
@@ -77,6 +81,7 @@ class CrawlTaskModel:
             valid_links: 有效链接数
             invalid_links: 无效链接数
             new_links: 新增链接数
+            extra: 扩展统计信息（如连接复用计数），合并到 statistics 中
 
         Returns:
             MongoDB 更新操作符字典
@@ -84,16 +89,39 @@ class CrawlTaskModel:
         # valid_rate = valid_links / total_links if total_links > 0 else 0
         # precision_rate = valid_links / (valid_links + invalid_links) if (valid_links + invalid_links) > 0 else 0
 
+        statistics = {
+            'total_links': total_links,
+            'valid_links': valid_links,
+            'invalid_links': invalid_links,
+            'new_links': new_links,
+            'valid_rate': round(valid_rate, 4),
+            'precision_rate': round(precision_rate, 4)
+        }
+        if extra:
+            statistics.update(extra)
+
+        return {
+            '$set': {
+                'statistics': statistics
+            }
+        }
+
+    @staticmethod
+    def update_progress(pipeline: Dict[str, Any], new_links: int = 0) -> Dict[str, Any]:
+        """
+        更新运行中任务的流水线进度
+
+        Args:
+            pipeline: 各阶段队列深度与处理计数
+            new_links: 目前为止新增的链接数
+
+        Returns:
+            MongoDB 更新操作符字典
+        """
         return {
             '$set': {
-                'statistics': {
-                    'total_links': total_links,
-                    'valid_links': valid_links,
-                    'invalid_links': invalid_links,
-                    'new_links': new_links,
-                    'valid_rate': round(valid_rate, 4),
-                    'precision_rate': round(precision_rate, 4)
-                }
+                'statistics.pipeline': pipeline,
+                'statistics.new_links': new_links
             }
         }
 
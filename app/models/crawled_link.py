@@ -16,7 +16,9 @@ class CrawledLinkModel:
                domain: str, link_type: str, status_code: Optional[int] = None,
                content_type: Optional[str] = None, source_url: Optional[str] = None,
                ip_address: Optional[str] = None, importance_score: Optional[float] = None,
-               text: Optional[str]=None) -> Dict[str, Any]:
+               content_hash: Optional[str] = None, content_size: Optional[int] = None,
+               content_ref: Optional[str] = None, etag: Optional[str] = None,
+               last_modified: Optional[str] = None, content_path: Optional[str] = None) -> Dict[str, Any]:
         """
         创建爬取链接文档
 
@@ -31,7 +33,12 @@ class CrawledLinkModel:
             source_url: 来源URL
             ip_address: IP地址
             importance_score: 重要性评分
-            text: response.text
+            content_hash: 页面正文 SHA-256（正文存于 page_contents 集合）
+            content_size: 正文字节数
+            content_ref: 正文存储位置
+            etag: 响应头 ETag（增量爬取时用于条件请求）
+            last_modified: 响应头 Last-Modified（增量爬取时用于条件请求）
+            content_path: 原始响应正文在本地文件存储中的路径（文件名为原始字节的 SHA-256，可能已被淘汰）
 
         Returns:
             链接文档字典
@@ -46,7 +53,12 @@ class CrawledLinkModel:
             'content_type': content_type,
             'ip_address': ip_address,
             'importance_score': importance_score,
-            'text': text,
+            'content_hash': content_hash,
+            'content_size': content_size,
+            'content_ref': content_ref,
+            'content_path': content_path,
+            'etag': etag,
+            'last_modified': last_modified,
             'first_crawled_at': datetime.utcnow(),
             'last_crawled_at': datetime.utcnow(),
             'crawl_count': 1,
@@ -70,6 +82,64 @@ class CrawledLinkModel:
             }
         }
 
+    @staticmethod
+    def touch(website_id: ObjectId, url: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        构建未变化链接的更新操作（条件请求返回 304 或正文哈希未变）
+
+        只更新爬取时间与次数，服务器返回了新的 ETag / Last-Modified 时一并更新。
+
+        Args:
+            website_id: 网站ID
+            url: 链接URL
+            etag: 本次响应的 ETag
+            last_modified: 本次响应的 Last-Modified
+
+        Returns:
+            (查询条件, MongoDB 更新操作符字典)
+        """
+        update = CrawledLinkModel.update_crawl_info()
+        if etag:
+            update['$set']['etag'] = etag
+        if last_modified:
+            update['$set']['last_modified'] = last_modified
+        return {'website_id': website_id, 'url': url}, update
+
+    @staticmethod
+    def upsert(doc: Dict[str, Any], replay: bool = False) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        构建按 (website_id, url) 写入链接的 upsert 操作
+
+        已存在的链接保留 first_crawled_at 并增加 crawl_count（与 update_crawl_info 一致），
+        其余字段以本次爬取结果覆盖，并移除早期内联的 text 字段。
+        离线回放没有实际爬取，已存在的链接不增加 crawl_count、不更新 last_crawled_at。
+
+        Args:
+            doc: create 生成的链接文档
+            replay: 是否为离线回放的结果
+
+        Returns:
+            (查询条件, MongoDB 更新操作符字典)
+        """
+        fields = {k: v for k, v in doc.items() if k not in ('_id', 'first_crawled_at', 'crawl_count')}
+        # 未解析到 IP（如离线回放）或响应未带校验头时保留已有值（供下次增量重新验证）
+        for key in ('ip_address', 'etag', 'last_modified'):
+            if fields.get(key) is None:
+                fields.pop(key, None)
+        if replay:
+            last_crawled_at = fields.pop('last_crawled_at', None) or datetime.utcnow()
+            update = {'$set': fields}
+            update['$setOnInsert'] = {'first_crawled_at': doc.get('first_crawled_at') or datetime.utcnow(),
+                                      'last_crawled_at': last_crawled_at, 'crawl_count': 1}
+        else:
+            update = CrawledLinkModel.update_crawl_info()
+            update['$set'].update(fields)
+            update['$setOnInsert'] = {'first_crawled_at': doc.get('first_crawled_at') or datetime.utcnow()}
+        # 早期文档内联保存的正文已移至 page_contents 集合
+        update['$unset'] = {'text': ''}
+        return {'website_id': doc['website_id'], 'url': doc['url']}, update
+
     @staticmethod
     def to_dict(doc: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -0,0 +1,53 @@
+"""
+页面正文模型
+"""
+import zlib
+from datetime import datetime
+from typing import Optional, Dict, Any
+from bson import Binary
+
+
+class PageContentModel:
+    """页面正文模型（按 SHA-256 去重，zlib 压缩存储）"""
+
+    COLLECTION_NAME = 'page_contents'
+
+    COMPRESSION = 'zlib'
+
+    @staticmethod
+    def create(content_hash: str, data: bytes, level: int = 6) -> Dict[str, Any]:
+        """
+        创建正文文档
+
+        Args:
+            content_hash: 正文 SHA-256（十六进制），作为文档 _id
+            data: 正文原始字节（UTF-8）
+            level: zlib 压缩级别
+
+        Returns:
+            正文文档字典
+        """
+        compressed = zlib.compress(data, level)
+        return {
+            '_id': content_hash,
+            'compression': PageContentModel.COMPRESSION,
+            'size': len(data),
+            'compressed_size': len(compressed),
+            'data': Binary(compressed),
+            'created_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def decode(doc: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        解压正文文档
+
+        Args:
+            doc: MongoDB 文档
+
+        Returns:
+            正文文本，文档不存在时返回 None
+        """
+        if doc is None:
+            return None
+        return zlib.decompress(doc['data']).decode('utf-8', 'replace')
@@ -1,10 +1,20 @@
 """
 网站模型
 """
+import re
 from datetime import datetime
 from typing import Optional, Dict, Any
 from bson import ObjectId
 
+# 抓取范围模式
+SCOPE_MODES = ['same_host', 'same_domain', 'any']
+
+# URL 规范化的末尾斜杠处理方式
+TRAILING_SLASH_MODES = ['strip', 'keep', 'add']
+
+# 抓取预算字段（为空时使用 CRAWL_MAX_PAGES / CRAWL_MAX_BYTES / CRAWL_TIME_BUDGET，0 表示不限制）
+BUDGET_FIELDS = ['max_pages', 'max_bytes', 'time_budget']
+
 
 class WebsiteModel:
     """网站配置模型"""
@@ -13,7 +23,11 @@ class WebsiteModel:
 
     @staticmethod
     def create(name: str, url: str, domain: str,
-               crawl_depth: int = 3, max_links: int = 1000) -> Dict[str, Any]:
+               crawl_depth: int = 3, max_links: int = 1000,
+               scope: Optional[Dict[str, Any]] = None,
+               canonical: Optional[Dict[str, Any]] = None,
+               max_pages: Optional[int] = None, max_bytes: Optional[int] = None,
+               time_budget: Optional[float] = None) -> Dict[str, Any]:
         """
         创建网站文档
 
@@ -23,6 +37,11 @@ class WebsiteModel:
             domain: 域名
             crawl_depth: 爬取深度
             max_links: 最大链接数
+            scope: 抓取范围规则 {mode, allow_patterns, deny_patterns, max_external_hops}
+            canonical: URL 规范化规则 {strip_params, keep_params, trailing_slash, sort_query, keep_fragment}
+            max_pages: 最多抓取的页面数（为空时使用全局配置）
+            max_bytes: 最多下载的字节数（为空时使用全局配置）
+            time_budget: 最长抓取耗时（秒，为空时使用全局配置）
 
         Returns:
             网站文档字典
@@ -34,6 +53,11 @@ class WebsiteModel:
             'status': 'active',
             'crawl_depth': crawl_depth,
             'max_links': max_links,
+            'scope': scope,
+            'canonical': canonical,
+            'max_pages': max_pages,
+            'max_bytes': max_bytes,
+            'time_budget': time_budget,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -100,4 +124,100 @@ class WebsiteModel:
             if not isinstance(data['max_links'], int) or data['max_links'] < 1:
                 return False, '最大链接数必须是正整数'
 
+        is_valid, msg = WebsiteModel.validate_budget(data)
+        if not is_valid:
+            return is_valid, msg
+
+        if data.get('scope') is not None:
+            is_valid, msg = WebsiteModel.validate_scope(data['scope'])
+            if not is_valid:
+                return is_valid, msg
+
+        if data.get('canonical') is not None:
+            return WebsiteModel.validate_canonical(data['canonical'])
+
+        return True, None
+
+    @staticmethod
+    def validate_budget(data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+        """
+        验证抓取预算字段（max_pages / max_bytes / time_budget，未提供或为空时跳过）
+
+        Args:
+            data: 待验证的数据
+
+        Returns:
+            (是否有效, 错误消息)
+        """
+        for key in ['max_pages', 'max_bytes']:
+            value = data.get(key)
+            if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+                return False, f'{key} 必须是非负整数'
+
+        value = data.get('time_budget')
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0):
+            return False, 'time_budget 必须是非负数'
+
+        return True, None
+
+    @staticmethod
+    def validate_scope(scope: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+        """
+        验证抓取范围规则
+
+        Args:
+            scope: 抓取范围规则
+
+        Returns:
+            (是否有效, 错误消息)
+        """
+        if not isinstance(scope, dict):
+            return False, '抓取范围必须是对象'
+
+        if scope.get('mode') is not None and scope['mode'] not in SCOPE_MODES:
+            return False, '抓取范围模式必须是 same_host、same_domain 或 any'
+
+        for key in ['allow_patterns', 'deny_patterns']:
+            patterns = scope.get(key) or []
+            if not isinstance(patterns, list):
+                return False, f'{key} 必须是正则表达式列表'
+            for pattern in patterns:
+                try:
+                    re.compile(pattern)
+                except (re.error, TypeError):
+                    return False, f'{key} 中的正则表达式无效: {pattern}'
+
+        hops = scope.get('max_external_hops', 0)
+        if not isinstance(hops, int) or hops < 0:
+            return False, '最大外部跳数必须是非负整数'
+
+        return True, None
+
+    @staticmethod
+    def validate_canonical(canonical: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+        """
+        验证 URL 规范化规则
+
+        Args:
+            canonical: URL 规范化规则
+
+        Returns:
+            (是否有效, 错误消息)
+        """
+        if not isinstance(canonical, dict):
+            return False, 'URL 规范化规则必须是对象'
+
+        for key in ['strip_params', 'keep_params']:
+            params = canonical.get(key) or []
+            if not isinstance(params, list) or not all(isinstance(p, str) for p in params):
+                return False, f'{key} 必须是参数名列表'
+
+        mode = canonical.get('trailing_slash')
+        if mode is not None and mode not in TRAILING_SLASH_MODES:
+            return False, '末尾斜杠处理方式必须是 strip、keep 或 add'
+
+        for key in ['sort_query', 'keep_fragment']:
+            if key in canonical and not isinstance(canonical[key], bool):
+                return False, f'{key} 必须是布尔值'
+
         return True, None
@@ -0,0 +1,250 @@
+"""
+异步爬取引擎 - 基于 asyncio 的并发链接发现
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from app.services.crawler_service import (DEFAULT_HEADERS, conditional_headers, safe_request, extract_page_links,
+                                          new_stream_extractor)
+from app.services.response_store import ResponseRecord
+from app.services.frontier import CrawlFrontier
+from app.services.link_probe import classify_link
+from app.services.link_extractor import filter_links
+from app.services.seen_set import create_seen_set
+
+
+class AsyncCrawlEngine:
+    """
+    并发版 get_all_links
+
+    待抓取 url 按重要性得分进入优先队列，得分高的页面先抓取；
+    页面下载过程中流式提取到的子链接立即入队，无需等待整页下载完成；
+    全局并发数与单主机并发数均可配置。
+    与 get_all_links 保持相同的 exclude / visited / depth 语义。
+    """
+
+    def __init__(self, max_concurrency=20, per_host_limit=4, timeout=2, headers=None, pool=None,
+                 scorer=None, budget=None, should_stop=None, scope=None, canonicalizer=None,
+                 traps=None, resolver=None):
+        """
+        参数:
+            max_concurrency: int - 全局最大并发请求数
+            per_host_limit: int - 单个主机最大并发请求数
+            timeout: int - 单次请求超时时间（秒）
+            headers: dict - 请求头
+            pool: HttpSessionPool - HTTP 连接池
+            scorer: callable - score(url) -> float，为空时按发现顺序抓取
+            budget: CrawlBudget - 抓取预算（耗尽后停止调度新页面）
+            should_stop: callable - 取消检查函数（返回 True 时停止调度新页面）
+            scope: CrawlScope - 抓取范围（范围外链接只记录不抓取）
+            canonicalizer: UrlCanonicalizer - url 规范化规则（visited / exclude 按规范化后的 url 比较）
+            traps: TrapDetector - 爬虫陷阱检测（陷阱模式下的链接被丢弃或限流）
+            resolver: EncodingResolver - 任务级编码识别器（主机编码缓存只在本任务内有效）
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.pool = pool
+        self.scorer = scorer
+        self.budget = budget
+        self.should_stop = should_stop
+        self.scope = scope
+        self.canonicalizer = canonicalizer
+        self.traps = traps
+        self.resolver = resolver
+
+    def crawl(self, url, depth=3, exclude=None, visited=None, store=None, on_discovered=None, seeds=None):
+        """
+        同步入口，在独立事件循环中运行抓取
+
+        参数:
+            url: str - 入口 url（为空时只从 seeds 开始）
+            depth: int - 爬取深度
+            exclude: set - 需要排除的 url 集合
+            visited: set - 已访问的 url 集合（默认使用 create_seen_set 创建的紧凑集合）
+            store: ResponseStore - 响应记录表
+            on_discovered: callable - on_discovered(links)，链接不再需要发现阶段下载时回调（在线程池中执行，可阻塞）
+            seeds: iterable[str] - 额外的起始页面（与普通页面一样在下载后交付，剩余深度同为 depth）
+
+        返回:
+            links: list[str] - 爬到的 links（指定 on_discovered 时链接只通过回调交付，返回空列表）
+        """
+        if exclude is None:
+            exclude = set()
+        if visited is None:
+            visited = create_seen_set()
+
+        # 使用独立事件循环，避免与截图等模块设置的循环互相干扰
+        loop = asyncio.new_event_loop()
+        unfinished = []
+        try:
+            links = loop.run_until_complete(self._crawl(url, depth, exclude, visited, store, on_discovered, unfinished,
+                                                        seeds))
+        finally:
+            loop.close()
+        # 预算耗尽或取消时仍在队列中的页面，以及抓取异常的页面（入口页面除外）
+        unfinished = [link for link in unfinished if link != url]
+        if on_discovered and unfinished:
+            on_discovered(unfinished)
+        return links
+
+    def _fetch_links(self, url, exclude, store, on_links=None):
+        """在线程池中执行：下载页面并提取子链接（on_links 接收下载过程中发现的链接）"""
+        # 增量重新验证的页面发送条件请求，确认正文变化后才交付子链接（不在下载过程中入队）
+        revalidation = conditional_headers(self.headers, exclude, url)
+        extractor = new_stream_extractor(on_links=on_links if revalidation is None else None,
+                                         resolver=self.resolver)
+        response = safe_request(url, revalidation or self.headers, timeout=self.timeout, pool=self.pool,
+                                on_chunk=extractor.feed if extractor else None)
+        if extractor:
+            extractor.close()
+        if self.budget is not None and response:
+            self.budget.charge_bytes(len(response.content))
+        if store is not None or revalidation is not None:
+            record = ResponseRecord.from_response(url, response, self.resolver) if response else ResponseRecord.failed(url)
+            if store is not None:
+                store.put(record)
+            if revalidation is not None and exclude.revalidate(url, record) == 'unchanged':
+                print(f"{url} 未变化，跳过解析")
+                return []
+        if not response:
+            print(f"{url} 无响应")
+            return []
+        return extract_page_links(url, response, exclude, extractor=extractor, canonicalizer=self.canonicalizer,
+                                  traps=self.traps, resolver=self.resolver)
+
+    async def _crawl(self, url, depth, exclude, visited, store, on_discovered, unfinished, seeds=None):
+        if depth <= 0:
+            return []
+
+        loop = asyncio.get_running_loop()
+        frontier = CrawlFrontier(self.scorer)
+        ready = asyncio.Condition()
+        host_limits = {}
+        all_links = []
+        in_flight = 0
+
+        # 入口页面最先抓取
+        if url is not None:
+            frontier.push(url, depth, score=float('inf'))
+        for link in seeds or ():
+            frontier.push(link, depth)
+
+        async def next_url():
+            """取出下一个待抓取 url；队列为空且无进行中的请求时返回 None"""
+            nonlocal in_flight
+            async with ready:
+                while True:
+                    # 预算耗尽或任务取消后不再调度新页面，等待进行中的请求结束
+                    if self.budget is not None and self.budget.exhausted:
+                        unfinished.extend(frontier.clear())
+                    if self.should_stop and self.should_stop():
+                        unfinished.extend(frontier.clear())
+                    while frontier:
+                        page_url, remaining, _, hops = frontier.pop()
+                        # 排除列表中或已访问的 url 直接跳过
+                        if page_url in exclude or page_url in visited:
+                            continue
+                        # 发起请求前申请页面配额，避免并发请求超出预算
+                        if self.budget is not None and not self.budget.acquire_page():
+                            unfinished.append(page_url)
+                            unfinished.extend(frontier.clear())
+                            break
+                        visited.add(page_url)
+                        in_flight += 1
+                        return page_url, remaining, hops
+                    if in_flight == 0:
+                        ready.notify_all()
+                        return None
+                    await ready.wait()
+
+        async def schedule(links, remaining, hops, scheduled, leaves):
+            """按得分把子链接加入待抓取队列（范围外链接只记录不抓取，记入 leaves）"""
+            pushed = False
+            for link in links:
+                if link in scheduled:
+                    continue
+                scheduled.add(link)
+                if link in visited:
+                    # 入口页面不会作为子页面交付，被其他页面链接时作为叶子处理
+                    if link == url:
+                        leaves.append(link)
+                    continue
+                # 资源类链接不含子链接，留给抓取阶段轻量校验
+                if classify_link(link) != 'page':
+                    leaves.append(link)
+                    continue
+                child_hops = self.scope.child_hops(link, hops) if self.scope else 0
+                if child_hops is not None:
+                    frontier.push(link, remaining - 1, hops=child_hops)
+                    pushed = True
+                elif link not in frontier:
+                    # 已在队列中的页面由抓取它的协程交付
+                    leaves.append(link)
+            if pushed:
+                async with ready:
+                    ready.notify_all()
+
+        async def worker():
+            nonlocal in_flight
+            while True:
+                item = await next_url()
+                if item is None:
+                    return
+                page_url, remaining, hops = item
+                try:
+                    host = urlparse(page_url).netloc
+                    if host not in host_limits:
+                        host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+
+                    scheduled = set()
+                    leaves = []
+                    on_links = None
+                    if remaining > 1:
+                        def on_links(new_links, remaining=remaining, hops=hops, scheduled=scheduled, leaves=leaves):
+                            # 下载线程中回调：过滤后立即交给事件循环入队
+                            new_links = filter_links(new_links, exclude, self.canonicalizer, self.traps)
+                            if self.budget is not None:
+                                new_links = self.budget.admit_links(new_links)
+                            if new_links:
+                                asyncio.run_coroutine_threadsafe(
+                                    schedule(new_links, remaining, hops, scheduled, leaves), loop)
+
+                    async with host_limits[host]:
+                        links = await loop.run_in_executor(executor, self._fetch_links, page_url, exclude, store,
+                                                           on_links)
+
+                    if self.budget is not None:
+                        links = self.budget.admit_links(links)
+                    if not on_discovered:
+                        all_links.extend(links)
+
+                    # 仍有剩余深度时加入下载过程中尚未入队的子链接
+                    if remaining > 1:
+                        await schedule(links, remaining, hops, scheduled, leaves)
+                    else:
+                        # 已访问或已在队列中等待抓取的页面由抓取它的协程交给后续处理，不在抓取阶段重复下载
+                        leaves = [link for link in links
+                                  if link == url or (link not in visited and link not in frontier)]
+
+                    if on_discovered:
+                        # 不再抓取的子链接与已下载的当前页面（入口页面除外）交给后续处理
+                        done = list(leaves) if page_url == url else leaves + [page_url]
+                        if done:
+                            await loop.run_in_executor(executor, on_discovered, done)
+                except Exception as e:
+                    print(f"异步抓取异常: {page_url} - {e}")
+                    if page_url != url:
+                        unfinished.append(page_url)
+                finally:
+                    async with ready:
+                        in_flight -= 1
+                        ready.notify_all()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+            await asyncio.gather(*workers)
+
+        return all_links
@@ -0,0 +1,138 @@
+"""
+抓取预算 - 在抓取过程中限制页面数、链接数、下载字节数与耗时
+"""
+import threading
+import time
+
+class CrawlBudget:
+    """
+    任务级抓取预算（线程安全）
+
+    任一预算耗尽后 exhausted 为 True，链接发现应尽快停止；
+    页面数、字节数或时间耗尽后 can_fetch 为 False，不再发起任何网络请求。
+    限制值为 None 或 0 表示不限制。
+    """
+
+    def __init__(self, max_pages=None, max_links=None, max_bytes=None, time_limit=None):
+        """
+        参数:
+            max_pages: int - 最多抓取的页面数（网络请求数）
+            max_links: int - 最多发现的唯一链接数
+            max_bytes: int - 最多下载的字节数
+            time_limit: float - 最长耗时（秒）
+        """
+        self.max_pages = max_pages or None
+        self.max_links = max_links or None
+        self.max_bytes = max_bytes or None
+        self.time_limit = time_limit or None
+        self.started_at = time.monotonic()
+        self.deadline = self.started_at + self.time_limit if self.time_limit else None
+
+        self.pages = 0
+        self.bytes = 0
+        self.reasons = []
+        self._admitted = set()
+        self._lock = threading.Lock()
+
+    def _exhaust(self, reason):
+        if reason not in self.reasons:
+            self.reasons.append(reason)
+            print(f"抓取预算耗尽: {reason}")
+
+    def _check_deadline(self):
+        if self.deadline and 'time_limit' not in self.reasons and time.monotonic() >= self.deadline:
+            with self._lock:
+                self._exhaust('time_limit')
+
+    @property
+    def reason(self):
+        """最先耗尽的预算项"""
+        return self.reasons[0] if self.reasons else None
+
+    @property
+    def links(self):
+        return len(self._admitted)
+
+    @property
+    def exhausted(self):
+        """是否有任一预算已耗尽（同时检查截止时间）"""
+        self._check_deadline()
+        return bool(self.reasons)
+
+    def can_fetch(self):
+        """是否仍允许发起网络请求（max_pages 在最后一个配额被申请时即记为耗尽）"""
+        self._check_deadline()
+        return not any(r in ('max_bytes', 'time_limit') for r in self.reasons) and \
+            not (self.max_pages and self.pages >= self.max_pages)
+
+    def acquire_page(self):
+        """
+        发起网络请求前申请一个页面配额
+
+        返回:
+            bool - 是否允许发起请求
+        """
+        if not self.can_fetch():
+            return False
+        with self._lock:
+            if self.max_pages and self.pages >= self.max_pages:
+                self._exhaust('max_pages')
+                return False
+            self.pages += 1
+            if self.max_pages and self.pages >= self.max_pages:
+                self._exhaust('max_pages')
+            return True
+
+    def charge_bytes(self, nbytes):
+        """
+        记录下载的字节数
+
+        参数:
+            nbytes: int - 本次下载的字节数
+        """
+        with self._lock:
+            self.bytes += nbytes or 0
+            if self.max_bytes and self.bytes >= self.max_bytes:
+                self._exhaust('max_bytes')
+
+    def admit_links(self, links):
+        """
+        登记页面上发现的链接
+
+        参数:
+            links: list[str] - 页面上发现的链接
+
+        返回:
+            list[str] - 允许保留的链接（超出 max_links 的新链接被丢弃）
+        """
+        kept = []
+        with self._lock:
+            for link in links:
+                if link in self._admitted:
+                    kept.append(link)
+                    continue
+                if self.max_links and len(self._admitted) >= self.max_links:
+                    self._exhaust('max_links')
+                    continue
+                self._admitted.add(link)
+                kept.append(link)
+            if self.max_links and len(self._admitted) >= self.max_links:
+                self._exhaust('max_links')
+        return kept
+
+    def to_dict(self):
+        return {
+            'exhausted': self.exhausted,
+            'reason': self.reason,
+            'reasons': list(self.reasons),
+            'pages_fetched': self.pages,
+            'links_discovered': self.links,
+            'bytes_downloaded': self.bytes,
+            'elapsed_seconds': round(time.monotonic() - self.started_at, 2),
+            'limits': {
+                'max_pages': self.max_pages,
+                'max_links': self.max_links,
+                'max_bytes': self.max_bytes,
+                'time_limit': self.time_limit
+            }
+        }
@@ -0,0 +1,159 @@
+"""
+URL 规范化 - 把同一页面的不同写法（片段、默认端口、主机大小写、跟踪/会话参数、参数顺序、末尾斜杠）归并为同一个 url
+"""
+import fnmatch
+import re
+import threading
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+from app.services.seen_set import FingerprintSet, url_fingerprint
+
+# 默认去除的跟踪与会话参数（支持通配符，不区分大小写）
+DEFAULT_STRIP_PARAMS = ('utm_*', 'gclid', 'fbclid', 'msclkid', 'spm', 'jsessionid', 'phpsessid',
+                        'aspsessionid*', 'sessionid')
+
+TRAILING_SLASH_MODES = ('strip', 'keep', 'add')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+class UrlCanonicalizer:
+    """
+    URL 规范化规则（每个任务构建一次，线程安全）
+
+    - 协议与主机转小写，去除默认端口与 #片段
+    - 去除跟踪/会话参数（查询参数与 ;jsessionid= 形式的路径参数）
+    - 查询参数按字典序排列
+    - 末尾斜杠: strip 去除 / keep 保留（默认）/ add 为无扩展名的路径补全（规范化后的 url 也用于请求）
+    同时统计被归并的重复 url 数量。
+    """
+
+    def __init__(self, strip_params=DEFAULT_STRIP_PARAMS, keep_params=None, trailing_slash='keep',
+                 sort_query=True, keep_fragment=False):
+        """
+        参数:
+            strip_params: iterable[str] - 需要去除的参数名（支持通配符）
+            keep_params: iterable[str] - 即使匹配 strip_params 也保留的参数名
+            trailing_slash: str - 末尾斜杠处理方式 strip/keep/add
+            sort_query: bool - 是否对查询参数排序
+            keep_fragment: bool - 是否保留 #片段（前端路由使用片段区分页面时开启）
+        """
+        if trailing_slash not in TRAILING_SLASH_MODES:
+            raise ValueError(f"无效的末尾斜杠处理方式: {trailing_slash}")
+        keep = {p.lower() for p in (keep_params or [])}
+        patterns = [p.lower() for p in (strip_params or []) if p.lower() not in keep]
+        self._strip_re = re.compile('|'.join(fnmatch.translate(p) for p in patterns)) if patterns else None
+        self.trailing_slash = trailing_slash
+        self.sort_query = sort_query
+        self.keep_fragment = keep_fragment
+        # 只记录指纹用于统计，不保留 url 字符串
+        self._raw = FingerprintSet()
+        self._canonical = FingerprintSet()
+        self.rewritten = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_rules(cls, rules=None, default_strip_params=DEFAULT_STRIP_PARAMS, default_trailing_slash='keep'):
+        """
+        根据网站的 canonical 配置构建
+
+        参数:
+            rules: dict - WebsiteModel 中的 canonical 字段
+            default_strip_params: iterable[str] - 默认去除的参数
+            default_trailing_slash: str - 未配置时的末尾斜杠处理方式
+        """
+        rules = rules or {}
+        return cls(
+            strip_params=list(default_strip_params) + list(rules.get('strip_params') or []),
+            keep_params=rules.get('keep_params'),
+            trailing_slash=rules.get('trailing_slash') or default_trailing_slash,
+            sort_query=rules.get('sort_query', True),
+            keep_fragment=rules.get('keep_fragment', False)
+        )
+
+    def _strip(self, name):
+        return self._strip_re is not None and self._strip_re.match(unquote(name).lower()) is not None
+
+    def canonicalize(self, url):
+        """
+        规范化单个 url（非 http/https 或无法解析的 url 原样返回）
+
+        返回:
+            str - 规范化后的 url
+        """
+        try:
+            parts = urlsplit(url.strip())
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS or not parts.hostname:
+            return url
+
+        host = parts.hostname.rstrip('.')
+        if ':' in host:
+            host = f'[{host}]'
+        if port is not None and port != DEFAULT_PORTS[scheme]:
+            host = f'{host}:{port}'
+        if '@' in parts.netloc:
+            host = parts.netloc.rsplit('@', 1)[0] + '@' + host
+
+        path = parts.path or '/'
+        if ';' in path:
+            # 去除 ;jsessionid=xxx 形式的路径参数
+            segments = []
+            for segment in path.split('/'):
+                name, *params = segment.split(';')
+                params = [p for p in params if not self._strip(p.split('=', 1)[0])]
+                segments.append(';'.join([name] + params))
+            path = '/'.join(segments)
+        if self.trailing_slash == 'strip' and len(path) > 1 and path.endswith('/'):
+            path = path.rstrip('/') or '/'
+        elif self.trailing_slash == 'add' and not path.endswith('/') and '.' not in path.rsplit('/', 1)[-1]:
+            path += '/'
+
+        query = parts.query
+        if query:
+            params = [p for p in query.split('&') if p and not self._strip(p.split('=', 1)[0])]
+            if self.sort_query:
+                params.sort()
+            query = '&'.join(params)
+
+        fragment = parts.fragment if self.keep_fragment else ''
+        return urlunsplit((scheme, host, path, query, fragment))
+
+    def canonicalize_links(self, links):
+        """
+        规范化一组链接并去重（保持原有顺序），同时记录归并统计
+
+        返回:
+            list[str] - 规范化后的链接
+        """
+        result = []
+        seen = set()
+        for link in links:
+            canonical = self.canonicalize(link)
+            with self._lock:
+                if self._raw.add_fingerprint(url_fingerprint(link)):
+                    self._canonical.add_fingerprint(url_fingerprint(canonical))
+                    if canonical != link:
+                        self.rewritten += 1
+            if canonical not in seen:
+                seen.add(canonical)
+                result.append(canonical)
+        return result
+
+    @property
+    def duplicates_avoided(self):
+        """不同写法被归并为同一 url 的次数（不同原始 url 数 - 不同规范 url 数）"""
+        with self._lock:
+            return len(self._raw) - len(self._canonical)
+
+    def to_dict(self):
+        return {
+            'trailing_slash': self.trailing_slash,
+            'sort_query': self.sort_query,
+            'rewritten': self.rewritten,
+            'duplicates_avoided': self.duplicates_avoided,
+            'memory_bytes': self._raw.memory_bytes() + self._canonical.memory_bytes()
+        }
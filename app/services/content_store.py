@@ -0,0 +1,166 @@
+"""
+页面正文存储 - 正文按 SHA-256 去重并压缩后存入独立集合，链接文档只保留哈希、大小与存储引用
+"""
+import hashlib
+import threading
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.models.page_content import PageContentModel
+from app.services.seen_set import FingerprintSet
+
+# 并发 upsert 同一哈希时的唯一索引冲突（其他写入已保存该正文）
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ContentStore:
+    """
+    正文存储（线程安全）
+
+    put 返回写入链接文档的引用字段，正文按批 upsert（$setOnInsert），
+    相同正文无论来自哪个 url、哪次爬取都只保存一份。
+    写入失败的批次重试一次，仍失败时计入 errors 并通过 on_error 回调；
+    flush 会等待进行中的写入完成，链接批次写入前调用 flush 即可保证引用的正文已落库。
+    """
+
+    def __init__(self, collection, batch_size=500, level=6, on_error=None):
+        """
+        参数:
+            collection: Collection - page_contents 集合
+            batch_size: int - 每批最多写入的正文数
+            level: int - zlib 压缩级别
+            on_error: callable - on_error(message, details)，写入失败时回调
+        """
+        self.collection = collection
+        self.batch_size = max(1, int(batch_size))
+        self.level = level
+        self.on_error = on_error
+        self.stored = 0
+        self.deduplicated = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.errors = 0
+        # 串行化批量写入，flush 返回时之前取出的批次都已写完
+        self._write_lock = threading.Lock()
+        # 本任务已提交过的正文哈希，重复正文不再压缩和写入
+        self._written = FingerprintSet()
+        self._pending = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def encode(text):
+        return text.encode('utf-8', 'surrogatepass')
+
+    @classmethod
+    def text_hash(cls, text):
+        """正文的 content_hash（与 put 写入链接文档的值一致）"""
+        return cls.content_hash(cls.encode(text))
+
+    def put(self, text):
+        """
+        保存正文
+
+        参数:
+            text: str - 页面正文
+
+        返回:
+            dict - {'content_hash', 'content_size', 'content_ref'}，正文为空时各字段为 None
+        """
+        if not text:
+            return {'content_hash': None, 'content_size': None, 'content_ref': None}
+        data = self.encode(text)
+        digest = self.content_hash(data)
+        ref = {'content_hash': digest, 'content_size': len(data), 'content_ref': PageContentModel.COLLECTION_NAME}
+        with self._lock:
+            if not self._written.add_fingerprint(int(digest[:16], 16) or 1):
+                self.deduplicated += 1
+                return ref
+        doc = PageContentModel.create(digest, data, self.level)
+        with self._lock:
+            self.raw_bytes += doc['size']
+            self.compressed_bytes += doc['compressed_size']
+            self._pending.append(UpdateOne({'_id': digest}, {'$setOnInsert': doc}, upsert=True))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+        return ref
+
+    def flush(self):
+        """写入剩余的正文（等待其他线程进行中的写入）"""
+        with self._write_lock:
+            with self._lock:
+                ops, self._pending = self._pending, []
+            if ops:
+                self._write_batch(ops)
+
+    def _write_batch(self, ops, retry=True):
+        """写入一批正文（调用方持有 _write_lock），失败的部分重试一次"""
+        failed = []
+        error = None
+        try:
+            upserted = self.collection.bulk_write(ops, ordered=False).upserted_count
+        except BulkWriteError as e:
+            upserted = e.details.get('nUpserted', 0)
+            errors = [err for err in e.details.get('writeErrors', []) if err.get('code') != DUPLICATE_KEY_ERROR]
+            failed = [ops[err['index']] for err in errors]
+            error = errors[0].get('errmsg') if errors else None
+        except PyMongoError as e:
+            upserted = 0
+            failed = list(ops)
+            error = str(e)
+        with self._lock:
+            self.stored += upserted
+            # 已由其他 url 或之前的爬取保存过
+            self.deduplicated += len(ops) - upserted - len(failed)
+        if not failed:
+            return
+        if retry:
+            self._write_batch(failed, retry=False)
+        else:
+            self._fail(len(failed), f"正文写入失败 {len(failed)} 条: {error}", {'failed': len(failed), 'error': error})
+
+    def _fail(self, count, message, details):
+        print(message)
+        with self._lock:
+            self.errors += count
+        if self.on_error is not None:
+            self.on_error(message, details)
+
+    def get(self, content_hash):
+        """
+        读取正文
+
+        返回:
+            str - 正文，不存在时返回 None
+        """
+        if not content_hash:
+            return None
+        return PageContentModel.decode(self.collection.find_one({'_id': content_hash}))
+
+    def get_many(self, content_hashes):
+        """
+        批量读取正文
+
+        返回:
+            dict - {content_hash: 正文}
+        """
+        hashes = list({h for h in content_hashes if h})
+        if not hashes:
+            return {}
+        return {doc['_id']: PageContentModel.decode(doc)
+                for doc in self.collection.find({'_id': {'$in': hashes}})}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'stored': self.stored,
+                'deduplicated': self.deduplicated,
+                'raw_bytes': self.raw_bytes,
+                'compressed_bytes': self.compressed_bytes,
+                'errors': self.errors
+            }
@@ -3,55 +3,58 @@
 """
 import requests
 from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from pathlib import Path
 import re
 import os
 import uuid
-import chardet
-import socket
 from datetime import datetime
 from bson import ObjectId
-from concurrent.futures import ThreadPoolExecutor, as_completed  # 多线程
+import threading
 import random
 import json
+import time
 
 from app.config import config
 import app.global_vars as app_global
 from app.database import get_db
 from app.models import CrawledLinkModel, CrawlTaskModel, CrawlLogModel
-from pymongo.errors import DuplicateKeyError  # 新增：捕获唯一索引冲突
-
-
-def safe_soup(content, content_type=None):
-    """安全的HTML/XML解析，支持智能检测和编码处理"""
+from app.services.response_store import ResponseRecord, ResponseStore
+from app.services.http_pool import create_pool, get_default_pool
+from app.services.stream_reader import BodyReader
+from app.services.encoding import EncodingResolver, get_encoding_resolver
+from app.services.link_extractor import StreamingLinkExtractor, content_kind, filter_links
+from app.services.parse_pool import extract_links_parallel, get_parse_pool
+from app.services.dns_resolver import ResolverStats, get_dns_cache
+from app.services.budget import CrawlBudget
+from app.services.scope import CrawlScope
+from app.services.canonical import UrlCanonicalizer
+from app.services.trap import TrapDetector
+from app.services.seen_set import create_seen_set
+from app.services.known_urls import KnownUrlIndex
+from app.services.link_writer import CrawledLinkWriter
+from app.services.content_store import ContentStore
+from app.services.file_store import get_file_store
+from app.services.warc_writer import WarcWriter
+from app.services.replay import ReplayPool, StoredLinkArchive, WarcArchive
+from app.services.link_probe import ProbeStats, classify_link, probe_link
+from app.services.pipeline import CrawlPipeline, PipelineStage
+from app.services.frontier import make_link_scorer
+
+# 默认请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+}
+
+
+def safe_soup(content, content_type=None, url=None):
+    """安全的HTML/XML解析，支持智能检测和编码处理（url 用于按主机缓存检测出的编码）"""
     import io
     from contextlib import redirect_stderr
 
-    # 先将 bytes 转换为字符串，避免 lxml 的编码错误
+    # 先将 bytes 转换为字符串，避免 lxml 的编码错误（HTTP 头 / BOM / <meta> 优先，必要时才做样本检测）
     if isinstance(content, (bytes, bytearray)):
-        try:
-            # 使用 chardet 检测编码
-            detected = chardet.detect(content)
-            encoding = detected.get('encoding', 'utf-8')
-            confidence = detected.get('confidence', 0)
-
-            # 如果检测置信度太低，使用常见编码尝试
-            if confidence < 0.7:
-                for enc in ['utf-8', 'gbk', 'gb2312', 'gb18030', 'latin1']:
-                    try:
-                        content = content.decode(enc, errors='ignore')
-                        break
-                    except:
-                        continue
-                else:
-                    # 所有编码都失败，使用 replace 模式
-                    content = content.decode('utf-8', errors='replace')
-            else:
-                content = content.decode(encoding or 'utf-8', errors='ignore')
-        except Exception:
-            # 解码失败，使用 replace 模式
-            content = content.decode('utf-8', errors='replace')
+        content = get_encoding_resolver().decode(content, content_type, url)
 
     # 检测是否是 XML
     is_xml = False
@@ -88,15 +91,17 @@ def safe_soup(content, content_type=None):
             return None
 
 
-def safe_request(url, headers, timeout=2):
-    """带异常处理的请求封装"""
+def safe_request(url, headers, timeout=2, pool=None, on_chunk=None):
+    """带异常处理的请求封装（通过连接池复用 keep-alive 连接，on_chunk 接收流式数据块）"""
+    pool = pool or get_default_pool()
     try:
-        response = requests.get(
+        response = pool.get(
             url,
             headers=headers,
             timeout=timeout,
             allow_redirects=True,
-            verify=True
+            verify=True,
+            on_chunk=on_chunk
         )
         response.raise_for_status()
         return response
@@ -111,6 +116,25 @@ def safe_request(url, headers, timeout=2):
     return None
 
 
+def conditional_headers(headers, exclude, url):
+    """
+    增量重新验证：已爬取的页面在请求头中附加 If-None-Match / If-Modified-Since
+
+    参数:
+        headers: dict - 基础请求头
+        exclude: set | KnownUrlIndex - 排除集合（提供 revalidation_headers 时才重新验证）
+        url: str - 页面 url
+
+    返回:
+        dict - 请求头，url 不需要重新验证时返回 None
+    """
+    revalidation_headers = getattr(exclude, 'revalidation_headers', None)
+    conditional = revalidation_headers(url) if revalidation_headers else None
+    if conditional is None:
+        return None
+    return {**headers, **conditional}
+
+
 # 基于链接特征的轻量级重要性评估
 class LinkAnalyzer:
     def __init__(self):
@@ -214,30 +238,24 @@ class CriticalLinkDetector:
 
 
 
-def get_ip_address(domain):
+def get_ip_address(domain, stats=None):
     """
-    获取域名的IPv4地址
+    获取域名的IPv4地址（经进程级 DNS 缓存）
 
     参数:
         domain: str - 域名
+        stats: ResolverStats - 任务级命中统计（可选）
 
     返回:
         str - IPv4地址，失败返回 None
     """
-    try:
-        # 使用 socket.gethostbyname 获取IPv4地址
-        ip_address = socket.gethostbyname(domain)
-        return ip_address
-    except socket.gaierror as e:
-        print(f"获取IP地址失败 {domain}: {e}")
-        return None
-    except Exception as e:
-        print(f"获取IP地址异常 {domain}: {e}")
-        return None
+    return get_dns_cache().resolve(domain, stats=stats)
 
-def screenshot_page(url, save_dir):
+def screenshot_page(url, save_dir, should_stop=None):
     """
     对指定 URL 截图并保存到指定目录 - 使用 pyppeteer 作为备选方案
+
+    should_stop: callable - 取消检查函数，页面加载期间返回 True 时放弃截图
     """
     try:
         import asyncio
@@ -270,8 +288,15 @@ def screenshot_page(url, save_dir):
                 page = await browser.newPage()
                 await page.setViewport({'width': 1920, 'height': 1080})
                 
-                # 访问页面
-                await page.goto(url, {'waitUntil': 'networkidle2', 'timeout': 30000})
+                # 访问页面（加载期间定期检查取消信号）
+                goto = asyncio.ensure_future(page.goto(url, {'waitUntil': 'networkidle2', 'timeout': 30000}))
+                while not goto.done():
+                    if should_stop and should_stop():
+                        goto.cancel()
+                        print(f"截图已取消: {url}")
+                        return None
+                    await asyncio.wait([goto], timeout=0.2)
+                goto.result()
                 
                 # 截图
                 await page.screenshot({'path': save_path, 'fullPage': False})
@@ -303,7 +328,67 @@ def screenshot_page(url, save_dir):
         print(f"pyppeteer 方案失败: {e}")
         return None
         
-def get_all_links(url, depth=3, exclude=None, visited=None):
+def extract_page_links(url, response, exclude=None, extractor=None, canonicalizer=None, traps=None, resolver=None):
+    """
+    从单个页面响应中提取有效子链接（同步/异步引擎共用）
+
+    参数:
+        url: str - 页面 url
+        response: requests.Response - 页面响应
+        exclude: set - 需要排除的 url 集合
+        extractor: StreamingLinkExtractor - 下载时使用的流式提取器（已完整解析时直接使用其结果）
+        canonicalizer: UrlCanonicalizer - url 规范化规则
+        traps: TrapDetector - 爬虫陷阱检测
+        resolver: EncodingResolver - 任务级编码识别器（为空时使用进程级识别器）
+
+    返回:
+        list[str] - 过滤后的有效链接
+    """
+    if exclude is None:
+        exclude = set()
+
+    # 检查内容类型，跳过二进制文件与不可解析的内容
+    content_type = response.headers.get('Content-Type', '').lower()
+    kind = content_kind(content_type)
+    if kind == 'binary':
+        print(f"跳过二进制文件: {url} (Content-Type: {content_type})")
+        return []
+    if kind == 'unparseable':
+        print(f"跳过不可解析的内容: {url} (Content-Type: {content_type})")
+        return []
+
+    if extractor is not None and extractor.usable:
+        # 下载过程中已流式提取，无需再次解析整页
+        links = extractor.links
+    else:
+        # 启用解析进程池时在子进程中解析
+        content_type = response.headers.get('Content-Type', '')
+        encoding = resolver.resolve(response.content, content_type, response.url) if resolver else None
+        links = extract_links_parallel(response.content, response.url, content_type, encoding)
+    if links is None:
+        print(f"无法解析 {url} 的内容")
+        return []
+
+    # 过滤有效链接（规范化后跳过排除列表中的链接）
+    valid_links = filter_links(links, exclude, canonicalizer, traps)
+
+    return valid_links
+
+
+def new_stream_extractor(on_links=None, resolver=None):
+    """
+    创建下载时使用的流式链接提取器
+
+    启用解析进程池时返回 None（整页交给子进程解析，不在 I/O 线程中解析）
+    """
+    if get_parse_pool() is not None:
+        return None
+    return StreamingLinkExtractor(on_links=on_links, resolver=resolver)
+
+
+def get_all_links(url, depth=3, exclude=None, visited=None, store=None, pool=None, budget=None,
+                  should_stop=None, scope=None, hops=0, on_discovered=None, canonicalizer=None, traps=None,
+                  resolver=None, scheduled=None, scorer=None):
     """
     递归爬取链接（支持增量爬取）
 
@@ -311,19 +396,38 @@ def get_all_links(url, depth=3, exclude=None, visited=None):
         url: str - 需要爬虫处理的 url 链接
         depth: int - 需要爬虫处理的深度
         exclude: set - 需要排除的 url 集合（用于增量更新策略）
-        visited: set - 已访问的 url 集合（避免重复爬取）
+        visited: set - 已访问的 url 集合（避免重复爬取，默认使用 create_seen_set 创建的紧凑集合）
+        store: ResponseStore - 响应记录表（记录已下载的页面，供抓取阶段复用）
+        pool: HttpSessionPool - HTTP 连接池
+        budget: CrawlBudget - 抓取预算（耗尽后停止递归）
+        should_stop: callable - 取消检查函数（返回 True 时停止递归）
+        scope: CrawlScope - 抓取范围（范围外链接只记录不递归）
+        hops: int - 当前页面的范围外跳数
+        on_discovered: callable - on_discovered(links)，链接不再需要发现阶段下载时立即回调（供流水线边发现边处理）
+        canonicalizer: UrlCanonicalizer - url 规范化规则（visited / exclude 按规范化后的 url 比较）
+        traps: TrapDetector - 爬虫陷阱检测（陷阱模式下的链接被丢弃或限流）
+        resolver: EncodingResolver - 任务级编码识别器（主机编码缓存只在本任务内有效）
+        scheduled: set - 祖先页面已安排递归、尚未下载的子页面（内部递归使用；由安排它的父页面交付，
+            作为叶子再次出现时不重复交付，避免在抓取阶段重复下载）
+        scorer: callable - score(url) -> float，子页面按得分从高到低递归（为空时按链接顺序）
 
     返回:
-        links: list[str] - 爬到的 links
+        links: list[str] - 爬到的 links（指定 on_discovered 时链接只通过回调交付，返回空列表）
     """
     if depth == 0:
         return []
+    if budget is not None and budget.exhausted:
+        return []
+    if should_stop and should_stop():
+        return []
 
     # 初始化 exclude 和 visited
     if exclude is None:
         exclude = set()
     if visited is None:
-        visited = set()
+        visited = create_seen_set()
+    if scheduled is None:
+        scheduled = set()
 
     # 如果当前 URL 在排除列表中或已访问，则跳过
     if url in exclude or url in visited:
@@ -332,115 +436,123 @@ def get_all_links(url, depth=3, exclude=None, visited=None):
     # 标记为已访问
     visited.add(url)
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
-
-    response = safe_request(url, headers)
-    if not response:
-        print(f"{url} 无响应")
-        return []
-
-    # 检查内容类型，跳过二进制文件
-    content_type = response.headers.get('Content-Type', '').lower()
-    binary_types = [
-        'image/', 'video/', 'audio/', 'application/pdf',
-        'application/zip', 'application/x-rar', 'application/octet-stream',
-        'font/', 'application/x-font', 'application/vnd.ms-fontobject'
-    ]
-    if any(bt in content_type for bt in binary_types):
-        print(f"跳过二进制文件: {url} (Content-Type: {content_type})")
+    if budget is not None and not budget.acquire_page():
         return []
-
-    # 只解析 HTML/XML 类型的内容
-    parseable_types = ['text/html', 'application/xhtml', 'text/xml', 'application/xml', 'application/rss', 'application/atom']
-    if content_type and not any(pt in content_type for pt in parseable_types):
-        # 如果有明确的 Content-Type 但不是可解析类型，跳过
-        if 'text/' not in content_type and 'application/' in content_type:
-            print(f"跳过不可解析的内容: {url} (Content-Type: {content_type})")
+    # 增量重新验证的页面发送条件请求
+    revalidation = conditional_headers(DEFAULT_HEADERS, exclude, url)
+    # 边下载边提取链接，不再构建整页文档树
+    extractor = new_stream_extractor(resolver=resolver)
+    response = safe_request(url, revalidation or DEFAULT_HEADERS, pool=pool,
+                            on_chunk=extractor.feed if extractor else None)
+    if extractor:
+        extractor.close()
+    if budget is not None and response:
+        budget.charge_bytes(len(response.content))
+    if store is not None or revalidation is not None:
+        record = ResponseRecord.from_response(url, response, resolver) if response else ResponseRecord.failed(url)
+        if store is not None:
+            store.put(record)
+        # 未变化的页面不再解析和递归（抓取阶段按同一结果跳过保存）
+        if revalidation is not None and exclude.revalidate(url, record) == 'unchanged':
+            print(f"{url} 未变化，跳过解析")
             return []
-
-    base_url = response.url
-    soup = safe_soup(response.content, response.headers.get('Content-Type', ''))
-    if not soup:
-        print(f"无法解析 {url} 的内容")
+    if not response:
+        print(f"{url} 无响应")
         return []
 
-    # 定义需要检查的HTML元素和属性
-    elements_to_check = {
-        'a': ['href'],
-        'img': ['src', 'srcset', 'data-src', 'data-srcset'],
-        'script': ['src'],
-        'link': ['href'],
-        'video': ['src', 'poster', 'data-src'],
-        'audio': ['src', 'data-src'],
-        'iframe': ['src', 'data-src'],
-        'source': ['src', 'srcset', 'data-src'],
-        'embed': ['src', 'data-src'],
-        'track': ['src'],
-        'object': ['data']
-    }
-
-    links = set()
-
-    # 提取所有链接
-    for tag, attributes in elements_to_check.items():
-        for element in soup.find_all(tag):
-            for attr in attributes:
-                if element.has_attr(attr):
-                    value = element[attr].strip()
-                    if not value:
-                        continue
-
-                    if attr in ['srcset', 'data-srcset']:
-                        parts = [p.strip() for p in value.split(',') if p.strip()]
-                        for part in parts:
-                            url_part = part.split()[0]
-                            absolute_url = urljoin(base_url, url_part)
-                            links.add(absolute_url)
-                    else:
-                        absolute_url = urljoin(base_url, value)
-                        links.add(absolute_url)
-
-    # 过滤有效链接
-    valid_schemes = ['http', 'https']
-    invalid_file = ['.js', '.css']
-
-    valid_links = []
-    for link in links:
-        # 跳过排除列表中的链接
-        if link in exclude:
+    valid_links = extract_page_links(url, response, exclude, extractor=extractor, canonicalizer=canonicalizer,
+                                     traps=traps, resolver=resolver)
+    if budget is not None:
+        valid_links = budget.admit_links(valid_links)
+
+    # 递归爬取子链接（通过回调交付时不再累积完整链接列表）
+    all_links = [] if on_discovered else list(valid_links)
+    if depth <= 1:
+        if on_discovered:
+            leaves = [link for link in valid_links if link not in scheduled]
+            if leaves:
+                on_discovered(leaves)
+        return all_links
+
+    children = []
+    leaves = []
+    for link in valid_links:
+        # 资源类链接不含子链接，留给抓取阶段轻量校验
+        if classify_link(link) != 'page':
+            leaves.append(link)
             continue
-        if urlparse(link).scheme in valid_schemes:
-            if not any(ext in link for ext in invalid_file):
-                valid_links.append(link)
-
-    # 递归爬取子链接
-    all_links = list(valid_links)
-    if depth > 1:
-        for link in valid_links:
-            # 传递 exclude 和 visited 集合，避免重复爬取
-            sub_links = get_all_links(link, depth=depth-1, exclude=exclude, visited=visited)
-            all_links.extend(sub_links)
+        child_hops = scope.child_hops(link, hops) if scope is not None else 0
+        if child_hops is None:
+            leaves.append(link)
+        else:
+            children.append((link, child_hops))
+    if on_discovered:
+        leaves = [link for link in leaves if link not in scheduled]
+        if leaves:
+            on_discovered(leaves)
+    if scorer is not None:
+        # 与异步引擎的抓取队列一致，重要的子页面优先递归（预算耗尽前先抓取）
+        children.sort(key=lambda child: scorer(child[0]), reverse=True)
+    # 子页面在递归前登记，兄弟分支中作为叶子出现时交给本页面在递归后交付
+    scheduled.update(link for link, _ in children)
+    for link, child_hops in children:
+        scheduled.discard(link)
+        # 传递 exclude 和 visited 集合，避免重复爬取
+        sub_links = get_all_links(link, depth=depth-1, exclude=exclude, visited=visited, store=store, pool=pool, budget=budget,
+                                  should_stop=should_stop, scope=scope, hops=child_hops, on_discovered=on_discovered,
+                                  canonicalizer=canonicalizer, traps=traps, resolver=resolver, scheduled=scheduled,
+                                  scorer=scorer)
+        all_links.extend(sub_links)
+        # 子页面已下载（响应记录在 store 中），交给后续处理
+        if on_discovered:
+            on_discovered([link])
 
     return all_links
 
 
-def crawler_link(url, depth=3, exclude=None, original_domain=None, threads=10):
+def crawler_link(url, depth=3, exclude=None, original_domain=None, threads=None, engine=None, stats=None,
+                 max_links=None, max_pages=None, max_bytes=None, time_budget=None, should_stop=None,
+                 scope=None, on_result=None, on_progress=None, canonical=None, on_trap=None, replay=None,
+                 on_seed=None, on_unchanged=None, on_error=None, revisit=None):
     """
-    爬虫主函数 - API调用入口（支持增量爬取，链接处理多线程）
+    爬虫主函数 - API调用入口（支持增量爬取）
+
+    发现阶段找到的链接边发现边进入 抓取 -> 解析 -> 打分 -> 保存 流水线，
+    阶段之间为有界队列，下游处理不过来时上游阻塞，内存占用与站点规模无关。
 
     参数:
         url: str - 需要爬虫的 url 链接
         depth: int - 爬虫的深度
-        exclude: list[str] - 需要排除的 url (用于增量更新策略)
-        threads: int - 并发线程数
+        exclude: iterable[str] | KnownUrlIndex - 需要排除的 url (用于增量更新策略)，
+            传入 KnownUrlIndex 时在发现链接时按批查询，不预先加载
+        threads: int - 抓取阶段线程数，默认读取 config.pipeline_fetch_workers
+        engine: str - 链接发现引擎 (async/sync)，默认读取 config.crawl_engine
+        stats: dict - 扩展统计信息（可选，由本函数填充，如连接复用计数）
+        max_links: int - 最多发现的链接数
+        max_pages: int - 最多发起的页面请求数，默认读取 config.crawl_max_pages
+        max_bytes: int - 最多下载的字节数，默认读取 config.crawl_max_bytes
+        time_budget: float - 最长抓取耗时（秒），默认读取 config.crawl_time_budget
+        should_stop: callable - 取消检查函数，返回 True 时停止抓取并中止进行中的请求
+        scope: dict - 抓取范围规则（WebsiteModel.scope），默认读取 config.crawl_scope_mode
+        on_result: callable - on_result(result)，保存阶段逐条回调；为空时结果收集到 results 中返回
+        on_progress: callable - on_progress(depths)，运行期间定期回调各阶段队列深度
+        canonical: dict - url 规范化规则（WebsiteModel.canonical），默认读取 config.canonical_*
+        on_trap: callable - on_trap(trap)，检测到爬虫陷阱时回调（每个陷阱模式一次）
+        replay: WarcArchive | StoredLinkArchive - 回放源；指定时响应全部来自存档，不访问网络（不截图、不解析 DNS）
+        on_seed: callable - on_seed(record)，起始页面不作为链接保存，结束时交付其响应记录（请求失败时不回调）
+        on_unchanged: callable - on_unchanged(link, record)，增量重新验证未变化的页面不进入解析阶段，改为回调
+        on_error: callable - on_error(stage, link, error)，流水线阶段处理某个链接抛出异常时回调（该链接被丢弃）
+        revisit: callable - revisit() 逐批返回该网站已保存的链接文档；增量重新验证时在发现阶段结束后
+            对未被发现的已保存页面同样发送条件请求（只能经由未变化页面到达的页面不会被发现）
     返回:
-        tuple: (results, valid_rate, precision_rate, screenshot_path)
-        - results: list[dict] - [{'link': str, 'content_path': str}, ...]
+        tuple: (results, valid_rate, precision_rate, screenshot_path, valid_links_count, invalid_links_count)
+        - results: list[dict] - [{'link': str, 'content_path': str}, ...]（指定 on_result 时为空列表），
+          content_path 为正文在文件存储中的路径（无正文时为 None）
         - valid_rate: float - 有效率
         - precision_rate: float - 精准率
         - screenshot_path: str - 截图路径
+        - valid_links_count: int - 有效链接数
+        - invalid_links_count: int - 无效链接数
     """
     # 获取所有链接
     print(f"开始爬取: {url}, 深度: {depth}")
@@ -455,65 +567,128 @@ def crawler_link(url, depth=3, exclude=None, original_domain=None, threads=10):
     # 初始化链接重要性检测器
     detector = CriticalLinkDetector()
 
+    # 取消信号：由后台线程轮询 should_stop，触发后中止连接池中的请求
+    cancel_event = threading.Event()
+    watch_done = threading.Event()
+
     # 对入口页面进行截图
     screenshot_path = None
-    try:
-        screenshot_path = screenshot_page(url, save_dir)
-    except Exception as e:
-        print(f"入口页面截图失败 {url}: {e}")
-
-    # 转换 exclude 为 set 以提高查找效率
-    exclude_set = set(exclude) if exclude else set()
-
-    # 调用 get_all_links 获取所有链接（已自动排除 exclude 中的链接）
-    all_links = get_all_links(url, depth, exclude=exclude_set)
-
-    # 去重
-    unique_links = list(set(all_links))
-    print(f"总共爬取到 {len(unique_links)} 个唯一链接（已排除 {len(exclude_set)} 个已存在链接）")
-
-    illegal_chars = r'[<>:"/\\|?*\x00-\x1F]'
-
-    # 多线程处理每个链接
+    if replay is None and not (should_stop and should_stop()):
+        try:
+            screenshot_path = screenshot_page(url, save_dir, should_stop=should_stop)
+        except Exception as e:
+            print(f"入口页面截图失败 {url}: {e}")
+
+    # url 规范化规则：发现的链接、入口 url 与 exclude 统一按规范化后的 url 去重
+    canonicalizer = UrlCanonicalizer.from_rules(
+        canonical,
+        default_strip_params=config.canonical_strip_params,
+        default_trailing_slash=config.canonical_trailing_slash
+    )
+    start_url = canonicalizer.canonicalize(url)
+    # 爬虫陷阱检测：日历、分面搜索等无限 url 空间的后续链接被丢弃或限流
+    traps = TrapDetector.from_config(on_trap=on_trap)
+    # 编码识别器按任务创建，主机编码缓存不跨任务共享
+    resolver = EncodingResolver.from_config()
+
+    # exclude 与已访问集合使用紧凑的指纹集合 / Bloom 过滤器，不保存完整 url 字符串
+    if isinstance(exclude, KnownUrlIndex):
+        exclude_set = exclude
+    else:
+        exclude_set = create_seen_set()
+        if exclude:
+            exclude_set.update(canonicalizer.canonicalize(link) for link in exclude)
+    # 增量重新验证：已爬取的页面发送条件请求，未变化的跳过解析
+    revalidating = isinstance(exclude_set, KnownUrlIndex) and exclude_set.revalidate_pages
+    visited = create_seen_set()
+
+    # 发现阶段下载过的页面记录在 store 中，抓取阶段取出复用后立即释放
+    store = ResponseStore()
+    # 任务级连接池，发现阶段与抓取阶段共用 keep-alive 连接；正文流式读取并限长
+    body_reader = BodyReader.from_config()
+    # 可选的 WARC 输出：连接池中完成的请求/响应交给独立写入线程
+    if replay is not None:
+        # 回放模式：连接池替换为存档读取，解析、打分与保存流程不变
+        warc = None
+        pool = ReplayPool(replay)
+    else:
+        warc = WarcWriter.from_config(prefix=re.sub(r'[^\w.-]', '_', f"{domain}_{unique_id}"))
+        pool = create_pool(body_reader=body_reader, archive=warc)
+    # 抓取预算，在发现阶段与抓取阶段中实时检查
+    budget = CrawlBudget(
+        max_pages=max_pages if max_pages is not None else config.crawl_max_pages,
+        max_links=max_links,
+        max_bytes=max_bytes if max_bytes is not None else config.crawl_max_bytes,
+        time_limit=time_budget if time_budget is not None else config.crawl_time_budget
+    )
+
+    # 抓取范围规则（正则在此处编译一次）
+    crawl_scope = CrawlScope.from_rules(url, scope, default_mode=config.crawl_scope_mode)
+
+    def _watch_cancel():
+        while not watch_done.is_set():
+            if should_stop():
+                print("检测到取消信号，中止抓取")
+                cancel_event.set()
+                pool.cancel()
+                return
+            watch_done.wait(0.2)
+
+    if should_stop is not None:
+        threading.Thread(target=_watch_cancel, daemon=True).start()
+
+    # 页面正文写入进程共享的内容寻址文件存储（相同正文只保存一份）
+    file_store = get_file_store()
+    # 本任务写入文件存储的统计（存储本身跨任务共享，其总量不代表本任务）
+    file_stats = {'root': file_store.root, 'puts': 0, 'bytes': 0, 'errors': 0}
+    file_stats_lock = threading.Lock()
+
+    dns_stats = ResolverStats()
+    probe_stats = ProbeStats()
+    light_validation = config.link_validation_mode == 'light'
+
+    # 指标在打分阶段逐条累加，不再保留全部结果
+    metrics = {'total': 0, 'valid': 0, 'invalid': 0, 'err': 0}
+    metrics_lock = threading.Lock()
     results = []
 
-    def process_link(link: str):
+    def fetch_link(link):
+        """抓取阶段：优先复用发现阶段的响应记录，未下载过的链接才发起请求"""
         print(f"处理链接: {link}")
-        link_domain = urlparse(link).netloc
-        ip_address = get_ip_address(link_domain)
+        link_domain = urlparse(link).hostname
+        if replay is not None:
+            ip_address = pool.ip_address(link)
+        else:
+            ip_address = get_ip_address(link_domain, stats=dns_stats)
 
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-        }
-        response = safe_request(link, headers)
-
-        if response:
-            filename = re.sub(illegal_chars, '', link)
-            if len(filename) > 200:
-                filename = filename[:200]
-            save_path = os.path.join(save_dir, filename)
-            content_type = response.headers.get('Content-Type', '')
-            importance_score = detector.calculate_link_importance(link, original_domain=original_domain,content_type = content_type)
-            
-            if "text" in content_type:
-                # 确保响应对象有 text 属性且不为 None
-                if hasattr(response, 'text') and response.text is not None:
-                    response_text = response.text
-                else:
-                    response_text = ''
-            else:
-                response_text = ''
+        # 入口页面的记录保留到结束时交付 on_seed（入口页面被其他页面链接时同样作为链接处理）
+        record = store.get(link) if link == start_url else store.pop(link)
+        if record is None:
+            # 预算耗尽后不再发起请求
+            if not budget.acquire_page():
+                return None
+            # 资源类链接只获取状态码与内容类型；探测结果为文本时仍需完整下载
+            if light_validation and classify_link(link) != 'page':
+                record = probe_link(link, DEFAULT_HEADERS, pool, stats=probe_stats)
+                if record.ok and 'text' in record.content_type:
+                    record = None
+            if record is None:
+                probe_stats.incr('full_gets')
+                response = safe_request(link, conditional_headers(DEFAULT_HEADERS, exclude_set, link) or DEFAULT_HEADERS,
+                                        pool=pool)
+                if response:
+                    budget.charge_bytes(len(response.content))
+                record = ResponseRecord.from_response(link, response, resolver) if response else ResponseRecord.failed(link)
+        if revalidating and exclude_set.revalidate(link, record) == 'unchanged':
+            if on_unchanged is not None:
+                on_unchanged(link, record)
+            return None
+        return link, record, ip_address
 
-            return {
-                'link': link,
-                'content_path': save_path,
-                'status_code': response.status_code,
-                'content_type': content_type,
-                'ip_address': ip_address,
-                'importance_score': round(importance_score, 4),
-                'text': response_text
-            }
-        else:
+    def parse_link(item):
+        """解析阶段：解码文本正文，之后只保留结果字典，释放原始响应"""
+        link, record, ip_address = item
+        if not record.ok:
             return {
                 'link': link,
                 'content_path': None,
@@ -521,34 +696,209 @@ def crawler_link(url, depth=3, exclude=None, original_domain=None, threads=10):
                 'content_type': '',
                 'ip_address': ip_address,
                 'importance_score': 0.0,
-                'text':''
+                'etag': None,
+                'last_modified': None,
+                'text': ''
             }
+        content_type = record.content_type
+        # 已下载的正文写入内容寻址存储，不再重新请求
+        content_path = None
+        if record.content:
+            try:
+                _, content_path = file_store.put(record.content)
+                with file_stats_lock:
+                    file_stats['puts'] += 1
+                    file_stats['bytes'] += len(record.content)
+            except OSError as e:
+                print(f"正文保存失败 {link}: {e}")
+                with file_stats_lock:
+                    file_stats['errors'] += 1
+        return {
+            'link': link,
+            'content_path': content_path,
+            'status_code': record.status_code,
+            'content_type': content_type,
+            'ip_address': ip_address,
+            'importance_score': 0.0,
+            'etag': record.etag,
+            'last_modified': record.last_modified,
+            'text': record.text if "text" in content_type else ''
+        }
 
-    with ThreadPoolExecutor(max_workers=max(1, int(threads))) as executor:
-        for res in executor.map(process_link, unique_links):
-            results.append(res)
+    def score_link(result):
+        """打分阶段：计算重要性得分并累加有效/无效指标"""
+        if result['status_code'] is not None:
+            importance_score = detector.calculate_link_importance(result['link'], original_domain=original_domain,
+                                                                  content_type=result['content_type'])
+            result['importance_score'] = round(importance_score, 4)
+        with metrics_lock:
+            metrics['total'] += 1
+            if result.get('importance_score'):
+                metrics['valid'] += 1
+                if result.get('importance_score') < 1.0:
+                    metrics['invalid'] += 1
+                    result['link_type'] = 'invalid'
+                else:
+                    # 仅当域名在 domain.json 中时才计入 err_link
+                    domain = result.get('url', '')
+                    result['link_type'] = 'valid'
+                    # if domain and domain in domain_set:
+                    if 'ad' in domain.lower() or 'ads' in domain.lower():
+                        metrics['err'] += 1
+        return result
+
+    def persist_link(result):
+        """保存阶段：交给调用方写入数据库，未指定回调时收集到 results"""
+        if on_result is not None:
+            on_result(result)
+        else:
+            results.append(result)
+
+    def stage_error(stage, item, error):
+        """流水线阶段异常：取出输入项对应的链接交给调用方记录"""
+        if isinstance(item, tuple):
+            link = item[0]
+        elif isinstance(item, dict):
+            link = item.get('link')
+        else:
+            link = item
+        if on_error is not None:
+            on_error(stage, link, error)
+
+    queue_size = config.pipeline_queue_size
+    pipeline = CrawlPipeline(
+        [
+            PipelineStage('fetch', fetch_link, threads or config.pipeline_fetch_workers, queue_size),
+            PipelineStage('parse', parse_link, config.pipeline_parse_workers, queue_size),
+            PipelineStage('score', score_link, config.pipeline_score_workers, queue_size),
+            PipelineStage('persist', persist_link, config.pipeline_persist_workers, queue_size),
+        ],
+        should_stop=cancel_event.is_set,
+        on_progress=on_progress,
+        progress_interval=config.pipeline_progress_interval,
+        on_error=stage_error
+    )
+
+    # 发现阶段回调：链接去重后立即进入流水线（流水线满时阻塞发现阶段）
+    emitted = create_seen_set()
+    emitted_lock = threading.Lock()
+    known_hosts = set()
+
+    def emit(links):
+        with emitted_lock:
+            new_links = [link for link in links if emitted.add(link)]
+            # 每个主机在本任务内只解析一次，新出现的主机批量并行预解析
+            new_hosts = {urlparse(link).hostname for link in new_links} - known_hosts
+            known_hosts.update(new_hosts)
+        if config.dns_prefetch and replay is None and new_hosts:
+            get_dns_cache().resolve_many(new_hosts, stats=dns_stats)
+        for link in new_links:
+            if not pipeline.put(link):
+                return
+
+    pipeline.start()
+
+    # 获取所有链接（已自动排除 exclude 中的链接）
+    engine = engine or config.crawl_engine
+    crawl_engine = None
+    # 两种引擎都按链接重要性得分优先抓取
+    scorer = make_link_scorer(detector, original_domain or domain)
+    if engine == 'async':
+        from app.services.async_crawler import AsyncCrawlEngine
+        crawl_engine = AsyncCrawlEngine(
+            max_concurrency=config.crawl_max_concurrency,
+            per_host_limit=config.crawl_per_host_limit,
+            pool=pool,
+            scorer=scorer,
+            budget=budget,
+            should_stop=cancel_event.is_set,
+            scope=crawl_scope,
+            canonicalizer=canonicalizer,
+            traps=traps,
+            resolver=resolver
+        )
+        crawl_engine.crawl(start_url, depth, exclude=exclude_set, visited=visited, store=store, on_discovered=emit)
+    else:
+        get_all_links(start_url, depth, exclude=exclude_set, visited=visited, store=store, pool=pool, budget=budget,
+                      should_stop=cancel_event.is_set, scope=crawl_scope, on_discovered=emit,
+                      canonicalizer=canonicalizer, traps=traps, resolver=resolver, scorer=scorer)
+
+    # 入口页面的记录由抓取阶段保留在 store 中，结束时交付 on_seed
+    seed = store.get(start_url)
+    if revalidating and not cancel_event.is_set():
+        # 入口页面本身是已保存的链接时按重新验证结果处理（未变化时只更新爬取时间，变化时重新保存）
+        if seed is not None and exclude_set.revalidate(start_url, seed) is not None:
+            emit([start_url])
+        if revisit is not None:
+            # 只能经由未变化页面到达的已保存页面从这里开始重新验证：未变化的页面只更新爬取时间，
+            # 变化的页面照常解析并发现新链接（至少在入口页面之下一层，剩余深度按 depth - 1 计）
+            for docs in revisit():
+                if cancel_event.is_set():
+                    break
+                pages = [link for link in exclude_set.revisit(docs) if link not in visited]
+                if not pages:
+                    continue
+                if crawl_engine is not None:
+                    crawl_engine.crawl(None, depth - 1, exclude=exclude_set, visited=visited, store=store,
+                                       on_discovered=emit, seeds=pages)
+                    continue
+                for link in pages:
+                    get_all_links(link, depth - 1, exclude=exclude_set, visited=visited, store=store, pool=pool,
+                                  budget=budget, should_stop=cancel_event.is_set, scope=crawl_scope,
+                                  on_discovered=emit, canonicalizer=canonicalizer, traps=traps, resolver=resolver,
+                                  scorer=scorer)
+                    emit([link])
+
+    # 链接已全部通过 emit 交付（包括预算耗尽时未抓取的页面）
+    print(f"总共爬取到 {len(emitted)} 个唯一链接（已排除 {len(exclude_set)} 个已存在链接）")
+
+    pipeline_stats = pipeline.finish()
+    watch_done.set()
+    print(f"复用发现阶段响应 {store.hits} 个")
+    store.pop(start_url)
+    if on_seed is not None and seed is not None and seed.ok and seed.status_code != 304:
+        on_seed(seed)
+
+    pool_stats = pool.stats()
+    pool.close()
+    warc_stats = warc.close() if warc is not None else None
+    if warc_stats:
+        print(f"WARC: 写入 {warc_stats['records']} 条记录, {len(warc_stats['files'])} 个文件")
+    print(f"连接复用: 请求 {pool_stats['requests']} 次, 新建连接 {pool_stats['connections']} 个")
+    print(f"DNS 缓存: 命中 {dns_stats.hits} 次, 未命中 {dns_stats.misses} 次, 预解析 {dns_stats.prefetched} 个主机")
+    print(f"URL 规范化: 改写 {canonicalizer.rewritten} 个, 归并重复 {canonicalizer.duplicates_avoided} 个")
+    if traps.dropped or traps.throttled:
+        print(f"爬虫陷阱: 丢弃 {traps.dropped} 个链接, 限流保留 {traps.throttled} 个")
+    seen_sets = {'visited': visited.to_dict(), 'exclude': exclude_set.to_dict(), 'discovered': emitted.to_dict()}
+    seen_sets['memory_bytes'] = sum(s['memory_bytes'] for s in seen_sets.values())
+    print(f"已见集合 ({emitted.kind}): 共 {seen_sets['memory_bytes'] / 1024:.1f} KB")
+    if stats is not None:
+        stats['http_pool'] = pool_stats
+        stats['dns'] = dns_stats.to_dict()
+        stats['budget'] = budget.to_dict()
+        stats['cancelled'] = cancel_event.is_set()
+        stats['scope'] = crawl_scope.to_dict()
+        stats['canonical'] = canonicalizer.to_dict()
+        stats['traps'] = traps.to_dict()
+        stats['seen_sets'] = seen_sets
+        stats['validation'] = probe_stats.to_dict()
+        stats['body'] = body_reader.to_dict()
+        stats['encoding'] = resolver.to_dict()
+        stats['file_store'] = dict(file_stats)
+        if revalidating:
+            stats['revalidation'] = exclude_set.revalidation_stats()
+        if warc_stats:
+            stats['warc'] = warc_stats
+        stats['pipeline'] = pipeline_stats
+        stats['processed_links'] = metrics['total']
+        parse_pool = get_parse_pool()
+        if parse_pool is not None:
+            stats['parse_pool'] = parse_pool.stats()
 
     # 计算指标
-    total_links = len(results)
-    valid_links_count = 0
-    invalid_links_count = 0
-    err_link = 0
-
-    for r in results:
-        if r.get('importance_score'):
-            valid_links_count += 1
-            if r.get('importance_score') < 1.0:
-                invalid_links_count += 1
-                r['link_type'] = 'invalid'
-            else:
-                # 仅当域名在 domain.json 中时才计入 err_link
-                domain = r.get('url', '')
-                r['link_type'] = 'valid'
-                # if domain and domain in domain_set:
-                if 'ad' in domain.lower() or 'ads' in domain.lower():
-                    err_link += 1
-    # valid_links = len([r for r in results if r.get('content_path')])
-    # invalid_links = total_links - valid_links
+    valid_links_count = metrics['valid']
+    invalid_links_count = metrics['invalid']
+    err_link = metrics['err']
     valid_rate = round((valid_links_count / (valid_links_count + invalid_links_count) ), 4) if valid_links_count else 1.0
     precision_rate = round(1 - (err_link / invalid_links_count), 4) if invalid_links_count else 1.0
 
@@ -570,7 +920,7 @@ class CrawlerService:
     def __init__(self):
         self.db = get_db()
 
-    def crawl(self, task_id, website_id, strategy='incremental', depth=3, max_links=1000):
+    def crawl(self, task_id, website_id, strategy='incremental', depth=3, max_links=1000, replay=None):
         """
         执行爬取任务
 
@@ -580,6 +930,7 @@ class CrawlerService:
             strategy: str - 爬取策略 (incremental/full)
             depth: int - 爬取深度
             max_links: int - 最大链接数
+            replay: str - 回放来源 (warc/store)，为空时正常访问网络
 
         返回:
             dict - 爬取结果统计
@@ -595,7 +946,7 @@ class CrawlerService:
             )
 
             # 记录日志
-            self._log(task_id, 'INFO', f'开始爬取任务 - 策略: {strategy}')
+            self._log(task_id, 'INFO', f'开始爬取任务 - 策略: {strategy}' + (f'，回放: {replay}' if replay else ''))
 
             # 获取网站信息
             website = self.db.websites.find_one({'_id': website_id})
@@ -608,85 +959,160 @@ class CrawlerService:
 
             # 根据策略准备 exclude 列表
             exclude_urls = []
+            revisit = None
+            if replay and strategy == 'incremental':
+                # 回放的正是已保存的结果，按增量排除 / 重新验证会跳过全部页面
+                self._log(task_id, 'WARNING', '回放模式不支持增量策略，按全量模式执行')
+                strategy = 'full'
             if strategy == 'incremental':
-                # 增量策略：查询已爬取的链接
-                crawled_docs = self.db.crawled_links.find(
-                    {'website_id': website_id},
-                    {'url': 1}
-                )
-                exclude_urls = [doc['url'] for doc in crawled_docs]
-                self._log(task_id, 'INFO', f'增量模式：排除 {len(exclude_urls)} 个已存在链接')
+                # 增量策略：发现链接时按 (website_id, url) 索引批量查询已爬取的链接，不预先加载历史链接；
+                # 已爬取的页面按上次的 ETag / Last-Modified / 正文哈希重新验证
+                def lookup(urls):
+                    return self.db.crawled_links.find(
+                        {'website_id': website_id, 'url': {'$in': urls}},
+                        {'url': 1, 'etag': 1, 'last_modified': 1, 'content_hash': 1, '_id': 0}
+                    )
+
+                exclude_urls = KnownUrlIndex(lookup, batch_size=config.incremental_lookup_batch,
+                                             revalidate=config.incremental_revalidate)
+
+                def revisit():
+                    # 按批遍历该网站已保存的链接，发现阶段未到达的页面同样重新验证
+                    cursor = self.db.crawled_links.find(
+                        {'website_id': website_id},
+                        {'url': 1, 'etag': 1, 'last_modified': 1, 'content_hash': 1, '_id': 0}
+                    )
+                    batch = []
+                    for doc in cursor:
+                        batch.append(doc)
+                        if len(batch) >= config.incremental_lookup_batch:
+                            yield batch
+                            batch = []
+                    if batch:
+                        yield batch
+                self._log(task_id, 'INFO', '增量模式：按批查询已存在链接' +
+                          ('，已爬取页面发送条件请求重新验证' if config.incremental_revalidate else '并排除'))
             else:
                 # 全量策略：不排除任何链接
                 self._log(task_id, 'INFO', '全量模式：爬取所有链接')
 
-            # 执行爬取
-            results, valid_rate, precision_rate, screenshot_path,valid_links,invalid_links = crawler_link(url, depth, exclude_urls, original_domain)
-            total_links = len(results)
+            # 回放模式：从存档读取响应，不访问网络
+            archive = self._replay_archive(task_id, website_id, replay) if replay else None
+
+            # 执行爬取：结果经流水线逐条写入数据库，不在内存中累积
+            crawl_stats = {}
+            saved = {'total': 0}
+            saved_lock = threading.Lock()
+            # 正文按 SHA-256 去重压缩后单独存储，链接文档只保留引用
+            contents = ContentStore(self.db.page_contents, batch_size=config.persist_batch_size,
+                                    level=config.content_compress_level,
+                                    on_error=lambda message, details: self._log(task_id, 'WARNING', message,
+                                                                                details=details))
+            # 结果按批 upsert 写入，新增数量取自 bulk_write 结果；每批写入前先写入其引用的正文
+            writer = CrawledLinkWriter(self.db.crawled_links, batch_size=config.persist_batch_size,
+                                       before_write=contents.flush, replay=archive is not None)
+
+            def on_result(result):
+                with saved_lock:
+                    # 限制最大链接数
+                    if saved['total'] >= max_links:
+                        return
+                    saved['total'] += 1
+                writer.add(self._link_doc(task_id, website_id, url, result, contents.put(result.get('text'))))
+
+            def on_seed(record):
+                # 起始页面的状态与正文记录在网站文档中，供按已保存结果回放时作为入口
+                seed_page = {'url': record.url, 'status_code': record.status_code,
+                             'content_type': record.content_type}
+                seed_page.update(contents.put(record.text if 'text' in record.content_type else ''))
+                self.db.websites.update_one({'_id': website_id}, {'$set': {'seed_page': seed_page}})
+
+            def on_unchanged(link, record):
+                # 重新验证未变化的页面只更新爬取时间（不计入保存数量）
+                writer.touch(website_id, link, etag=record.etag, last_modified=record.last_modified)
+
+            def on_progress(depths):
+                # 运行期间把各阶段队列深度写入任务文档，便于监控
+                self.db.crawl_tasks.update_one(
+                    {'_id': task_id},
+                    CrawlTaskModel.update_progress(depths, new_links=writer.inserted)
+                )
+
+            _, valid_rate, precision_rate, screenshot_path,valid_links,invalid_links = crawler_link(
+                url, depth, exclude_urls, original_domain, stats=crawl_stats,
+                max_links=max_links,
+                max_pages=website.get('max_pages'),
+                max_bytes=website.get('max_bytes'),
+                time_budget=website.get('time_budget'),
+                should_stop=lambda: app_global.should_stop(task_id),
+                scope=website.get('scope'),
+                canonical=website.get('canonical'),
+                on_trap=lambda trap: self._log(
+                    task_id, 'WARNING', f"检测到爬虫陷阱（{trap['reason']}）: {trap['pattern']}", details=trap),
+                on_result=on_result,
+                on_progress=on_progress,
+                replay=archive,
+                on_seed=on_seed if archive is None else None,
+                on_unchanged=on_unchanged,
+                revisit=revisit,
+                on_error=lambda stage, link, error: self._log(
+                    task_id, 'WARNING', f'流水线 {stage} 阶段处理失败: {link} - {error}',
+                    details={'stage': stage, 'link': link, 'error': str(error)})
+            )
+            # 写入最后一批（取消时也保留已抓取的结果）
+            contents.flush()
+            writer.flush()
+            crawl_stats['persist'] = writer.to_dict()
+            crawl_stats['content'] = contents.to_dict()
+            if crawl_stats.get('warc'):
+                # 取消时同样记录已生成的 WARC 文件
+                self.db.crawl_tasks.update_one(
+                    {'_id': task_id},
+                    {'$set': {'warc_files': crawl_stats['warc']['files']}}
+                )
+                warc_lost = crawl_stats['warc']['dropped'] + crawl_stats['warc']['errors']
+                if warc_lost:
+                    self._log(task_id, 'WARNING',
+                              f"WARC 存档不完整: 队列已满丢弃 {crawl_stats['warc']['dropped']} 条，"
+                              f"写入失败 {crawl_stats['warc']['errors']} 条", details=crawl_stats['warc'])
+            if crawl_stats['budget']['exhausted']:
+                self._log(task_id, 'WARNING', f"抓取预算耗尽，提前结束: {crawl_stats['budget']['reason']}",
+                          details=crawl_stats['budget'])
+            stage_errors = {name: stage['errors'] for name, stage in crawl_stats['pipeline'].items()
+                            if stage['errors']}
+            if stage_errors:
+                summary = '，'.join(f'{name} {count} 条' for name, count in stage_errors.items())
+                self._log(task_id, 'WARNING', f'流水线处理失败: {summary}', details=crawl_stats['pipeline'])
+            if writer.errors:
+                self._log(task_id, 'WARNING', f'批量写入有 {writer.errors} 条链接失败', details=crawl_stats['persist'])
+            if strategy == 'incremental':
+                excluded = crawl_stats['seen_sets']['exclude']
+                self._log(task_id, 'INFO', f"增量模式：排除 {excluded['items']} 个已存在链接（查询 {excluded['queries']} 次）")
+                revalidation = crawl_stats.get('revalidation')
+                if revalidation:
+                    self._log(task_id, 'INFO',
+                              f"增量模式：重新验证 {revalidation['revalidated']} 个页面，"
+                              f"未变化 {revalidation['unchanged']} 个，已变化 {revalidation['changed']} 个，"
+                              f"失败 {revalidation['failed']} 个", details=revalidation)
+            total_links = crawl_stats['processed_links']
+            new_links = writer.inserted
 
             # 检查是否需要停止（任务可能已被强制取消）
             if app_global.should_stop(task_id):
-                self._log(task_id, 'INFO', '检测到取消信号，停止执行')
+                requested_at = app_global.get_stop_requested_at(task_id)
+                latency_ms = int((time.time() - requested_at) * 1000) if requested_at else None
+                self._log(task_id, 'INFO', f'检测到取消信号，停止执行（取消耗时: {latency_ms} ms，已保存: {saved["total"]} 个链接）',
+                          details={'cancel_latency_ms': latency_ms, 'saved_links': saved['total']})
                 app_global.clear_stop_flag(task_id)
                 return {
                     'total_links': 0,
                     'valid_links': 0,
                     'invalid_links': 0,
-                    'new_links': 0,
+                    'new_links': new_links,
                     'valid_rate': 0,
                     'precision_rate': 0
                 }
 
-            # 保存爬取结果到数据库
-            new_links = 0
-            for result in results[:max_links]:  # 限制最大链接数
-                # 检查是否需要停止
-                if app_global.should_stop(task_id):
-                    self._log(task_id, 'INFO', '检测到取消信号，停止保存')
-                    break
-
-                link_url = result['link']
-
-                # 准备待插入文档
-                link_doc = CrawledLinkModel.create(
-                    website_id=website_id,
-                    task_id=task_id,
-                    url=link_url,
-                    domain=urlparse(link_url).netloc,
-                    link_type='valid' if result.get('content_path') else 'invalid',
-                    status_code=result.get('status_code'),
-                    content_type=result.get('content_type'),
-                    source_url=url,
-                    ip_address=result.get('ip_address'),
-                    importance_score=result.get('importance_score'),
-                    text=result.get('text')
-                )
-
-                # 若存在相同链接：删除旧数据后插入新数据
-                existing_link = self.db.crawled_links.find_one({
-                    'website_id': website_id,
-                    'url': link_url
-                })
-                if existing_link:
-                    self.db.crawled_links.delete_one({'_id': existing_link['_id']})
-                    try:
-                        self.db.crawled_links.insert_one(link_doc)
-                    except DuplicateKeyError:
-                        # 并发竞争导致再次重复：强制清理后重插一次
-                        self.db.crawled_links.delete_many({'website_id': website_id, 'url': link_url})
-                        self.db.crawled_links.insert_one(link_doc)
-                    # 覆盖不计入 new_links
-                else:
-                    # 不存在则直接插入；若并发下重复，则按规则删除后重插
-                    try:
-                        self.db.crawled_links.insert_one(link_doc)
-                        new_links += 1
-                    except DuplicateKeyError:
-                        self.db.crawled_links.delete_many({'website_id': website_id, 'url': link_url})
-                        self.db.crawled_links.insert_one(link_doc)
-                        # 并发覆盖不计入 new_links
-
-
             # 更新任务统计和截图路径
             update_data = CrawlTaskModel.update_statistics(
                 total_links=total_links+invalid_links,
@@ -695,6 +1121,7 @@ class CrawlerService:
                 new_links=new_links,
                 valid_rate = valid_rate,
                 precision_rate = precision_rate,
+                extra=crawl_stats
             )
             # 添加截图路径
             if screenshot_path:
@@ -744,6 +1171,76 @@ class CrawlerService:
 
             raise
 
+    def _replay_archive(self, task_id, website_id, source):
+        """
+        构建回放源
+
+        参数:
+            task_id: ObjectId - 任务ID
+            website_id: ObjectId - 网站ID
+            source: str - warc（该网站最近一次全量爬取生成的 WARC 文件）/ store（已保存的链接与正文）
+
+        返回:
+            WarcArchive | StoredLinkArchive
+        """
+        if source == 'store':
+            def find_link(link_url):
+                doc = self.db.crawled_links.find_one({'website_id': website_id, 'url': link_url})
+                if doc is None:
+                    # 起始页面不在 crawled_links 中，取上次爬取记录的 seed_page
+                    seed_page = (self.db.websites.find_one({'_id': website_id}) or {}).get('seed_page')
+                    if seed_page and seed_page['url'] == link_url:
+                        return seed_page
+                return doc
+
+            return StoredLinkArchive(find_link, ContentStore(self.db.page_contents))
+        if source != 'warc':
+            raise ValueError(f"无效的回放来源: {source}")
+        # 增量爬取的存档只含变化的页面与 304 记录，只回放全量爬取的存档
+        task = self.db.crawl_tasks.find_one(
+            {'website_id': website_id, 'strategy': 'full', 'warc_files.0': {'$exists': True}},
+            sort=[('started_at', -1)]
+        )
+        paths = [path for path in (task or {}).get('warc_files', []) if os.path.exists(path)]
+        if not paths:
+            raise Exception('没有可回放的 WARC 文件')
+        archive = WarcArchive(paths)
+        self._log(task_id, 'INFO', f'回放 WARC: {len(paths)} 个文件, {len(archive)} 个 url',
+                  details={'task_id': str(task['_id']), 'files': paths})
+        return archive
+
+    def _link_doc(self, task_id, website_id, source_url, result, content):
+        """
+        构建单条爬取结果的链接文档（流水线保存阶段调用）
+
+        参数:
+            task_id: ObjectId - 任务ID
+            website_id: ObjectId - 网站ID
+            source_url: str - 入口 url
+            result: dict - crawler_link 产生的结果
+            content: dict - ContentStore.put 返回的正文引用
+
+        返回:
+            dict - CrawledLinkModel 文档
+        """
+        link_url = result['link']
+        return CrawledLinkModel.create(
+            website_id=website_id,
+            task_id=task_id,
+            url=link_url,
+            domain=urlparse(link_url).netloc,
+            link_type='valid' if result.get('status_code') is not None else 'invalid',
+            status_code=result.get('status_code'),
+            content_type=result.get('content_type'),
+            source_url=source_url,
+            ip_address=result.get('ip_address'),
+            importance_score=result.get('importance_score'),
+            etag=result.get('etag'),
+            last_modified=result.get('last_modified'),
+            content_path=result.get('content_path'),
+            **content
+        )
+
     def _log(self, task_id, level, message, details=None):
         """
         记录日志到数据库
@@ -0,0 +1,218 @@
+"""
+DNS 解析缓存 - 跨线程、跨任务共享，支持 TTL 与失败结果（负缓存）
+"""
+import asyncio
+import socket
+import threading
+import time
+
+
+class ResolverStats:
+    """任务级解析统计（命中/未命中/负缓存命中/预解析）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.prefetched = 0
+
+    def record(self, hit, negative=False):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                if negative:
+                    self.negative_hits += 1
+            else:
+                self.misses += 1
+
+    def record_prefetch(self, count=1):
+        """预解析单独计数，不计入命中/未命中"""
+        with self._lock:
+            self.prefetched += count
+
+    def to_dict(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'prefetched': self.prefetched
+        }
+
+
+class DnsCache:
+    """
+    带 TTL 的 IPv4 解析缓存
+
+    同一主机并发未命中时只发起一次解析，其余线程等待结果。
+    解析失败的主机按 negative_ttl 缓存，避免重复超时。
+    """
+
+    def __init__(self, ttl=300, negative_ttl=60, max_entries=10000):
+        """
+        参数:
+            ttl: int - 解析成功结果的缓存时间（秒）
+            negative_ttl: int - 解析失败结果的缓存时间（秒）
+            max_entries: int - 最大缓存条目数
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, host):
+        """返回 (是否命中, ip)，调用方需持有锁"""
+        entry = self._entries.get(host)
+        if entry is None:
+            return False, None
+        ip, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[host]
+            return False, None
+        return True, ip
+
+    def _store(self, host, ip):
+        ttl = self.ttl if ip else self.negative_ttl
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # 超出上限时清理已过期条目，仍不足则清空
+                now = time.monotonic()
+                self._entries = {h: e for h, e in self._entries.items() if e[1] >= now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[host] = (ip, time.monotonic() + ttl)
+
+    def resolve(self, host, stats=None):
+        """
+        解析主机的 IPv4 地址
+
+        参数:
+            host: str - 主机名
+            stats: ResolverStats - 任务级统计（可选）
+
+        返回:
+            str - IPv4 地址，失败返回 None
+        """
+        if not host:
+            return None
+
+        with self._lock:
+            hit, ip = self._lookup(host)
+            if hit:
+                if stats:
+                    stats.record(True, negative=ip is None)
+                return ip
+            event = self._pending.get(host)
+            owner = event is None
+            if owner:
+                event = threading.Event()
+                self._pending[host] = event
+
+        if not owner:
+            # 其他线程正在解析同一主机，等待其结果
+            event.wait()
+            with self._lock:
+                hit, ip = self._lookup(host)
+            if stats:
+                stats.record(hit, negative=hit and ip is None)
+            return ip
+
+        if stats:
+            stats.record(False)
+        ip = None
+        try:
+            ip = socket.gethostbyname(host)
+        except socket.gaierror as e:
+            print(f"获取IP地址失败 {host}: {e}")
+        except Exception as e:
+            print(f"获取IP地址异常 {host}: {e}")
+        finally:
+            self._store(host, ip)
+            with self._lock:
+                self._pending.pop(host, None)
+            event.set()
+        return ip
+
+    def resolve_many(self, hosts, stats=None):
+        """
+        并行解析多个主机（每个主机只解析一次），结果写入缓存
+
+        参数:
+            hosts: iterable[str] - 主机名集合
+            stats: ResolverStats - 任务级统计（可选，仅记录实际发起的预解析数）
+
+        返回:
+            dict - {host: ip}
+        """
+        hosts = {h for h in hosts if h}
+        results = {}
+        # 本次负责解析的主机注册到 _pending；其他线程正在解析的主机等待其结果（与 resolve 共用）
+        owned = {}
+        waiting = {}
+        with self._lock:
+            for host in hosts:
+                hit, ip = self._lookup(host)
+                if hit:
+                    results[host] = ip
+                elif host in self._pending:
+                    waiting[host] = self._pending[host]
+                else:
+                    owned[host] = threading.Event()
+                    self._pending[host] = owned[host]
+
+        if owned:
+            if stats:
+                stats.record_prefetch(len(owned))
+
+            async def _resolve_all():
+                loop = asyncio.get_running_loop()
+
+                async def _one(host):
+                    try:
+                        infos = await loop.getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+                        return host, infos[0][4][0] if infos else None
+                    except Exception as e:
+                        print(f"获取IP地址失败 {host}: {e}")
+                        return host, None
+
+                return await asyncio.gather(*[_one(h) for h in owned])
+
+            resolved = {}
+            loop = asyncio.new_event_loop()
+            try:
+                resolved = dict(loop.run_until_complete(_resolve_all()))
+            finally:
+                loop.close()
+                # 异常时同样写入（负缓存）并唤醒等待的线程
+                for host, event in owned.items():
+                    ip = resolved.get(host)
+                    self._store(host, ip)
+                    with self._lock:
+                        self._pending.pop(host, None)
+                    event.set()
+                    results[host] = ip
+
+        for host, event in waiting.items():
+            event.wait()
+            with self._lock:
+                hit, ip = self._lookup(host)
+            results[host] = ip
+        return results
+
+
+# 进程级共享缓存
+_dns_cache = None
+_dns_cache_lock = threading.Lock()
+
+
+def get_dns_cache():
+    """获取进程级 DNS 缓存"""
+    global _dns_cache
+    if _dns_cache is None:
+        with _dns_cache_lock:
+            if _dns_cache is None:
+                from app.config import config
+                _dns_cache = DnsCache(ttl=config.dns_cache_ttl, negative_ttl=config.dns_negative_ttl)
+    return _dns_cache
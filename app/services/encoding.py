@@ -0,0 +1,193 @@
+"""
+编码识别 - 依次使用 HTTP 头 charset、BOM、<meta charset>，最后才对有限长度的样本做 chardet 检测
+"""
+import codecs
+import re
+import threading
+from urllib.parse import urlparse
+
+import chardet
+
+# BOM 与对应编码（UTF-32 需在 UTF-16 之前判断）
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# 使用更大的超集解码，避免生僻字乱码
+ENCODING_ALIASES = {
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'ascii': 'utf-8',
+    'iso8859-1': 'windows-1252',
+}
+
+# 多字节编码（低置信度时仍可信任的检测结果）
+MULTIBYTE_ENCODINGS = {'gb18030', 'big5', 'big5hkscs', 'cp950', 'euc_jp', 'shift_jis', 'cp932', 'euc_kr', 'cp949'}
+
+_HEADER_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+?charset\s*=\s*["\']?\s*([\w.:-]+)', re.I)
+_XML_ENCODING_RE = re.compile(rb'^\s*<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)', re.I)
+
+
+def normalize_encoding(name):
+    """
+    规范化编码名称
+
+    返回:
+        str - Python 可用的编码名称，无效时返回 None
+    """
+    if not name:
+        return None
+    try:
+        name = codecs.lookup(name.strip().strip('"\'')).name
+    except LookupError:
+        return None
+    return ENCODING_ALIASES.get(name, name)
+
+
+def _decodes(sample, encoding):
+    """样本能否按该编码严格解码（忽略末尾被截断的字符）"""
+    try:
+        sample.decode(encoding)
+        return True
+    except UnicodeDecodeError as e:
+        return e.start >= len(sample) - 3
+    except LookupError:
+        return False
+
+
+class EncodingResolver:
+    """
+    页面编码识别器（线程安全）
+
+    识别顺序: HTTP 头 charset -> BOM -> <meta charset>/XML 声明 -> UTF-8 严格解码 -> 主机缓存 -> 样本 chardet。
+    chardet 检测出的非 ASCII 编码按主机缓存，同一主机后续页面不再检测；缓存的编码须能严格解码样本才使用。
+    每个爬取任务创建自己的识别器（from_config），主机缓存只在该任务内有效。
+    """
+
+    def __init__(self, sample_size=32 * 1024, meta_scan_bytes=4096, max_hosts=10000):
+        """
+        参数:
+            sample_size: int - chardet 检测使用的样本长度（字节）
+            meta_scan_bytes: int - 查找 <meta charset> 的文档开头长度（字节）
+            max_hosts: int - 最多缓存的主机数
+        """
+        self.sample_size = sample_size
+        self.meta_scan_bytes = meta_scan_bytes
+        self.max_hosts = max_hosts
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.counts = {'header': 0, 'bom': 0, 'meta': 0, 'host_cache': 0, 'detected': 0, 'default': 0}
+
+    @classmethod
+    def from_config(cls):
+        """按 config 创建识别器（每个爬取任务一个）"""
+        from app.config import config
+        return cls(sample_size=config.encoding_sample_bytes)
+
+    def _count(self, source):
+        with self._lock:
+            self.counts[source] += 1
+
+    def detect(self, content, content_type=None, url=None):
+        """
+        识别编码
+
+        参数:
+            content: bytes - 页面内容（可以只是开头的数据块）
+            content_type: str - 响应的 Content-Type
+            url: str - 页面 url（用于主机缓存）
+
+        返回:
+            tuple - (encoding, source)，source 为 header/bom/meta/host_cache/detected/default
+        """
+        match = _HEADER_CHARSET_RE.search(content_type or '')
+        encoding = normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding, 'header'
+
+        content = content or b''
+        for bom, bom_encoding in BOMS:
+            if content.startswith(bom):
+                return bom_encoding, 'bom'
+
+        head = content[:self.meta_scan_bytes]
+        match = _META_CHARSET_RE.search(head) or _XML_ENCODING_RE.search(head)
+        encoding = normalize_encoding(match.group(1).decode('ascii', errors='ignore')) if match else None
+        if encoding:
+            return encoding, 'meta'
+
+        sample = content[:self.sample_size]
+        if not sample:
+            return 'utf-8', 'default'
+        # 样本能按 UTF-8 严格解码时无需检测（同一主机也可能混用 UTF-8 与其他编码的页面）
+        if _decodes(sample, 'utf-8'):
+            return 'utf-8', 'default'
+
+        host = (urlparse(url).hostname or '') if url else ''
+        if host:
+            with self._lock:
+                encoding = self._hosts.get(host)
+            if encoding and _decodes(sample, encoding):
+                return encoding, 'host_cache'
+
+        detected = chardet.detect(sample)
+        encoding = normalize_encoding(detected.get('encoding'))
+        if not encoding or (detected.get('confidence') or 0) < 0.5:
+            # 置信度低时，单字节编码的检测结果不可靠，优先尝试常见中文编码
+            candidates = (encoding, 'gb18030', 'big5') if encoding in MULTIBYTE_ENCODINGS else ('gb18030', 'big5', encoding)
+            encoding = next((enc for enc in candidates if enc and _decodes(sample, enc)), None)
+            if not encoding:
+                return 'utf-8', 'default'
+        if host:
+            with self._lock:
+                if len(self._hosts) >= self.max_hosts:
+                    self._hosts.clear()
+                self._hosts[host] = encoding
+        return encoding, 'detected'
+
+    def resolve(self, content, content_type=None, url=None):
+        """
+        识别编码并记录来源统计
+
+        返回:
+            str - 编码名称
+        """
+        encoding, source = self.detect(content, content_type, url)
+        self._count(source)
+        return encoding
+
+    def decode(self, content, content_type=None, url=None):
+        """
+        按识别出的编码解码（非法字节替换）
+
+        返回:
+            str - 解码后的文本
+        """
+        if isinstance(content, str):
+            return content
+        return bytes(content).decode(self.resolve(content, content_type, url), errors='replace')
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self.counts, cached_hosts=len(self._hosts))
+
+
+# 进程级识别器（不属于爬取任务的调用使用，如命令行工具）
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_encoding_resolver():
+    """获取进程级编码识别器"""
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                from app.config import config
+                _resolver = EncodingResolver(sample_size=config.encoding_sample_bytes)
+    return _resolver
@@ -0,0 +1,176 @@
+"""
+内容寻址文件存储 - 页面正文按 SHA-256 分片保存到本地目录，原子写入、相同内容只保存一份，超出容量时按最近使用淘汰
+"""
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+_TMP_DIR = 'tmp'
+
+
+class FileStore:
+    """
+    本地内容寻址存储（进程内线程安全）
+
+    文件路径为 root/ab/cd/abcd...（SHA-256 前两级分片），先写入 root/tmp 再 os.replace，
+    读者不会看到写了一半的文件。总大小超过 max_bytes 时删除最久未使用的文件。
+    """
+
+    def __init__(self, root, max_bytes=0):
+        """
+        参数:
+            root: str - 存储根目录
+            max_bytes: int - 最大总字节数（0 表示不限制）
+        """
+        self.root = root
+        self.max_bytes = max(0, int(max_bytes))
+        self.written = 0
+        self.deduplicated = 0
+        self.evicted = 0
+        # {hash: 字节数}，按最近使用排序（最久未使用在前）
+        self._index = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, _TMP_DIR), exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """扫描已有文件重建索引，清理上次中断留下的临时文件"""
+        tmp_dir = os.path.join(self.root, _TMP_DIR)
+        for entry in os.scandir(tmp_dir):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        files = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or shard.name == _TMP_DIR:
+                continue
+            for sub in os.scandir(shard.path):
+                if not sub.is_dir():
+                    continue
+                for entry in os.scandir(sub.path):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, digest, size in sorted(files):
+            self._index[digest] = size
+            self._bytes += size
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def put(self, data):
+        """
+        保存内容（已存在时只更新最近使用时间）
+
+        参数:
+            data: bytes - 文件内容
+
+        返回:
+            tuple - (SHA-256 十六进制, 文件路径)
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        with self._lock:
+            if digest in self._index and os.path.exists(path):
+                self._index.move_to_end(digest)
+                self.deduplicated += 1
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return digest, path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = os.path.join(self.root, _TMP_DIR, f"{digest}.{uuid.uuid4().hex}")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if digest in self._index:
+                # 其他线程同时写入了相同内容
+                self._index.move_to_end(digest)
+                self.deduplicated += 1
+            else:
+                self._index[digest] = len(data)
+                self._bytes += len(data)
+                self.written += 1
+                self._evict(keep=digest)
+        return digest, path
+
+    def _evict(self, keep):
+        """删除最久未使用的文件直到总大小不超过上限（调用方持有锁）"""
+        if not self.max_bytes:
+            return
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            digest, size = next(iter(self._index.items()))
+            if digest == keep:
+                break
+            del self._index[digest]
+            self._bytes -= size
+            self.evicted += 1
+            try:
+                os.remove(self.path_for(digest))
+            except OSError:
+                pass
+
+    def get_path(self, digest):
+        """
+        返回:
+            str - 文件路径，不存在（或已被淘汰）时返回 None
+        """
+        path = self.path_for(digest)
+        return path if os.path.exists(path) else None
+
+    def read(self, digest):
+        """
+        返回:
+            bytes - 文件内容，不存在时返回 None
+        """
+        path = self.get_path(digest)
+        if path is None:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def __contains__(self, digest):
+        with self._lock:
+            return digest in self._index
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'root': self.root,
+                'files': len(self._index),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'written': self.written,
+                'deduplicated': self.deduplicated,
+                'evicted': self.evicted
+            }
+
+
+_file_store = None
+_file_store_lock = threading.Lock()
+
+
+def get_file_store():
+    """获取进程级文件存储（存储目录随 config.save_path 变化时重新创建）"""
+    global _file_store
+    from app.config import config
+    root = config.content_store_path
+    if _file_store is None or _file_store.root != root:
+        with _file_store_lock:
+            if _file_store is None or _file_store.root != root:
+                _file_store = FileStore(root, max_bytes=config.content_store_max_bytes)
+    return _file_store
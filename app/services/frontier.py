@@ -0,0 +1,99 @@
+"""
+抓取队列 - 按链接重要性得分优先抓取（最佳优先）
+"""
+import heapq
+import itertools
+import mimetypes
+from urllib.parse import urlparse
+
+
+def make_link_scorer(detector, original_domain):
+    """
+    基于 CriticalLinkDetector 构建发现阶段的打分函数
+
+    发现阶段尚无响应头，按 url 扩展名推测 Content-Type，无扩展名视为页面
+
+    参数:
+        detector: CriticalLinkDetector - 重要性检测器
+        original_domain: str - 网站域名
+
+    返回:
+        callable - score(url) -> float
+    """
+    def score(url):
+        content_type = mimetypes.guess_type(urlparse(url).path)[0] or 'text/html'
+        try:
+            return detector.calculate_link_importance(url, original_domain=original_domain, content_type=content_type)
+        except Exception:
+            return 0.0
+    return score
+
+
+class CrawlFrontier:
+    """
+    基于堆的待抓取队列
+
+    同一 url 只保留一个队列项，重复发现时保留更大的剩余深度和更小的范围外跳数。
+    得分相同时按发现顺序出队。
+    """
+
+    def __init__(self, scorer=None):
+        """
+        参数:
+            scorer: callable - score(url) -> float，为空时按发现顺序出队
+        """
+        self.scorer = scorer
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def push(self, url, depth, score=None, hops=0):
+        """
+        加入待抓取 url
+
+        参数:
+            url: str - 链接
+            depth: int - 剩余深度
+            score: float - 重要性得分，为空时使用 scorer 计算
+            hops: int - 范围外跳数
+        """
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries[url] = (max(entry[0], depth), min(entry[1], hops))
+            return
+        if score is None:
+            score = self.scorer(url) if self.scorer else 0.0
+        self._entries[url] = (depth, hops)
+        heapq.heappush(self._heap, (-score, next(self._counter), url))
+
+    def pop(self):
+        """
+        取出得分最高的 url
+
+        返回:
+            tuple - (url, depth, score, hops)
+        """
+        while self._heap:
+            neg_score, _, url = heapq.heappop(self._heap)
+            entry = self._entries.pop(url, None)
+            if entry is not None:
+                return url, entry[0], -neg_score, entry[1]
+        raise IndexError('pop from empty frontier')
+
+    def clear(self):
+        """
+        清空队列
+
+        返回:
+            list[str] - 被清除的 url
+        """
+        urls = list(self._entries)
+        self._heap.clear()
+        self._entries.clear()
+        return urls
+
+    def __contains__(self, url):
+        return url in self._entries
+
+    def __len__(self):
+        return len(self._entries)
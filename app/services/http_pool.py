@@ -0,0 +1,246 @@
+"""
+HTTP 连接池 - 每个工作线程持有一个 keep-alive Session，任务内复用 TCP/TLS 连接
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RequestCancelled(requests.exceptions.RequestException):
+    """连接池已取消，请求被中止"""
+
+
+class _CountingAdapter(HTTPAdapter):
+    """记录新建连接数与请求数的适配器（用于统计连接复用）"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.retired_connections = 0
+        self.retired_requests = 0
+
+        # 连接池被淘汰/关闭前先累计其计数，避免统计丢失
+        pools = self.poolmanager.pools
+        dispose = pools.dispose_func
+
+        def _dispose(pool):
+            self.retired_connections += pool.num_connections
+            self.retired_requests += pool.num_requests
+            if dispose:
+                dispose(pool)
+
+        pools.dispose_func = _dispose
+
+    def counters(self):
+        """返回 (新建连接数, 请求数)"""
+        connections = self.retired_connections
+        requests_count = self.retired_requests
+        managers = [self.poolmanager] + list(self.proxy_manager.values())
+        for manager in managers:
+            pools = manager.pools
+            for key in list(pools.keys()):
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue
+                connections += pool.num_connections
+                requests_count += pool.num_requests
+        return connections, requests_count
+
+
+class HttpSessionPool:
+    """
+    HTTP 会话池
+
+    每个线程懒加载一个 requests.Session，连接在该线程的后续请求中保持复用。
+    可按主机单独设置连接池大小。
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, host_pool_sizes=None, body_reader=None, archive=None):
+        """
+        参数:
+            pool_connections: int - 每个 Session 缓存的主机连接池数量
+            pool_maxsize: int - 每个主机连接池的最大连接数
+            host_pool_sizes: dict - {host: pool_maxsize}，按主机覆盖连接池大小
+            body_reader: BodyReader - 非流式请求的正文读取器，为空时完整读取正文
+            archive: WarcWriter - 非流式请求完成后把请求/响应写入 WARC（可选）
+        """
+        self.pool_connections = max(1, int(pool_connections))
+        self.pool_maxsize = max(1, int(pool_maxsize))
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.body_reader = body_reader
+        self.archive = archive
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = []
+        self._inflight = set()
+        self.cancelled = False
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = _CountingAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        # 按主机挂载独立的适配器（requests 按最长前缀匹配）
+        for host, size in self.host_pool_sizes.items():
+            host_adapter = _CountingAdapter(pool_connections=1, pool_maxsize=max(1, int(size)))
+            session.mount(f'http://{host}', host_adapter)
+            session.mount(f'https://{host}', host_adapter)
+        return session
+
+    def session(self):
+        """获取当前线程的 Session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._build_session()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def get(self, url, **kwargs):
+        """
+        发起 GET 请求
+
+        非流式请求在本方法内读取正文，读取期间登记为进行中的请求，
+        cancel() 时会被直接关闭。传入 on_chunk(response, chunk) 时每读到一个数据块即回调
+        （未配置 body_reader 时在读完后以完整正文回调一次）
+        """
+        if self.cancelled:
+            raise RequestCancelled(f"请求已取消: {url}")
+        stream = kwargs.pop('stream', False)
+        on_chunk = kwargs.pop('on_chunk', None)
+        try:
+            response = self.session().get(url, stream=True, **kwargs)
+        except Exception as e:
+            if self.cancelled:
+                raise RequestCancelled(f"请求已取消: {url}") from e
+            raise
+        if stream:
+            return response
+
+        with self._lock:
+            self._inflight.add(response)
+        try:
+            if self.body_reader is not None:
+                self.body_reader.read(response, should_stop=lambda: self.cancelled, on_chunk=on_chunk)
+            elif on_chunk:
+                on_chunk(response, response.content)
+            else:
+                response.content
+        except Exception as e:
+            if self.cancelled:
+                raise RequestCancelled(f"请求已取消: {url}") from e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.discard(response)
+        if self.cancelled:
+            raise RequestCancelled(f"请求已取消: {url}")
+        if self.archive is not None:
+            self.archive.write_response(response)
+        return response
+
+    def head(self, url, **kwargs):
+        """发起 HEAD 请求"""
+        if self.cancelled:
+            raise RequestCancelled(f"请求已取消: {url}")
+        try:
+            response = self.session().head(url, **kwargs)
+        except Exception as e:
+            if self.cancelled:
+                raise RequestCancelled(f"请求已取消: {url}") from e
+            raise
+        if self.archive is not None:
+            self.archive.write_response(response)
+        return response
+
+    def release(self, response):
+        """关闭只需要响应头的流式响应（不读取正文）；启用 WARC 时记录响应头，正文标记为截断"""
+        response.close()
+        if self.archive is not None:
+            self.archive.write_response(response, headers_only=True)
+
+    def cancel(self):
+        """取消连接池：拒绝新请求，中止正在读取的响应并关闭所有连接"""
+        self.cancelled = True
+        with self._lock:
+            inflight = list(self._inflight)
+        for response in inflight:
+            try:
+                response.close()
+            except Exception:
+                pass
+        self.close()
+
+    def stats(self):
+        """
+        连接复用统计
+
+        返回:
+            dict - {sessions, requests, connections, reused_connections}
+        """
+        connections = 0
+        requests_count = 0
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            adapters = {id(a): a for a in session.adapters.values()}
+            for adapter in adapters.values():
+                if isinstance(adapter, _CountingAdapter):
+                    c, r = adapter.counters()
+                    connections += c
+                    requests_count += r
+        return {
+            'sessions': len(sessions),
+            'requests': requests_count,
+            'connections': connections,
+            'reused_connections': max(0, requests_count - connections)
+        }
+
+    def close(self):
+        """关闭所有 Session 及其连接"""
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+
+# 进程级默认连接池（未显式传入连接池时使用）
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """获取进程级默认连接池"""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = create_pool()
+    return _default_pool
+
+
+def create_pool(body_reader=None, archive=None):
+    """
+    按 config 创建连接池（任务级）
+
+    参数:
+        body_reader: BodyReader - 正文读取器（可选）
+        archive: WarcWriter - WARC 写入器（可选）
+    """
+    from app.config import config
+    return HttpSessionPool(
+        pool_connections=config.http_pool_connections,
+        pool_maxsize=config.http_pool_maxsize,
+        host_pool_sizes=config.http_host_pool_sizes,
+        body_reader=body_reader,
+        archive=archive
+    )
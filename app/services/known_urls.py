@@ -0,0 +1,186 @@
+"""
+已存在链接索引 - 增量爬取时按批查询数据库中的已爬取链接，启动开销与历史链接数无关
+"""
+import threading
+
+from app.services.content_store import ContentStore
+from app.services.link_probe import classify_link
+from app.services.seen_set import FingerprintSet, url_fingerprint
+
+
+class KnownUrlIndex:
+    """
+    增量爬取的 exclude 集合（线程安全）
+
+    不在启动时加载全部历史链接，而是在发现链接时按批调用 lookup 查询哪些 url 已存在，
+    查询结果以指纹缓存，同一 url 只查询一次。内存占用只与本次发现的链接数有关。
+
+    revalidate=True 时已存在的页面链接不再排除，而是记录上次的 ETag / Last-Modified / content_hash：
+    抓取时通过 revalidation_headers 发送条件请求，再由 revalidate 判断页面是否变化，
+    未变化（304 或正文哈希相同）的页面不再解析。资源类链接仍直接排除。
+    只能经由未变化页面到达的已存在页面不会被发现，由 revisit 在发现阶段结束后补充重新验证。
+    """
+
+    kind = 'index'
+
+    def __init__(self, lookup, batch_size=500, revalidate=False):
+        """
+        参数:
+            lookup: callable - lookup(urls) 返回 urls 中已存在的 url 或链接文档（含 url / etag / last_modified / content_hash）
+            batch_size: int - 单次查询的最大 url 数
+            revalidate: bool - 是否对已存在的页面发送条件请求（否则全部排除）
+        """
+        self.lookup = lookup
+        self.batch_size = max(1, int(batch_size))
+        self.revalidate_pages = revalidate
+        self._checked = FingerprintSet()
+        self._known = FingerprintSet()
+        # 待重新验证的页面：{url 指纹: (etag, last_modified, content_hash)}，验证后结果记入 _outcomes（同样按指纹）
+        self._validators = {}
+        self._outcomes = {}
+        self.queries = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def _query(self, urls):
+        """查询一组 url 并写入缓存"""
+        for start in range(0, len(urls), self.batch_size):
+            batch = urls[start:start + self.batch_size]
+            found = {}
+            for item in self.lookup(batch):
+                if isinstance(item, str):
+                    found[item] = {}
+                else:
+                    found[item['url']] = item
+            with self._lock:
+                self.queries += 1
+                for url in batch:
+                    self._record(url, found.get(url))
+
+    def _record(self, url, doc):
+        """记录一个 url 的查询结果（doc 为空表示不存在），调用方需持有锁；返回是否需要重新验证"""
+        key = url_fingerprint(url)
+        self._checked.add_fingerprint(key)
+        if doc is None:
+            return False
+        if self.revalidate_pages and classify_link(url) == 'page':
+            self._validators[key] = (doc.get('etag'), doc.get('last_modified'), doc.get('content_hash'))
+            return True
+        self._known.add_fingerprint(key)
+        return False
+
+    def filter_new(self, links):
+        """
+        过滤掉已存在的链接（未查询过的 url 合并为批量查询）
+
+        参数:
+            links: iterable[str] - 规范化后的 url
+
+        返回:
+            list[str] - 数据库中不存在的链接，以及需要重新验证的已存在页面
+        """
+        links = list(links)
+        with self._lock:
+            pending = list(dict.fromkeys(link for link in links
+                                         if not self._checked.has_fingerprint(url_fingerprint(link))))
+        if pending:
+            self._query(pending)
+        with self._lock:
+            return [link for link in links if not self._known.has_fingerprint(url_fingerprint(link))]
+
+    def revisit(self, docs):
+        """
+        登记发现阶段未到达的已存在链接
+
+        参数:
+            docs: iterable[dict] - 已保存的链接文档（含 url / etag / last_modified / content_hash）
+
+        返回:
+            list[str] - 需要重新验证的页面 url（发现阶段已查询过的 url 与资源类链接不返回）
+        """
+        if not self.revalidate_pages:
+            return []
+        urls = []
+        with self._lock:
+            for doc in docs:
+                url = doc['url']
+                if not self._checked.has_fingerprint(url_fingerprint(url)) and self._record(url, doc):
+                    urls.append(url)
+        return urls
+
+    def revalidation_headers(self, url):
+        """
+        条件请求头
+
+        返回:
+            dict - If-None-Match / If-Modified-Since（上次未记录时为空 dict，仍按正文哈希判断），
+            url 不需要重新验证时返回 None
+        """
+        with self._lock:
+            validators = self._validators.get(url_fingerprint(url))
+        if validators is None:
+            return None
+        etag, last_modified, _ = validators
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def revalidate(self, url, record):
+        """
+        判断重新验证的页面是否变化（同一 url 只统计一次，再次调用返回相同结果）
+
+        参数:
+            url: str - 页面 url
+            record: ResponseRecord - 条件请求的响应记录
+
+        返回:
+            str - unchanged（304 或正文哈希相同）/ changed / failed（请求失败），
+            url 不需要重新验证时返回 None
+        """
+        key = url_fingerprint(url)
+        with self._lock:
+            if key in self._outcomes:
+                return self._outcomes[key]
+            validators = self._validators.pop(key, None)
+        if validators is None:
+            return None
+        if record.status_code == 304:
+            outcome = 'unchanged'
+        elif not record.ok:
+            outcome = 'failed'
+        else:
+            text = record.text if 'text' in record.content_type else ''
+            outcome = 'unchanged' if text and ContentStore.text_hash(text) == validators[2] else 'changed'
+        with self._lock:
+            self._outcomes[key] = outcome
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        return outcome
+
+    def revalidation_stats(self):
+        with self._lock:
+            return {
+                'revalidated': self.unchanged + self.changed + self.failed,
+                'unchanged': self.unchanged,
+                'changed': self.changed,
+                'failed': self.failed
+            }
+
+    def __contains__(self, url):
+        return not self.filter_new([url])
+
+    def __len__(self):
+        """本次爬取中排除的已存在链接数"""
+        return len(self._known)
+
+    def memory_bytes(self):
+        return self._checked.memory_bytes() + self._known.memory_bytes()
+
+    def to_dict(self):
+        with self._lock:
+            return {'kind': self.kind, 'items': len(self._known), 'checked': len(self._checked),
+                    'queries': self.queries, 'memory_bytes': self.memory_bytes()}
@@ -0,0 +1,339 @@
+"""
+链接提取 - 单次遍历 lxml 文档树提取页面中的所有链接（爬虫服务与命令行脚本共用）
+"""
+from urllib.parse import urljoin, urlparse
+
+from lxml import etree
+
+from app.services.encoding import get_encoding_resolver
+
+# 需要检查的 HTML 元素和属性
+ELEMENTS_TO_CHECK = {
+    'a': ('href',),
+    'img': ('src', 'srcset', 'data-src', 'data-srcset'),
+    'script': ('src',),
+    'link': ('href',),
+    'video': ('src', 'poster', 'data-src'),
+    'audio': ('src', 'data-src'),
+    'iframe': ('src', 'data-src'),
+    'source': ('src', 'srcset', 'data-src', 'data-srcset'),
+    'embed': ('src', 'data-src'),
+    'track': ('src',),
+    'object': ('data',)
+}
+
+SRCSET_ATTRIBUTES = ('srcset', 'data-srcset')
+
+# 不包含链接的二进制内容类型
+BINARY_TYPES = (
+    'image/', 'video/', 'audio/', 'application/pdf',
+    'application/zip', 'application/x-rar', 'application/octet-stream',
+    'font/', 'application/x-font', 'application/vnd.ms-fontobject'
+)
+
+# 可解析的 HTML/XML 内容类型
+PARSEABLE_TYPES = (
+    'text/html', 'application/xhtml', 'text/xml', 'application/xml', 'application/rss', 'application/atom'
+)
+
+VALID_SCHEMES = ('http', 'https')
+INVALID_FILES = ('.js', '.css')
+
+def content_kind(content_type):
+    """
+    按 Content-Type 判断内容是否需要解析
+
+    返回:
+        str - binary 二进制 / unparseable 不可解析 / parseable 可解析
+    """
+    content_type = (content_type or '').lower()
+    if any(bt in content_type for bt in BINARY_TYPES):
+        return 'binary'
+    if content_type and not any(pt in content_type for pt in PARSEABLE_TYPES):
+        # 有明确的 Content-Type 但不是可解析类型
+        if 'text/' not in content_type and 'application/' in content_type:
+            return 'unparseable'
+    return 'parseable'
+
+
+def is_xml_document(content, content_type=None):
+    """按 Content-Type 或文档开头判断是否为 XML（RSS/Atom 等）"""
+    ct = (content_type or '').lower()
+    if 'xml' in ct and 'html' not in ct:
+        return True
+    head = content[:200].lstrip()
+    if isinstance(head, bytes):
+        head = head.decode('ascii', errors='ignore')
+    h = head.lower()
+    return (h.startswith('<?xml') and '<html' not in h) or '<rss' in h or '<feed' in h
+
+
+def parse_document(content, content_type=None, encoding=None, url=None):
+    """
+    使用 lxml 解析 HTML/XML 文档
+
+    参数:
+        content: bytes|str - 文档内容
+        content_type: str - 响应的 Content-Type
+        encoding: str - 已知的文档编码，为空时由 EncodingResolver 识别（HTTP 头 / BOM / <meta> / 样本检测）
+        url: str - 页面 url（用于按主机缓存检测出的编码）
+
+    返回:
+        lxml.etree._Element - 文档根节点，解析失败返回 None
+    """
+    if not content:
+        return None
+    if isinstance(content, str):
+        # lxml 不接受带编码声明的 str，统一转为 bytes
+        content = content.encode('utf-8')
+        encoding = 'utf-8'
+    encoding = encoding or get_encoding_resolver().resolve(content, content_type, url)
+
+    try:
+        if is_xml_document(content, content_type):
+            parser = etree.XMLParser(recover=True, encoding=encoding, resolve_entities=False, no_network=True)
+        else:
+            parser = etree.HTMLParser(encoding=encoding)
+        return etree.fromstring(content, parser)
+    except (LookupError, ValueError):
+        # 编码名称无效时交给 lxml 自行检测
+        try:
+            return etree.fromstring(content, etree.HTMLParser())
+        except Exception:
+            return None
+    except Exception:
+        return None
+
+
+def _local_name(tag):
+    """去掉 XML 命名空间前缀，如 {http://www.w3.org/2005/Atom}link -> link"""
+    if tag[0] == '{':
+        return tag.rsplit('}', 1)[1].lower()
+    return tag.lower()
+
+
+def iter_element_links(root, base_url):
+    """
+    单次遍历文档树，依次产出元素中引用的绝对 url
+
+    参数:
+        root: lxml.etree._Element - 文档根节点
+        base_url: str - 页面最终 url（重定向后），存在 <base href> 时以其为准
+
+    返回:
+        generator[str] - 绝对 url（可能重复）
+    """
+    for base in root.iter('{*}base'):
+        href = (base.get('href') or '').strip()
+        if href:
+            base_url = urljoin(base_url, href)
+        break
+
+    for element in root.iter(etree.Element):
+        tag = element.tag
+        attributes = ELEMENTS_TO_CHECK.get(tag) or ELEMENTS_TO_CHECK.get(_local_name(tag))
+        if attributes:
+            yield from _attribute_links(element.attrib, attributes, base_url)
+
+
+def _attribute_links(attrib, attributes, base_url):
+    """从元素属性中产出绝对 url（srcset 类属性按逗号拆分）"""
+    for attr in attributes:
+        value = attrib.get(attr)
+        if not value:
+            continue
+        value = value.strip()
+        if not value:
+            continue
+        if attr in SRCSET_ATTRIBUTES:
+            for part in value.split(','):
+                part = part.strip()
+                if part:
+                    yield urljoin(base_url, part.split()[0])
+        else:
+            yield urljoin(base_url, value)
+
+
+def extract_links(content, base_url, content_type=None, encoding=None):
+    """
+    提取页面中的所有链接（未过滤）
+
+    参数:
+        content: bytes|str - 页面内容
+        base_url: str - 页面最终 url
+        content_type: str - 响应的 Content-Type
+        encoding: str - 已知的文档编码（可选）
+
+    返回:
+        set[str] - 绝对 url 集合，无法解析时返回 None
+    """
+    if not content:
+        return set()
+    root = parse_document(content, content_type, encoding, url=base_url)
+    if root is None:
+        return None
+    return set(iter_element_links(root, base_url))
+
+
+class _LinkTarget:
+    """lxml 解析器 target：只处理开始标签事件，不构建文档树"""
+
+    def __init__(self, base_url, sink):
+        self.base_url = base_url
+        self.sink = sink
+        self.base_seen = False
+
+    def start(self, tag, attrib):
+        name = _local_name(tag)
+        if name == 'base' and not self.base_seen:
+            self.base_seen = True
+            href = (attrib.get('href') or '').strip()
+            if href:
+                self.base_url = urljoin(self.base_url, href)
+            return
+        attributes = ELEMENTS_TO_CHECK.get(name)
+        if attributes:
+            for link in _attribute_links(attrib, attributes, self.base_url):
+                self.sink(link)
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+
+class StreamingLinkExtractor:
+    """
+    流式链接提取器
+
+    随响应数据块增量喂给 lxml 的 feed 解析器，每个数据块解析后立即产出新发现的链接，
+    链接发现与下载重叠进行；只保留链接集合，不保留文档树。
+    """
+
+    def __init__(self, on_links=None, resolver=None):
+        """
+        参数:
+            on_links: callable - on_links(list[str])，每批新发现的链接（绝对 url，未过滤）
+            resolver: EncodingResolver - 任务级编码识别器（为空时使用进程级识别器）
+        """
+        self.on_links = on_links
+        self.resolver = resolver
+        self.links = set()
+        self.started = False
+        self.skipped = False
+        self.failed = False
+        self.closed = False
+        self._parser = None
+        self._new = []
+
+    def _sink(self, link):
+        if link not in self.links:
+            self.links.add(link)
+            self._new.append(link)
+
+    def _start(self, response, chunk):
+        """收到首个数据块时按响应头创建解析器"""
+        self.started = True
+        content_type = response.headers.get('Content-Type', '')
+        if content_kind(content_type) != 'parseable':
+            self.skipped = True
+            return
+        target = _LinkTarget(response.url, self._sink)
+        # 按首个数据块识别编码，同一主机的检测结果会被缓存
+        encoding = (self.resolver or get_encoding_resolver()).resolve(chunk, content_type, response.url)
+        try:
+            if is_xml_document(chunk, content_type):
+                self._parser = etree.XMLParser(target=target, recover=True, encoding=encoding,
+                                               resolve_entities=False, no_network=True)
+            else:
+                self._parser = etree.HTMLParser(target=target, encoding=encoding)
+        except LookupError:
+            # 编码名称无效时交给 lxml 自行检测
+            self._parser = etree.HTMLParser(target=target)
+
+    def _flush(self):
+        new, self._new = self._new, []
+        if new and self.on_links:
+            self.on_links(new)
+        return new
+
+    def feed(self, response, chunk):
+        """
+        喂入一个数据块（BodyReader 的 on_chunk 回调）
+
+        参数:
+            response: requests.Response - 流式响应
+            chunk: bytes - 数据块
+
+        返回:
+            list[str] - 本数据块中新发现的链接
+        """
+        if not self.started:
+            self._start(response, chunk)
+        if self._parser is None or self.failed or not chunk:
+            return []
+        try:
+            self._parser.feed(chunk)
+        except Exception:
+            self.failed = True
+        return self._flush()
+
+    def close(self):
+        """
+        结束解析
+
+        返回:
+            list[str] - 文档结尾处新发现的链接
+        """
+        if self._parser is not None and not self.closed and not self.failed:
+            try:
+                self._parser.close()
+            except Exception:
+                self.failed = True
+        self.closed = True
+        return self._flush()
+
+    @property
+    def usable(self):
+        """是否已完整解析，可直接使用 links 代替整页解析"""
+        return self._parser is not None and self.closed and not self.failed
+
+
+def is_valid_link(link):
+    """是否为需要记录的链接（http/https 且不是 js/css 文件）"""
+    return urlparse(link).scheme in VALID_SCHEMES and not any(ext in link for ext in INVALID_FILES)
+
+
+def filter_links(links, exclude=None, canonicalizer=None, traps=None):
+    """
+    过滤有效链接
+
+    参数:
+        links: iterable[str] - 绝对 url
+        exclude: set | KnownUrlIndex - 需要排除的 url 集合（规范化后的 url），
+            提供 filter_new 方法时整批查询
+        canonicalizer: UrlCanonicalizer - url 规范化规则（为空时不做规范化）
+        traps: TrapDetector - 爬虫陷阱检测（为空时不检测）
+
+    返回:
+        list[str] - 有效链接
+    """
+    if exclude is None:
+        exclude = ()
+    links = [link for link in links if is_valid_link(link)]
+    if canonicalizer is not None:
+        links = canonicalizer.canonicalize_links(links)
+    if hasattr(exclude, 'filter_new'):
+        links = exclude.filter_new(links)
+    else:
+        links = [link for link in links if link not in exclude]
+    if traps is not None:
+        links = traps.admit_links(links)
+    return links
@@ -0,0 +1,123 @@
+"""
+轻量链接校验 - 资源类链接只用 HEAD / Range GET 获取状态码与内容类型，不下载正文
+"""
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+
+from app.services.response_store import ResponseRecord
+
+# 按扩展名划分的资源类别
+ASSET_EXTENSIONS = {
+    'image': ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tif', '.tiff', '.avif'),
+    'video': ('.mp4', '.webm', '.avi', '.mov', '.flv', '.mkv', '.m3u8', '.wmv', '.mpg', '.mpeg'),
+    'audio': ('.mp3', '.wav', '.ogg', '.flac', '.aac', '.m4a', '.wma'),
+    'document': ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.txt', '.csv', '.rtf'),
+    'archive': ('.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz', '.exe', '.dmg', '.apk', '.iso'),
+    'font': ('.woff', '.woff2', '.ttf', '.otf', '.eot'),
+}
+
+# Content-Type 前缀对应的资源类别
+ASSET_CONTENT_TYPES = {
+    'image/': 'image',
+    'video/': 'video',
+    'audio/': 'audio',
+    'font/': 'font',
+    'application/pdf': 'document',
+    'application/msword': 'document',
+    'application/vnd.': 'document',
+    'application/zip': 'archive',
+    'application/x-rar': 'archive',
+    'application/octet-stream': 'archive',
+    'application/x-font': 'font',
+}
+
+# HEAD 不被支持时回退到 Range GET 的状态码
+HEAD_FALLBACK_STATUS = (403, 405, 501)
+
+
+def classify_link(url, content_type=None):
+    """
+    链接分类
+
+    参数:
+        url: str - 链接
+        content_type: str - 响应的 Content-Type（已知时优先使用）
+
+    返回:
+        str - page / image / video / audio / document / archive / font
+    """
+    if content_type:
+        ct = content_type.lower()
+        for prefix, asset_class in ASSET_CONTENT_TYPES.items():
+            if ct.startswith(prefix):
+                return asset_class
+        return 'page'
+
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    for asset_class, extensions in ASSET_EXTENSIONS.items():
+        if ext in extensions:
+            return asset_class
+    return 'page'
+
+
+class ProbeStats:
+    """任务级校验统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.probed = 0
+        self.range_fallbacks = 0
+        self.full_gets = 0
+
+    def incr(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def to_dict(self):
+        return {
+            'probed': self.probed,
+            'range_fallbacks': self.range_fallbacks,
+            'full_gets': self.full_gets
+        }
+
+
+def probe_link(url, headers, pool, timeout=2, stats=None):
+    """
+    只获取状态码和响应头：先 HEAD，不支持时回退到 Range: bytes=0-0 的 GET
+
+    参数:
+        url: str - 链接
+        headers: dict - 请求头
+        pool: HttpSessionPool - HTTP 连接池
+        timeout: int - 超时时间（秒）
+        stats: ProbeStats - 校验统计（可选）
+
+    返回:
+        ResponseRecord - 不含正文的响应记录（失败时 status_code 为 None）
+    """
+    if stats:
+        stats.incr('probed')
+    try:
+        response = pool.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        if response.status_code in HEAD_FALLBACK_STATUS:
+            if stats:
+                stats.incr('range_fallbacks')
+            range_headers = dict(headers, Range='bytes=0-0')
+            response = pool.get(url, headers=range_headers, timeout=timeout, allow_redirects=True, stream=True)
+            # 只需要响应头，立即关闭连接，不读取正文（与 HEAD 探测一样写入 WARC）
+            pool.release(response)
+            # 416 表示资源存在但范围无效（如空文件）
+            if response.status_code == 416:
+                return ResponseRecord(url=url, final_url=response.url, status_code=response.status_code,
+                                      headers=response.headers)
+        response.raise_for_status()
+        return ResponseRecord(url=url, final_url=response.url, status_code=response.status_code,
+                              headers=response.headers)
+    except requests.exceptions.HTTPError as e:
+        print(f"HTTP错误 [{e.response.status_code}]: {url}")
+    except requests.exceptions.RequestException as e:
+        print(f"请求异常: {url} - {str(e)}")
+    return ResponseRecord.failed(url)
@@ -0,0 +1,113 @@
+"""
+爬取链接批量写入 - 把逐条 find/delete/insert 合并为无序 bulk_write upsert，每批一次往返
+"""
+import threading
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.models import CrawledLinkModel
+
+# 唯一索引冲突（并发 upsert 同一 url 时可能出现，重试一次即可命中已存在文档）
+DUPLICATE_KEY_ERROR = 11000
+
+
+class CrawledLinkWriter:
+    """
+    crawled_links 批量写入器（线程安全）
+
+    add 累积到 batch_size 条后写入一批，结束时调用 flush 写入剩余部分。
+    新增 / 更新数量取自 bulk_write 的结果（upserted / matched）。
+    """
+
+    def __init__(self, collection, batch_size=500, before_write=None, replay=False):
+        """
+        参数:
+            collection: Collection - crawled_links 集合
+            batch_size: int - 每批最多写入的链接数
+            before_write: callable - 每批写入前调用（如先写入链接引用的正文 ContentStore.flush）
+            replay: bool - 离线回放的结果（不更新已存在链接的爬取次数与时间）
+        """
+        self.collection = collection
+        self.batch_size = max(1, int(batch_size))
+        self.before_write = before_write
+        self.replay = replay
+        self.inserted = 0
+        self.updated = 0
+        self.errors = 0
+        self.batches = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, doc):
+        """
+        加入一条链接文档（CrawledLinkModel.create 生成），达到批大小时写入
+
+        返回:
+            int - 本次写入中新增的链接数（未触发写入时为 0）
+        """
+        return self._append(UpdateOne(*CrawledLinkModel.upsert(doc, replay=self.replay), upsert=True))
+
+    def touch(self, website_id, url, etag=None, last_modified=None):
+        """
+        加入一条未变化链接的更新（只更新爬取时间与次数，见 CrawledLinkModel.touch）
+
+        返回:
+            int - 本次写入中新增的链接数（未触发写入时为 0）
+        """
+        return self._append(UpdateOne(*CrawledLinkModel.touch(website_id, url, etag, last_modified)))
+
+    def _append(self, op):
+        with self._lock:
+            self._pending.append(op)
+            if len(self._pending) < self.batch_size:
+                return 0
+            ops, self._pending = self._pending, []
+        return self._write(ops)
+
+    def flush(self):
+        """
+        写入剩余的链接
+
+        返回:
+            int - 新增的链接数
+        """
+        with self._lock:
+            ops, self._pending = self._pending, []
+        return self._write(ops) if ops else 0
+
+    def _write(self, ops, retry=True):
+        inserted = updated = 0
+        failed = []
+        if self.before_write is not None:
+            self.before_write()
+        try:
+            result = self.collection.bulk_write(ops, ordered=False)
+            inserted, updated = result.upserted_count, result.matched_count
+        except BulkWriteError as e:
+            details = e.details
+            inserted, updated = details.get('nUpserted', 0), details.get('nMatched', 0)
+            for error in details.get('writeErrors', []):
+                if retry and error.get('code') == DUPLICATE_KEY_ERROR:
+                    failed.append(ops[error['index']])
+                else:
+                    print(f"链接写入失败: {error.get('errmsg')}")
+                    with self._lock:
+                        self.errors += 1
+        with self._lock:
+            self.inserted += inserted
+            self.updated += updated
+            self.batches += 1
+        if failed:
+            inserted += self._write(failed, retry=False)
+        return inserted
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'batch_size': self.batch_size,
+                'batches': self.batches,
+                'inserted': self.inserted,
+                'updated': self.updated,
+                'errors': self.errors
+            }
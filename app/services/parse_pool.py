@@ -0,0 +1,144 @@
+"""
+解析进程池 - 把 CPU 密集的 HTML 解析与链接提取放到独立进程中执行，避免与 I/O 线程争用 GIL
+"""
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.link_extractor import extract_links, parse_document, iter_element_links
+
+
+def _parse_in_worker(content, base_url, content_type, encoding=None):
+    """
+    子进程中执行：解析页面并提取链接
+
+    参数与返回值都只包含 bytes / str，序列化开销最小
+
+    返回:
+        tuple - (links, title, parse_ms)，无法解析时 links 为 None
+    """
+    started = time.perf_counter()
+    root = parse_document(content, content_type, encoding, url=base_url) if content else None
+    if root is None:
+        links = () if not content else None
+        title = ''
+    else:
+        links = tuple(set(iter_element_links(root, base_url)))
+        title_el = next(root.iter('{*}title'), None)
+        title = (title_el.text or '').strip()[:200] if title_el is not None else ''
+    return links, title, round((time.perf_counter() - started) * 1000, 2)
+
+
+class ParsePool:
+    """
+    解析进程池（进程级共享）
+
+    只传递原始字节和 url，返回链接元组与少量元数据（标题、解析耗时）。
+    进程池异常时自动退回当前线程解析。
+    """
+
+    def __init__(self, workers):
+        """
+        参数:
+            workers: int - 解析进程数
+        """
+        self.workers = max(1, int(workers))
+        # fork 会复制父进程中的线程锁状态，使用 forkserver / spawn 启动子进程
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.bytes = 0
+        self.parse_ms = 0.0
+        self.fallbacks = 0
+        self.broken = False
+
+    def parse(self, content, base_url, content_type=None, encoding=None):
+        """
+        在子进程中解析页面
+
+        参数:
+            content: bytes - 页面内容
+            base_url: str - 页面最终 url
+            content_type: str - 响应的 Content-Type
+            encoding: str - 已识别的文档编码（为空时在子进程中识别）
+
+        返回:
+            dict - {links: set[str] | None, title: str, parse_ms: float}
+        """
+        content = bytes(content or b'')
+        result = None
+        if not self.broken:
+            try:
+                result = self._executor.submit(_parse_in_worker, content, base_url, content_type or '',
+                                             encoding).result()
+            except (BrokenProcessPool, RuntimeError) as e:
+                # 进程池损坏后不再重试，后续页面直接在当前线程解析
+                if not self.broken:
+                    self.broken = True
+                    print(f"解析进程池不可用，改为线程内解析: {e}")
+        if result is None:
+            with self._lock:
+                self.fallbacks += 1
+            result = _parse_in_worker(content, base_url, content_type or '', encoding)
+        links, title, parse_ms = result
+        with self._lock:
+            self.pages += 1
+            self.bytes += len(content)
+            self.parse_ms += parse_ms
+        return {
+            'links': set(links) if links is not None else None,
+            'title': title,
+            'parse_ms': parse_ms
+        }
+
+    def extract_links(self, content, base_url, content_type=None, encoding=None):
+        """与 link_extractor.extract_links 相同的接口，在子进程中执行"""
+        return self.parse(content, base_url, content_type, encoding)['links']
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pages': self.pages,
+                'bytes': self.bytes,
+                'avg_parse_ms': round(self.parse_ms / self.pages, 2) if self.pages else 0,
+                'fallbacks': self.fallbacks
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 进程级解析池（CRAWL_PARSE_WORKERS 为 0 时不启用）
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """
+    获取进程级解析池
+
+    返回:
+        ParsePool - 未启用时返回 None
+    """
+    global _parse_pool
+    if _parse_pool is None:
+        from app.config import config
+        if config.crawl_parse_workers <= 0:
+            return None
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = ParsePool(config.crawl_parse_workers)
+    return _parse_pool
+
+
+def extract_links_parallel(content, base_url, content_type=None, encoding=None):
+    """启用解析池时在子进程中提取链接，否则在当前线程中提取"""
+    pool = get_parse_pool()
+    if pool is None:
+        return extract_links(content, base_url, content_type, encoding)
+    return pool.extract_links(content, base_url, content_type, encoding)
@@ -0,0 +1,208 @@
+"""
+分阶段流水线 - 各阶段之间用有界队列连接，队列满时上游阻塞（背压），内存占用与站点规模无关
+"""
+import queue
+import threading
+
+# 阶段结束标记
+_DONE = object()
+
+
+class PipelineStage:
+    """
+    流水线阶段
+
+    func(item) 返回交给下一阶段的结果，返回 None 表示丢弃该项
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=100):
+        """
+        参数:
+            name: str - 阶段名称（用于监控）
+            func: callable - 处理函数
+            workers: int - 工作线程数
+            queue_size: int - 输入队列容量
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self._alive = 0
+        self._lock = threading.Lock()
+
+    def _incr(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def to_dict(self):
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_size': self.queue.maxsize,
+            'workers': self.workers,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'errors': self.errors
+        }
+
+
+class CrawlPipeline:
+    """
+    多阶段流水线
+
+    输入项依次经过各阶段；取消后各阶段丢弃队列中剩余的项并尽快退出。
+    """
+
+    def __init__(self, stages, should_stop=None, on_progress=None, progress_interval=2.0, on_error=None):
+        """
+        参数:
+            stages: list[PipelineStage] - 按顺序排列的阶段
+            should_stop: callable - 取消检查函数
+            on_progress: callable - on_progress(depths)，运行期间定期回调各阶段队列深度
+            progress_interval: float - 回调间隔（秒）
+            on_error: callable - on_error(stage_name, item, error)，阶段处理函数抛出异常时回调（该项被丢弃并计入 errors）
+        """
+        self.stages = stages
+        self.should_stop = should_stop
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.progress_interval = progress_interval
+        self.fed = 0
+        self._threads = []
+        self._progress_done = threading.Event()
+
+    def stopped(self):
+        return bool(self.should_stop and self.should_stop())
+
+    def _put(self, q, item):
+        """阻塞写入下游队列；取消后放弃写入"""
+        while True:
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                if self.stopped():
+                    return False
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        try:
+            while True:
+                try:
+                    item = stage.queue.get(timeout=0.2)
+                except queue.Empty:
+                    if self.stopped():
+                        return
+                    continue
+                if item is _DONE:
+                    return
+                if self.stopped():
+                    stage._incr('dropped')
+                    continue
+                try:
+                    result = stage.func(item)
+                except Exception as e:
+                    print(f"流水线阶段 {stage.name} 异常: {e}")
+                    stage._incr('errors')
+                    self._report_error(stage, item, e)
+                    continue
+                stage._incr('processed')
+                if result is None or downstream is None:
+                    continue
+                if not self._put(downstream.queue, result):
+                    stage._incr('dropped')
+        finally:
+            # 本阶段最后一个退出的线程通知下游结束
+            with stage._lock:
+                stage._alive -= 1
+                last = stage._alive == 0
+            if last and downstream is not None:
+                for _ in range(downstream.workers):
+                    if not self._put(downstream.queue, _DONE):
+                        break
+
+    def _report_error(self, stage, item, error):
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(stage.name, item, error)
+        except Exception as e:
+            print(f"流水线异常回调失败: {e}")
+
+    def depths(self):
+        """
+        各阶段监控数据
+
+        返回:
+            dict - {阶段名称: {queue_depth, queue_size, workers, processed, dropped, errors}}
+        """
+        return {stage.name: stage.to_dict() for stage in self.stages}
+
+    def start(self):
+        """启动各阶段工作线程与进度回调线程"""
+        self._threads = []
+        for index, stage in enumerate(self.stages):
+            stage._alive = stage.workers
+            for n in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(index,), name=f"{stage.name}-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+        self._progress_done = threading.Event()
+
+        def _report():
+            while not self._progress_done.wait(self.progress_interval):
+                try:
+                    self.on_progress(self.depths())
+                except Exception as e:
+                    print(f"流水线进度回调失败: {e}")
+
+        if self.on_progress:
+            threading.Thread(target=_report, daemon=True).start()
+
+    def put(self, item):
+        """
+        写入一个输入项（第一阶段队列满时阻塞，背压传递到调用方）
+
+        返回:
+            bool - 是否写入成功（已取消时返回 False）
+        """
+        if self.stopped() or not self._put(self.stages[0].queue, item):
+            return False
+        self.fed += 1
+        return True
+
+    def finish(self):
+        """
+        输入结束，等待所有阶段处理完成或被取消
+
+        返回:
+            dict - 各阶段监控数据
+        """
+        first = self.stages[0]
+        for _ in range(first.workers):
+            if not self._put(first.queue, _DONE):
+                break
+        for t in self._threads:
+            t.join()
+        self._progress_done.set()
+        return self.depths()
+
+    def run(self, items):
+        """
+        运行流水线直到所有输入处理完成或被取消
+
+        参数:
+            items: iterable - 输入项（逐个写入第一阶段，队列满时阻塞）
+
+        返回:
+            dict - 各阶段监控数据
+        """
+        self.start()
+        for item in items:
+            if not self.put(item):
+                break
+        return self.finish()
@@ -0,0 +1,262 @@
+"""
+离线回放 - 从 WARC 文件或已保存的正文中读取响应，替代网络连接池重新执行解析、打分与保存
+"""
+import gzip
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from urllib.parse import urljoin
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from app.services.http_pool import RequestCancelled
+
+MAX_REDIRECTS = 10
+# 读取 WARC 时每次送入解压器的字节数（成员结束时剩余输入会被复制到 unused_data，块越小复制越少）
+READ_CHUNK_SIZE = 8192
+# StoredLinkArchive 缓存的链接文档数（lookup 与 ip_address 共用一次查询）
+DOC_CACHE_SIZE = 1024
+
+
+def _split_block(data):
+    """拆分头部与正文（以第一个空行分隔）"""
+    head, _, body = data.partition(b'\r\n\r\n')
+    lines = head.decode('utf-8', 'replace').split('\r\n')
+    headers = []
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers.append((name.strip(), value.strip()))
+    return lines[0], headers, body
+
+
+def iter_warc_members(path):
+    """
+    逐个读取 .warc.gz 中的 gzip 成员
+
+    按块流式读取，不把整个文件载入内存；文件末尾不完整的成员被忽略
+
+    返回:
+        iterator[tuple] - (偏移, 长度, 解压后的记录)
+    """
+    with open(path, 'rb', buffering=1024 * 1024) as f:
+        offset = 0
+        pending = b''
+        while True:
+            d = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            parts = []
+            length = 0
+            while not d.eof:
+                chunk = pending or f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                parts.append(d.decompress(chunk))
+                # 成员结束时 unused_data 为下一个成员的开头
+                pending = d.unused_data
+                length += len(chunk) - len(pending)
+            yield offset, length, b''.join(parts)
+            offset += length
+
+
+def parse_http_response(block):
+    """
+    解析 WARC response 记录中的 HTTP 响应
+
+    返回:
+        tuple - (状态码, 原因, 响应头 CaseInsensitiveDict, 正文)
+    """
+    status_line, headers, body = _split_block(block)
+    parts = status_line.split(' ', 2)
+    status_code = int(parts[1])
+    reason = parts[2] if len(parts) > 2 else ''
+    return status_code, reason, CaseInsensitiveDict(headers), body
+
+
+class WarcArchive:
+    """
+    WARC 回放源：建立 url -> 记录位置 的索引，回放时按需读取单条记录
+
+    同一 url 有多条响应时使用最后一条有正文的记录（HEAD 探测的记录没有正文）；
+    条件请求的 304 记录不含页面内容，不建立索引。
+    """
+
+    def __init__(self, paths):
+        """
+        参数:
+            paths: list[str] - WARC 文件路径（按写入顺序）
+        """
+        self.paths = list(paths)
+        self._index = {}
+        for path in self.paths:
+            for offset, length, record in iter_warc_members(path):
+                head, _, block = record.partition(b'\r\n\r\n')
+                _, warc_headers, _ = _split_block(head + b'\r\n\r\n')
+                fields = {name.lower(): value for name, value in warc_headers}
+                if fields.get('warc-type') != 'response' or 'warc-target-uri' not in fields:
+                    continue
+                url = fields['warc-target-uri']
+                if block.split(b' ', 2)[1:2] == [b'304']:
+                    continue
+                has_body = bool(block.partition(b'\r\n\r\n')[2].rstrip(b'\r\n'))
+                current = self._index.get(url)
+                if current is None or has_body or not current[2]:
+                    self._index[url] = (path, offset, has_body, length)
+
+    def lookup(self, url):
+        """
+        返回:
+            tuple - (状态码, 原因, 响应头 CaseInsensitiveDict, 正文)，未存档时返回 None
+        """
+        entry = self._index.get(url)
+        if entry is None:
+            return None
+        path, offset, _, length = entry
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            record = gzip.decompress(f.read(length))
+        head, _, block = record.partition(b'\r\n\r\n')
+        _, warc_headers, _ = _split_block(head + b'\r\n\r\n')
+        fields = {name.lower(): value for name, value in warc_headers}
+        # 记录正文后有两个 CRLF 结尾
+        return parse_http_response(block[:int(fields.get('content-length', len(block)))])
+
+    def ip_address(self, url):
+        return None
+
+    def __len__(self):
+        return len(self._index)
+
+
+class StoredLinkArchive:
+    """
+    已保存结果回放源：按 crawled_links 中的状态码 / 内容类型与 page_contents 中的正文重建响应
+
+    正文保存时已解码为文本并以 UTF-8 存储，重建的 Content-Type 中 charset 改为 utf-8。
+    上次爬取失败（status_code 为空）的链接视为未存档。
+    """
+
+    def __init__(self, find_link, content_store):
+        """
+        参数:
+            find_link: callable - find_link(url) 返回 crawled_links 文档或 None
+            content_store: ContentStore - 正文存储
+        """
+        self.find_link = find_link
+        self.content_store = content_store
+        # 抓取阶段先取 IP 再请求（发现阶段相反），同一 url 的两次调用只查询一次
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _doc(self, url):
+        """读取链接文档（第一次调用时查询并缓存，第二次调用取出缓存）"""
+        with self._lock:
+            if url in self._docs:
+                return self._docs.pop(url)
+        doc = self.find_link(url)
+        with self._lock:
+            self._docs[url] = doc
+            while len(self._docs) > DOC_CACHE_SIZE:
+                self._docs.popitem(last=False)
+        return doc
+
+    def lookup(self, url):
+        doc = self._doc(url)
+        if not doc or doc.get('status_code') is None:
+            return None
+        content_type = doc.get('content_type') or ''
+        text = self.content_store.get(doc.get('content_hash'))
+        body = b''
+        if text is not None:
+            body = text.encode('utf-8')
+            content_type = re.sub(r';\s*charset=[^;]*', '', content_type) + '; charset=utf-8'
+        headers = {'Content-Type': content_type} if content_type else {}
+        return doc['status_code'], '', headers, body
+
+    def ip_address(self, url):
+        doc = self._doc(url)
+        return doc.get('ip_address') if doc else None
+
+
+class ReplayPool:
+    """
+    回放连接池：接口与 HttpSessionPool 相同，响应全部来自回放源，不发起网络请求
+    """
+
+    def __init__(self, archive):
+        """
+        参数:
+            archive: WarcArchive | StoredLinkArchive - 回放源
+        """
+        self.archive = archive
+        self.cancelled = False
+        self.requests = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _response(self, url, method):
+        with self._lock:
+            self.requests += 1
+        stored = self.archive.lookup(url)
+        if stored is None:
+            with self._lock:
+                self.misses += 1
+            raise requests.exceptions.ConnectionError(f"未存档: {url}")
+        status_code, reason, headers, body = stored
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.url = url
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = b'' if method == 'HEAD' else body
+        response._content_consumed = True
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+    def _fetch(self, url, method, allow_redirects):
+        if self.cancelled:
+            raise RequestCancelled(f"请求已取消: {url}")
+        history = []
+        response = self._response(url, method)
+        while allow_redirects and response.is_redirect and len(history) < MAX_REDIRECTS:
+            history.append(response)
+            response = self._response(urljoin(response.url, response.headers['Location']), method)
+        response.history = history
+        return response
+
+    def get(self, url, **kwargs):
+        """返回存档的 GET 响应（传入 on_chunk 时以完整正文回调一次）"""
+        on_chunk = kwargs.get('on_chunk')
+        response = self._fetch(url, 'GET', kwargs.get('allow_redirects', True))
+        if on_chunk and response.content:
+            on_chunk(response, response.content)
+        return response
+
+    def head(self, url, **kwargs):
+        return self._fetch(url, 'HEAD', kwargs.get('allow_redirects', False))
+
+    def release(self, response):
+        response.close()
+
+    def ip_address(self, url):
+        """存档中记录的 IP 地址（未记录时返回 None）"""
+        return self.archive.ip_address(url)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': 0,
+                'requests': self.requests,
+                'connections': 0,
+                'reused_connections': 0,
+                'replay_misses': self.misses
+            }
+
+    def close(self):
+        pass
@@ -0,0 +1,118 @@
+"""
+抓取响应记录 - 在链接发现阶段与链接处理阶段之间复用响应
+"""
+import threading
+
+from requests.structures import CaseInsensitiveDict
+
+from app.services.encoding import get_encoding_resolver
+
+
+class ResponseRecord:
+    """单个 url 的抓取结果（状态码、响应头、最终 url、正文；响应头不区分大小写）"""
+
+    __slots__ = ('url', 'final_url', 'status_code', 'headers', 'content', 'encoding')
+
+    def __init__(self, url, final_url=None, status_code=None, headers=None,
+                 content=None, encoding=None):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.encoding = encoding
+
+    @classmethod
+    def from_response(cls, url, response, resolver=None):
+        """
+        从 requests.Response 构建记录
+
+        仅文本类型保留正文，二进制内容只保留状态码和响应头
+        （resolver 为任务级 EncodingResolver，为空时使用进程级识别器）
+        """
+        content_type = response.headers.get('Content-Type', '')
+        content = None
+        encoding = None
+        if 'text' in content_type:
+            content = response.content
+            # 不使用 apparent_encoding（对整个正文做 chardet 检测）
+            encoding = (resolver or get_encoding_resolver()).resolve(content, content_type, response.url)
+        return cls(
+            url=url,
+            final_url=response.url,
+            status_code=response.status_code,
+            headers=response.headers,
+            content=content,
+            encoding=encoding
+        )
+
+    @classmethod
+    def failed(cls, url):
+        """请求失败（无响应）的记录"""
+        return cls(url=url)
+
+    @property
+    def ok(self):
+        return self.status_code is not None
+
+    def header(self, name, default=None):
+        """按名称读取响应头（不区分大小写）"""
+        return self.headers.get(name, default)
+
+    @property
+    def content_type(self):
+        return self.header('Content-Type', '')
+
+    @property
+    def etag(self):
+        return self.header('ETag')
+
+    @property
+    def last_modified(self):
+        return self.header('Last-Modified')
+
+    @property
+    def text(self):
+        if not self.content:
+            return ''
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class ResponseStore:
+    """
+    任务级响应记录表（线程安全）
+
+    发现阶段写入，抓取阶段读取，避免同一 url 被重复下载
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def put(self, record):
+        with self._lock:
+            self._records[record.url] = record
+
+    def get(self, url):
+        with self._lock:
+            record = self._records.get(url)
+            if record is not None:
+                self.hits += 1
+            return record
+
+    def pop(self, url):
+        """取出并释放记录（处理完成后释放正文占用的内存）"""
+        with self._lock:
+            record = self._records.pop(url, None)
+            if record is not None:
+                self.hits += 1
+            return record
+
+    def __contains__(self, url):
+        with self._lock:
+            return url in self._records
+
+    def __len__(self):
+        with self._lock:
+            return len(self._records)
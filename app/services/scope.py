@@ -0,0 +1,123 @@
+"""
+抓取范围控制 - 决定哪些链接可以继续递归抓取
+"""
+import re
+from urllib.parse import urlparse
+
+# 常见的二级公共后缀（用于近似计算可注册域名）
+SECOND_LEVEL_SUFFIXES = {
+    'com.cn', 'net.cn', 'org.cn', 'gov.cn', 'edu.cn', 'ac.cn',
+    'com.hk', 'edu.hk', 'org.hk', 'gov.hk',
+    'com.tw', 'edu.tw', 'org.tw', 'gov.tw',
+    'co.uk', 'ac.uk', 'org.uk', 'gov.uk',
+    'co.jp', 'ac.jp', 'or.jp', 'go.jp',
+    'co.kr', 'ac.kr', 'or.kr', 'go.kr',
+    'com.au', 'edu.au', 'org.au', 'gov.au',
+    'com.sg', 'edu.sg', 'com.br', 'com.mx', 'co.in', 'ac.in'
+}
+
+SCOPE_MODES = ('same_host', 'same_domain', 'any')
+
+
+def registrable_domain(host):
+    """
+    计算主机的可注册域名，如 www.cs.tsinghua.edu.cn -> tsinghua.edu.cn
+
+    参数:
+        host: str - 主机名
+
+    返回:
+        str - 可注册域名
+    """
+    host = (host or '').lower().strip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    labels = host.split('.')
+    if len(labels) <= 2 or re.fullmatch(r'[\d.]+', host):
+        return host
+    if '.'.join(labels[-2:]) in SECOND_LEVEL_SUFFIXES:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+class CrawlScope:
+    """
+    抓取范围规则（每个任务编译一次）
+
+    - mode: same_host 仅同主机 / same_domain 同可注册域名 / any 不限
+    - allow_patterns: 命中的 url 视为范围内（可扩展到其他域名）
+    - deny_patterns: 命中的 url 一律不递归，优先于 allow_patterns
+    - max_external_hops: 允许连续进入范围外页面的层数，0 表示范围外页面只记录不抓取
+    """
+
+    def __init__(self, seed_url, mode='same_domain', allow_patterns=None, deny_patterns=None,
+                 max_external_hops=0):
+        if mode not in SCOPE_MODES:
+            raise ValueError(f"无效的抓取范围模式: {mode}")
+        seed_host = (urlparse(seed_url).hostname or '').lower()
+        self.mode = mode
+        self.seed_host = seed_host
+        self.seed_domain = registrable_domain(seed_host)
+        self.allow = [re.compile(p) for p in (allow_patterns or [])]
+        self.deny = [re.compile(p) for p in (deny_patterns or [])]
+        self.max_external_hops = max(0, int(max_external_hops or 0))
+        self.off_scope_skipped = 0
+
+    @classmethod
+    def from_rules(cls, seed_url, rules=None, default_mode='same_domain'):
+        """
+        根据网站的 scope 配置构建
+
+        参数:
+            seed_url: str - 入口 url
+            rules: dict - WebsiteModel 中的 scope 字段
+            default_mode: str - 未配置时的默认模式
+        """
+        rules = rules or {}
+        return cls(
+            seed_url,
+            mode=rules.get('mode') or default_mode,
+            allow_patterns=rules.get('allow_patterns'),
+            deny_patterns=rules.get('deny_patterns'),
+            max_external_hops=rules.get('max_external_hops', 0)
+        )
+
+    def is_internal(self, url):
+        """url 是否属于网站自身范围"""
+        if any(p.search(url) for p in self.allow):
+            return True
+        if self.mode == 'any':
+            return True
+        host = (urlparse(url).hostname or '').lower()
+        if self.mode == 'same_host':
+            return host == self.seed_host
+        return registrable_domain(host) == self.seed_domain
+
+    def child_hops(self, url, parent_hops=0):
+        """
+        计算子链接的范围外跳数
+
+        参数:
+            url: str - 子链接
+            parent_hops: int - 父页面的范围外跳数
+
+        返回:
+            int - 子链接的跳数；不允许递归时返回 None
+        """
+        if any(p.search(url) for p in self.deny):
+            self.off_scope_skipped += 1
+            return None
+        if self.is_internal(url):
+            return 0
+        hops = parent_hops + 1
+        if hops > self.max_external_hops:
+            self.off_scope_skipped += 1
+            return None
+        return hops
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'max_external_hops': self.max_external_hops,
+            'off_scope_skipped': self.off_scope_skipped
+        }
@@ -0,0 +1,253 @@
+"""
+紧凑的已见 url 集合 - 用 64 位指纹或 Bloom 过滤器代替完整 url 字符串，大规模抓取时内存占用降低一个数量级
+"""
+import hashlib
+import math
+import sys
+import threading
+from array import array
+
+SEEN_SET_KINDS = ('fingerprint', 'bloom', 'set')
+
+
+def url_fingerprint(url):
+    """
+    计算 url 的 64 位指纹（进程间稳定，0 保留为空槽标记）
+
+    返回:
+        int - 非 0 的 64 位整数
+    """
+    digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+
+class FingerprintSet:
+    """
+    指纹集合：array('Q') 实现的开放寻址哈希表（线性探测），每个 url 固定占用约 8~16 字节
+
+    两个不同 url 指纹相同的概率约为 n²/2⁶⁵，百万级 url 时可忽略。
+    """
+
+    kind = 'fingerprint'
+
+    def __init__(self, capacity=1024, max_load=0.7):
+        """
+        参数:
+            capacity: int - 预计元素个数（超出后自动扩容）
+            max_load: float - 最大装载因子
+        """
+        self.max_load = max_load
+        size = 1 << max(4, math.ceil(math.log2(max(1, capacity) / max_load)))
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _slot(self, fingerprint):
+        table, mask = self._table, self._mask
+        index = fingerprint & mask
+        while True:
+            value = table[index]
+            if value == 0 or value == fingerprint:
+                return index
+            index = (index + 1) & mask
+
+    def _grow(self):
+        old = self._table
+        size = len(old) * 2
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        for value in old:
+            if value:
+                self._table[self._slot(value)] = value
+
+    def add_fingerprint(self, fingerprint):
+        """加入指纹，返回是否为新元素"""
+        with self._lock:
+            index = self._slot(fingerprint)
+            if self._table[index]:
+                return False
+            self._table[index] = fingerprint
+            self._count += 1
+            if self._count > len(self._table) * self.max_load:
+                self._grow()
+            return True
+
+    def add(self, url):
+        """
+        加入 url
+
+        返回:
+            bool - 是否为新元素
+        """
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def has_fingerprint(self, fingerprint):
+        with self._lock:
+            return self._table[self._slot(fingerprint)] != 0
+
+    def __contains__(self, url):
+        return self.has_fingerprint(url_fingerprint(url))
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return self._table.itemsize * len(self._table)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'items': len(self), 'memory_bytes': self.memory_bytes()}
+
+
+class BloomFilter:
+    """
+    可扩展 Bloom 过滤器：元素数超过当前容量时追加一个容量翻倍的子过滤器，
+    各子过滤器的误判率依次减半，总误判率不超过 error_rate。
+
+    只会误判"已存在"（新 url 被当作已见而跳过），不会漏判。
+    """
+
+    kind = 'bloom'
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        """
+        参数:
+            capacity: int - 第一个子过滤器的容量
+            error_rate: float - 目标误判率
+        """
+        self.capacity = max(1, int(capacity))
+        self.error_rate = error_rate
+        self._filters = []
+        self._count = 0
+        self._lock = threading.Lock()
+        self._add_filter(self.capacity, error_rate / 2)
+
+    def _add_filter(self, capacity, error_rate):
+        bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        # [位数组, 位数, 哈希函数个数, 容量, 已加入数]
+        self._filters.append([bytearray((bits + 7) // 8), bits, hashes, capacity, 0])
+
+    @staticmethod
+    def _hashes(url):
+        digest = hashlib.blake2b(url.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    @staticmethod
+    def _test(bitmap, bits, hashes, h1, h2):
+        for i in range(hashes):
+            p = (h1 + i * h2) % bits
+            if not bitmap[p >> 3] & (1 << (p & 7)):
+                return False
+        return True
+
+    def _contains(self, h1, h2):
+        # 新的子过滤器元素最多，优先检查
+        for bitmap, bits, hashes, _, _ in reversed(self._filters):
+            if self._test(bitmap, bits, hashes, h1, h2):
+                return True
+        return False
+
+    def add(self, url):
+        """
+        加入 url
+
+        返回:
+            bool - 是否为新元素（可能因误判返回 False）
+        """
+        h1, h2 = self._hashes(url)
+        with self._lock:
+            if self._contains(h1, h2):
+                return False
+            current = self._filters[-1]
+            if current[4] >= current[3]:
+                self._add_filter(current[3] * 2, self.error_rate / (2 ** (len(self._filters) + 1)))
+                current = self._filters[-1]
+            bitmap, bits, hashes = current[0], current[1], current[2]
+            for i in range(hashes):
+                p = (h1 + i * h2) % bits
+                bitmap[p >> 3] |= 1 << (p & 7)
+            current[4] += 1
+            self._count += 1
+            return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        h1, h2 = self._hashes(url)
+        with self._lock:
+            return self._contains(h1, h2)
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return sum(len(f[0]) for f in self._filters)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'items': len(self), 'memory_bytes': self.memory_bytes(),
+                'error_rate': self.error_rate, 'filters': len(self._filters)}
+
+
+class UrlSet:
+    """完整 url 字符串集合（原实现，用于对比内存占用或需要精确结果时）"""
+
+    kind = 'set'
+
+    def __init__(self, capacity=None):
+        self._urls = set()
+        self._lock = threading.Lock()
+
+    def add(self, url):
+        with self._lock:
+            if url in self._urls:
+                return False
+            self._urls.add(url)
+            return True
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url):
+        return url in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+    def memory_bytes(self):
+        with self._lock:
+            return sys.getsizeof(self._urls) + sum(sys.getsizeof(url) for url in self._urls)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'items': len(self), 'memory_bytes': self.memory_bytes()}
+
+
+def create_seen_set(kind=None, capacity=None, error_rate=None):
+    """
+    按配置创建已见 url 集合
+
+    参数:
+        kind: str - fingerprint / bloom / set，默认读取 config.seen_set_kind
+        capacity: int - 预计元素个数，默认读取 config.seen_set_capacity
+        error_rate: float - Bloom 过滤器误判率，默认读取 config.bloom_error_rate
+
+    返回:
+        FingerprintSet | BloomFilter | UrlSet - 支持 add / in / len / update / memory_bytes
+    """
+    from app.config import config
+    kind = kind or config.seen_set_kind
+    capacity = capacity or config.seen_set_capacity
+    if kind == 'bloom':
+        return BloomFilter(capacity, error_rate or config.bloom_error_rate)
+    if kind == 'set':
+        return UrlSet(capacity)
+    if kind != 'fingerprint':
+        raise ValueError(f"无效的已见集合类型: {kind}")
+    return FingerprintSet(capacity)
@@ -0,0 +1,184 @@
+"""
+流式响应读取 - 先看响应头和首个数据块，二进制或超大响应尽早中止，正文按内容类别限长
+"""
+import threading
+
+from app.services.link_probe import classify_link
+
+# 常见二进制格式的文件头（魔数）
+MAGIC_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image'),
+    (b'\xff\xd8\xff', 'image'),
+    (b'GIF87a', 'image'),
+    (b'GIF89a', 'image'),
+    (b'BM', 'image'),
+    (b'RIFF', 'video'),
+    (b'\x00\x00\x00\x18ftyp', 'video'),
+    (b'\x00\x00\x00\x1cftyp', 'video'),
+    (b'\x00\x00\x00\x20ftyp', 'video'),
+    (b'\x1aE\xdf\xa3', 'video'),
+    (b'FLV', 'video'),
+    (b'ID3', 'audio'),
+    (b'OggS', 'audio'),
+    (b'fLaC', 'audio'),
+    (b'%PDF-', 'document'),
+    (b'\xd0\xcf\x11\xe0', 'document'),
+    (b'PK\x03\x04', 'archive'),
+    (b'Rar!', 'archive'),
+    (b'7z\xbc\xaf\x27\x1c', 'archive'),
+    (b'\x1f\x8b', 'archive'),
+    (b'MZ', 'archive'),
+    (b'wOFF', 'font'),
+    (b'wOF2', 'font'),
+)
+
+
+def sniff_binary(chunk):
+    """
+    根据首个数据块判断是否为二进制内容
+
+    参数:
+        chunk: bytes - 响应正文的首个数据块
+
+    返回:
+        str - 识别出的资源类别，文本内容返回 None
+    """
+    if not chunk:
+        return None
+    for signature, content_class in MAGIC_SIGNATURES:
+        if chunk.startswith(signature):
+            # BM / MZ 过短，需排除以其开头的普通文本
+            if len(signature) <= 2 and b'\x00' not in chunk[:512]:
+                continue
+            return content_class
+    # 文本内容中不应出现 NUL 字节（UTF-16 带 BOM 的除外）
+    if b'\x00' in chunk[:512] and not chunk.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return 'archive'
+    return None
+
+
+def body_class(content_type):
+    """
+    按 Content-Type 划分正文类别（用于选择正文上限）
+
+    返回:
+        str - html / xml / text / other
+    """
+    content_type = (content_type or '').lower()
+    if not content_type or 'html' in content_type:
+        return 'html'
+    if 'xml' in content_type or 'rss' in content_type or 'atom' in content_type:
+        return 'xml'
+    if content_type.startswith('text/') or 'json' in content_type or 'javascript' in content_type:
+        return 'text'
+    return 'other'
+
+
+class BodyReader:
+    """
+    任务级正文读取器（线程安全统计）
+
+    - 按 Content-Type 判断为二进制的响应只保留状态码和响应头，不读取正文
+    - 首个数据块魔数识别为二进制的响应同样中止
+    - Content-Length 已超过上限的响应直接中止；未声明长度的响应读到上限后截断
+    """
+
+    def __init__(self, default_limit=5 * 1024 * 1024, class_limits=None, chunk_size=64 * 1024):
+        """
+        参数:
+            default_limit: int - 默认正文上限（字节）
+            class_limits: dict - {html/xml/text/other: 上限}，按正文类别覆盖默认上限
+            chunk_size: int - 每次读取的块大小
+        """
+        self.default_limit = default_limit
+        self.class_limits = dict(class_limits or {})
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self.counts = {
+            'read': 0,
+            'truncated': 0,
+            'aborted_binary': 0,
+            'aborted_oversize': 0
+        }
+
+    @classmethod
+    def from_config(cls):
+        """按 config 创建读取器"""
+        from app.config import config
+        return cls(default_limit=config.crawl_max_body_bytes, class_limits=config.crawl_body_limits)
+
+    def limit_for(self, content_type):
+        return self.class_limits.get(body_class(content_type), self.default_limit)
+
+    def _count(self, field):
+        with self._lock:
+            if field:
+                self.counts[field] += 1
+
+    def _finish(self, response, content, field):
+        if field != 'read':
+            # 未读完的响应需关闭底层连接，不能带着剩余正文放回连接池
+            response.close()
+        response._content = content
+        response._content_consumed = True
+        # 正文未完整读取（截断、中止或取消），WARC 输出中标记为截断
+        response.truncated = field != 'read'
+        self._count(field)
+        return response
+
+    def read(self, response, should_stop=None, on_chunk=None):
+        """
+        读取 stream=True 的响应正文，写回 response.content
+
+        参数:
+            response: requests.Response - 流式响应
+            should_stop: callable - 返回 True 时停止读取（块之间检查）
+            on_chunk: callable - on_chunk(response, chunk)，每读到一个正文数据块时调用
+
+        返回:
+            requests.Response - 正文已读取（或被截断/清空）的响应
+        """
+        content_type = response.headers.get('Content-Type', '')
+        content_class = classify_link(response.url, content_type) if content_type else 'page'
+        if content_class != 'page':
+            print(f"跳过二进制文件: {response.url} (Content-Type: {content_type})")
+            return self._finish(response, b'', 'aborted_binary')
+
+        limit = self.limit_for(content_type)
+        try:
+            declared = int(response.headers.get('Content-Length') or 0)
+        except ValueError:
+            declared = 0
+
+        if limit and declared > limit:
+            print(f"正文超过上限 {limit} 字节，已中止: {response.url} (Content-Length: {declared})")
+            return self._finish(response, b'', 'aborted_oversize')
+
+        chunks = []
+        size = 0
+        first = True
+        for chunk in response.iter_content(chunk_size=self.chunk_size):
+            if first:
+                first = False
+                sniffed = sniff_binary(chunk)
+                if sniffed:
+                    print(f"跳过二进制文件: {response.url} (文件头识别为 {sniffed})")
+                    return self._finish(response, b'', 'aborted_binary')
+            if should_stop and should_stop():
+                return self._finish(response, b''.join(chunks), None)
+            if limit and size + len(chunk) > limit:
+                chunk = chunk[:limit - size]
+                chunks.append(chunk)
+                if on_chunk:
+                    on_chunk(response, chunk)
+                print(f"正文超过上限 {limit} 字节，已截断: {response.url}")
+                return self._finish(response, b''.join(chunks), 'truncated')
+            chunks.append(chunk)
+            size += len(chunk)
+            if on_chunk:
+                on_chunk(response, chunk)
+        return self._finish(response, b''.join(chunks), 'read')
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self.counts, limits=dict(self.class_limits, default=self.default_limit))
@@ -0,0 +1,194 @@
+"""
+爬虫陷阱检测 - 识别日历、分面搜索、会话 ID 等无限 url 空间，限制同一模式下继续发现的链接
+"""
+import re
+import threading
+from collections import Counter
+from urllib.parse import urlsplit
+
+from app.services.seen_set import FingerprintSet, url_fingerprint
+
+TRAP_MODES = ('drop', 'throttle', 'off')
+
+_DIGITS_RE = re.compile(r'\d+')
+_ID_RE = re.compile(r'^[0-9a-fA-F-]{16,}$')
+
+
+def url_template(url):
+    """
+    计算 url 模式：数字替换为 {n}，长十六进制/UUID 段替换为 {id}，查询参数只保留参数名
+
+    例如 /calendar/2024/05?day=3&view=week -> host/calendar/{n}/{n}?day&view
+
+    返回:
+        tuple - (路径模式, 带查询参数名的完整模式)
+    """
+    parts = urlsplit(url)
+    segments = []
+    for segment in parts.path.split('/'):
+        if _ID_RE.match(segment):
+            segments.append('{id}')
+        else:
+            segments.append(_DIGITS_RE.sub('{n}', segment))
+    path_pattern = (parts.hostname or '') + '/'.join(segments)
+    keys = sorted({p.split('=', 1)[0] for p in parts.query.split('&') if p})
+    return path_pattern, path_pattern + ('?' + '&'.join(keys) if keys else '')
+
+
+class TrapDetector:
+    """
+    爬虫陷阱检测（每个任务一个实例，线程安全）
+
+    检测规则:
+    - repeated_segments: 路径中同一段重复出现次数过多或路径过深（如 /a/b/a/b/a/b/）
+    - query_params: 单个 url 的查询参数过多
+    - query_variants: 同一路径下不同查询参数组合过多（分面搜索、会话参数）
+    - pattern: 同一 url 模式下的链接数过多（日历、无限翻页）
+
+    模式被判定为陷阱后，drop 模式丢弃该模式下的后续链接，throttle 模式每 N 个只保留 1 个。
+    每个陷阱首次触发时调用 on_trap 回调。
+    """
+
+    def __init__(self, mode='drop', max_per_pattern=1000, max_query_params=10, max_query_variants=100,
+                 max_segment_repeat=3, max_path_depth=15, throttle_every=10, on_trap=None):
+        """
+        参数:
+            mode: str - drop 丢弃 / throttle 限流 / off 不检测
+            max_per_pattern: int - 单个 url 模式最多链接数
+            max_query_params: int - 单个 url 最多查询参数数
+            max_query_variants: int - 同一路径最多查询参数组合数
+            max_segment_repeat: int - 同一路径段最多重复次数
+            max_path_depth: int - 最大路径深度
+            throttle_every: int - throttle 模式下每 N 个链接保留 1 个
+            on_trap: callable - on_trap(trap)，陷阱首次触发时回调，trap 为 dict
+        """
+        if mode not in TRAP_MODES:
+            raise ValueError(f"无效的陷阱处理模式: {mode}")
+        self.mode = mode
+        self.max_per_pattern = max_per_pattern
+        self.max_query_params = max_query_params
+        self.max_query_variants = max_query_variants
+        self.max_segment_repeat = max_segment_repeat
+        self.max_path_depth = max_path_depth
+        self.throttle_every = max(1, int(throttle_every))
+        self.on_trap = on_trap
+        # 只记录指纹与计数，不保留 url 字符串
+        self._seen = FingerprintSet()
+        self._rejected = FingerprintSet()
+        self._pattern_counts = Counter()
+        self._path_variants = Counter()
+        self._traps = {}
+        self._hits = Counter()
+        self.dropped = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, on_trap=None):
+        """按 config 创建检测器"""
+        from app.config import config
+        return cls(
+            mode=config.trap_mode,
+            max_per_pattern=config.trap_max_per_pattern,
+            max_query_params=config.trap_max_query_params,
+            max_query_variants=config.trap_max_query_variants,
+            max_segment_repeat=config.trap_max_segment_repeat,
+            max_path_depth=config.trap_max_path_depth,
+            throttle_every=config.trap_throttle_every,
+            on_trap=on_trap
+        )
+
+    def _url_reason(self, url):
+        """单个 url 自身的陷阱特征"""
+        parts = urlsplit(url)
+        segments = [s for s in parts.path.split('/') if s]
+        if len(segments) > self.max_path_depth:
+            return 'repeated_segments'
+        if segments and max(Counter(segments).values()) > self.max_segment_repeat:
+            return 'repeated_segments'
+        if parts.query and parts.query.count('&') + 1 > self.max_query_params:
+            return 'query_params'
+        return None
+
+    def check(self, url):
+        """
+        判断链接是否保留（同一 url 只计数一次，重复检查时返回首次的判断结果）
+
+        返回:
+            bool - True 表示保留
+        """
+        if self.mode == 'off':
+            return True
+        path_pattern, pattern = url_template(url)
+        triggered = None
+        with self._lock:
+            key = url_fingerprint(url)
+            if not self._seen.add_fingerprint(key):
+                return not self._rejected.has_fingerprint(key)
+            self._pattern_counts[pattern] += 1
+            if '?' in url:
+                self._path_variants[path_pattern] += 1
+
+            trap_key = None
+            if pattern in self._traps:
+                trap_key = pattern
+            elif path_pattern in self._traps:
+                trap_key = path_pattern
+            else:
+                reason = self._url_reason(url)
+                if reason:
+                    trap_key = pattern
+                elif self._path_variants[path_pattern] > self.max_query_variants:
+                    reason, trap_key = 'query_variants', path_pattern
+                elif self._pattern_counts[pattern] > self.max_per_pattern:
+                    reason, trap_key = 'pattern', pattern
+                if trap_key is not None:
+                    triggered = {
+                        'reason': reason,
+                        'pattern': trap_key,
+                        'example': url,
+                        'count': max(self._pattern_counts[pattern], self._path_variants[path_pattern])
+                    }
+                    self._traps[trap_key] = triggered
+            if trap_key is None:
+                return True
+
+            self._hits[trap_key] += 1
+            keep = self.mode == 'throttle' and self._hits[trap_key] % self.throttle_every == 0
+            if keep:
+                self.throttled += 1
+            else:
+                self.dropped += 1
+                self._rejected.add_fingerprint(key)
+
+        if triggered and self.on_trap:
+            try:
+                self.on_trap(dict(triggered, mode=self.mode))
+            except Exception as e:
+                print(f"陷阱回调失败: {e}")
+        return keep
+
+    def admit_links(self, links):
+        """
+        过滤一组链接
+
+        返回:
+            list[str] - 保留的链接
+        """
+        if self.mode == 'off':
+            return list(links)
+        return [link for link in links if self.check(link)]
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'traps': len(self._traps),
+                'dropped': self.dropped,
+                'throttled_kept': self.throttled,
+                'memory_bytes': self._seen.memory_bytes() + self._rejected.memory_bytes(),
+                'patterns': [
+                    {'reason': t['reason'], 'pattern': t['pattern'], 'hits': self._hits[k]}
+                    for k, t in sorted(self._traps.items(), key=lambda item: -self._hits[item[0]])[:20]
+                ]
+            }
@@ -0,0 +1,243 @@
+"""
+WARC 输出 - 把抓取到的原始请求/响应按 WARC/1.0 格式写入 .warc.gz（每条记录一个 gzip 成员），
+由独立写入线程落盘，抓取线程只入队不等待磁盘 I/O
+"""
+import base64
+import gzip
+import hashlib
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+WARC_VERSION = 'WARC/1.0'
+
+# requests 已解码压缩正文并合并分块，这些头与写入的正文不再一致
+_DROP_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+
+# 写入线程结束标记
+_CLOSE = object()
+
+
+def _warc_date():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _record_id():
+    return f'<urn:uuid:{uuid.uuid4()}>'
+
+
+def _sha1_digest(data):
+    return 'sha1:' + base64.b32encode(hashlib.sha1(data).digest()).decode('ascii')
+
+
+def build_record(warc_type, headers, block):
+    """
+    构建单条 WARC 记录（未压缩）
+
+    参数:
+        warc_type: str - warcinfo / request / response
+        headers: list[tuple] - 除 WARC-Type / Content-Length 外的记录头
+        block: bytes - 记录正文
+
+    返回:
+        bytes
+    """
+    lines = [WARC_VERSION, f'WARC-Type: {warc_type}']
+    lines += [f'{name}: {value}' for name, value in headers]
+    lines.append(f'Content-Length: {len(block)}')
+    head = '\r\n'.join(lines).encode('utf-8') + b'\r\n\r\n'
+    return head + block + b'\r\n\r\n'
+
+
+def _http_headers(headers, extra=()):
+    lines = [f'{name}: {value}' for name, value in headers.items() if name.lower() not in _DROP_HEADERS]
+    lines += [f'{name}: {value}' for name, value in extra]
+    return ''.join(line + '\r\n' for line in lines)
+
+
+class WarcWriter:
+    """
+    WARC 写入器（线程安全）
+
+    write_response 在抓取线程中只收集数据并入队；写入线程负责序列化、压缩和落盘。
+    单个文件超过 max_file_size 后切换到新文件，写入中的文件带 .open 后缀，完成后改名。
+    队列已满时丢弃记录并计数，不阻塞抓取线程。
+    """
+
+    def __init__(self, directory, prefix='crawl', max_file_size=100 * 1024 * 1024, queue_size=1000):
+        """
+        参数:
+            directory: str - 输出目录
+            prefix: str - 文件名前缀
+            max_file_size: int - 单个文件的最大字节数（压缩后）
+            queue_size: int - 待写入队列容量
+        """
+        self.directory = directory
+        self.prefix = prefix
+        self.max_file_size = max(1, int(max_file_size))
+        self.files = []
+        self.records = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.errors = 0
+        self._serial = 0
+        self._file = None
+        self._path = None
+        self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name='warc-writer', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, prefix):
+        """按 config 创建写入器，未启用时返回 None"""
+        from app.config import config
+        if not config.warc_enabled:
+            return None
+        return cls(config.warc_dir, prefix=prefix, max_file_size=config.warc_max_file_size,
+                   queue_size=config.warc_queue_size)
+
+    def write_response(self, response, headers_only=False):
+        """
+        记录一次请求/响应及其重定向过程（在抓取线程中调用，只入队）
+
+        参数:
+            response: requests.Response - 正文已读取的响应
+            headers_only: bool - 最终响应只读取了响应头（正文记为空并标记截断，重定向过程的正文已读取）
+        """
+        for hop in response.history:
+            self._enqueue(hop)
+        self._enqueue(response, headers_only=headers_only)
+
+    def _enqueue(self, response, headers_only=False):
+        request = response.request
+        item = {
+            'url': response.url,
+            'date': _warc_date(),
+            'method': request.method if request is not None else 'GET',
+            'request_headers': dict(request.headers) if request is not None else {},
+            'status_code': response.status_code,
+            'reason': response.reason or '',
+            'version': getattr(response.raw, 'version', 11),
+            'headers': list(response.headers.items()),
+            'content': b'' if headers_only else response.content or b'',
+            'truncated': headers_only or getattr(response, 'truncated', False)
+        }
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            print(f"WARC 队列已满，丢弃记录: {item['url']}")
+            with self._lock:
+                self.dropped += 1
+
+    def _open(self):
+        self._serial += 1
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        name = f'{self.prefix}-{stamp}-{self._serial:05d}.warc.gz'
+        self._path = os.path.join(self.directory, name)
+        self._file = open(self._path + '.open', 'wb')
+        info = (f'software: fetch_link_from_website\r\nformat: WARC File Format 1.0\r\n'
+                f'conformsTo: http://iipc.github.io/warc-specifications/specifications/warc-format/warc-1.0/\r\n')
+        self._write_member(build_record('warcinfo', [
+            ('WARC-Date', _warc_date()),
+            ('WARC-Record-ID', _record_id()),
+            ('WARC-Filename', name),
+            ('Content-Type', 'application/warc-fields')
+        ], info.encode('utf-8')))
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path + '.open', self._path)
+        with self._lock:
+            self.files.append(self._path)
+        self._file = None
+
+    def _write_member(self, record):
+        data = gzip.compress(record)
+        self._file.write(data)
+        with self._lock:
+            self.bytes += len(data)
+
+    def _write_item(self, item):
+        if self._file is None:
+            self._open()
+        version = {10: 'HTTP/1.0', 11: 'HTTP/1.1'}.get(item['version'], 'HTTP/1.1')
+        url = item['url']
+        date = item['date']
+        response_id = _record_id()
+
+        parts = urlsplit(url)
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        request_block = (f"{item['method']} {target} {version}\r\n"
+                         f"{_http_headers(item['request_headers'])}\r\n").encode('utf-8')
+
+        content = item['content']
+        response_block = (f"{version} {item['status_code']} {item['reason']}\r\n"
+                          f"{_http_headers(dict(item['headers']), [('Content-Length', len(content))])}\r\n"
+                          ).encode('utf-8', 'replace') + content
+
+        response_headers = [
+            ('WARC-Record-ID', response_id),
+            ('WARC-Date', date),
+            ('WARC-Target-URI', url),
+            ('Content-Type', 'application/http; msgtype=response'),
+            ('WARC-Payload-Digest', _sha1_digest(content)),
+            ('WARC-Block-Digest', _sha1_digest(response_block))
+        ]
+        if item['truncated']:
+            response_headers.append(('WARC-Truncated', 'length'))
+        self._write_member(build_record('response', response_headers, response_block))
+        self._write_member(build_record('request', [
+            ('WARC-Record-ID', _record_id()),
+            ('WARC-Date', date),
+            ('WARC-Target-URI', url),
+            ('WARC-Concurrent-To', response_id),
+            ('Content-Type', 'application/http; msgtype=request')
+        ], request_block))
+        with self._lock:
+            self.records += 1
+        if self._file.tell() >= self.max_file_size:
+            self._close_file()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            try:
+                self._write_item(item)
+            except Exception as e:
+                print(f"WARC 写入失败: {item['url']} - {e}")
+                with self._lock:
+                    self.errors += 1
+        try:
+            self._close_file()
+        except Exception as e:
+            print(f"WARC 文件关闭失败: {e}")
+
+    def close(self):
+        """
+        写完队列中剩余的记录并关闭当前文件
+
+        返回:
+            dict - 写入统计（含生成的文件列表）
+        """
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        return self.to_dict()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'files': list(self.files),
+                'records': self.records,
+                'bytes': self.bytes,
+                'dropped': self.dropped,
+                'errors': self.errors
+            }
@@ -0,0 +1,106 @@
+"""
+编码识别基准测试 - 对比原 safe_soup 整页 chardet 检测与 EncodingResolver（HTTP 头/BOM/meta 优先、样本检测、主机缓存）的解码与解析吞吐量
+
+用法:
+    python benchmarks/bench_encoding.py
+    python benchmarks/bench_encoding.py --pages 40 --kb 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import chardet
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.encoding import EncodingResolver, get_encoding_resolver  # noqa: E402
+from app.services.link_extractor import parse_document  # noqa: E402
+
+
+def legacy_decode(content):
+    """原 safe_soup 的解码逻辑：对整个正文做 chardet 检测，置信度低时依次尝试常见编码"""
+    try:
+        detected = chardet.detect(content)
+        encoding = detected.get('encoding', 'utf-8')
+        confidence = detected.get('confidence', 0)
+        if confidence < 0.7:
+            for enc in ['utf-8', 'gbk', 'gb2312', 'gb18030', 'latin1']:
+                try:
+                    return content.decode(enc, errors='ignore')
+                except Exception:
+                    continue
+            return content.decode('utf-8', errors='replace')
+        return content.decode(encoding or 'utf-8', errors='ignore')
+    except Exception:
+        return content.decode('utf-8', errors='replace')
+
+
+def generate_pages(count, kb):
+    """
+    生成测试页面: [(content, content_type, url, html)]
+
+    覆盖三种情况：响应头声明 charset、<meta> 声明、完全未声明（需要检测，GBK 编码）
+    """
+    body = ''.join(f'<p>第{i}段 新闻动态 产品服务 关于我们 联系方式 <a href="/n/{i}.html">详情</a></p>'
+                   for i in range(kb * 10))
+    pages = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            html = f'<html><head><title>页面{i}</title></head><body>{body}</body></html>'
+            pages.append((html.encode('utf-8'), 'text/html; charset=utf-8', f'https://a.example.com/{i}.html', html))
+        elif kind == 1:
+            html = f'<html><head><meta charset="gbk"><title>页面{i}</title></head><body>{body}</body></html>'
+            pages.append((html.encode('gbk'), 'text/html', f'https://b.example.com/{i}.html', html))
+        else:
+            html = f'<html><head><title>页面{i}</title></head><body>{body}</body></html>'
+            pages.append((html.encode('gbk'), 'text/html', f'https://c.example.com/{i}.html', html))
+    return pages
+
+
+def bench(name, func, pages, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for content, content_type, url, _ in pages:
+            func(content, content_type, url)
+    elapsed = time.perf_counter() - started
+    rate = len(pages) * rounds / elapsed
+    print(f"{name:<28} {rate:>10.1f} 页/秒")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='编码识别基准测试')
+    parser.add_argument('--pages', type=int, default=30, help='测试页面数')
+    parser.add_argument('--kb', type=int, default=100, help='每页大约大小（KB）')
+    parser.add_argument('--rounds', type=int, default=2, help='重复轮数')
+    args = parser.parse_args()
+
+    pages = generate_pages(args.pages, args.kb)
+    size = sum(len(p[0]) for p in pages)
+    print(f"页面数 {len(pages)}，总大小 {size / 1024:.0f} KB，轮数 {args.rounds}")
+
+    resolver = EncodingResolver()
+
+    # 统计两种方式解码正确的页面数
+    legacy_ok = sum(1 for c, t, u, html in pages if legacy_decode(c) == html)
+    fast_ok = sum(1 for c, t, u, html in pages if EncodingResolver().decode(c, t, u) == html)
+    print(f"解码正确: chardet 整页检测 {legacy_ok}/{len(pages)}，EncodingResolver {fast_ok}/{len(pages)}")
+
+    print('-- 仅解码')
+    legacy = bench('chardet 整页检测', lambda c, t, u: legacy_decode(c), pages, args.rounds)
+    fast = bench('EncodingResolver', resolver.decode, pages, args.rounds)
+    print(f"加速比 {fast / legacy:.1f}x")
+
+    print('-- 解码 + 解析（原 safe_soup 与当前 parse_document）')
+    legacy = bench('chardet + BeautifulSoup', lambda c, t, u: BeautifulSoup(legacy_decode(c), 'lxml'),
+                   pages, args.rounds)
+    fast = bench('EncodingResolver + lxml', lambda c, t, u: parse_document(c, t, url=u), pages, args.rounds)
+    print(f"加速比 {fast / legacy:.1f}x")
+    print(f"编码来源统计: {get_encoding_resolver().to_dict()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+链接提取基准测试 - 对比原 BeautifulSoup 逐标签 find_all 实现与 lxml 单次遍历实现的页面吞吐量
+
+用法:
+    python benchmarks/bench_link_extraction.py                      # 使用生成的测试页面
+    python benchmarks/bench_link_extraction.py --files a.html b.html  # 使用本地页面
+    python benchmarks/bench_link_extraction.py --urls https://example.com
+"""
+import argparse
+import os
+import sys
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.link_extractor import extract_links  # noqa: E402
+
+
+def legacy_extract(content, base_url):
+    """原实现：BeautifulSoup 解析后对 11 种标签各遍历一次"""
+    soup = BeautifulSoup(content, 'lxml')
+    elements_to_check = {
+        'a': ['href'],
+        'img': ['src', 'srcset', 'data-src', 'data-srcset'],
+        'script': ['src'],
+        'link': ['href'],
+        'video': ['src', 'poster', 'data-src'],
+        'audio': ['src', 'data-src'],
+        'iframe': ['src', 'data-src'],
+        'source': ['src', 'srcset', 'data-src'],
+        'embed': ['src', 'data-src'],
+        'track': ['src'],
+        'object': ['data']
+    }
+    links = set()
+    for tag, attributes in elements_to_check.items():
+        for element in soup.find_all(tag):
+            for attr in attributes:
+                if element.has_attr(attr):
+                    value = element[attr].strip()
+                    if not value:
+                        continue
+                    if attr in ['srcset', 'data-srcset']:
+                        for part in [p.strip() for p in value.split(',') if p.strip()]:
+                            links.add(urljoin(base_url, part.split()[0]))
+                    else:
+                        links.add(urljoin(base_url, value))
+    return links
+
+
+def generate_page(index, links=300, paragraphs=200):
+    """生成包含导航、图片、脚本和大量正文的测试页面"""
+    parts = [f'<html><head><title>page {index}</title>',
+             '<link rel="stylesheet" href="/static/site.css"><script src="/static/app.js"></script></head><body>']
+    for i in range(links):
+        parts.append(f'<div class="item"><a href="/article/{index}/{i}.html">文章 {i}</a>')
+        if i % 5 == 0:
+            parts.append(f'<img src="/img/{i}.jpg" srcset="/img/{i}@1x.jpg 1x, /img/{i}@2x.jpg 2x" alt="">')
+        parts.append('</div>')
+    for i in range(paragraphs):
+        parts.append(f'<p>段落 {i} <span>lorem ipsum dolor sit amet</span> <b>consectetur</b></p>')
+    parts.append('<iframe src="https://video.example.com/embed/1"></iframe></body></html>')
+    return ''.join(parts).encode('utf-8')
+
+
+def load_pages(args):
+    """返回 [(content, base_url)]"""
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, 'rb') as f:
+                pages.append((f.read(), 'file://' + os.path.abspath(path)))
+        return pages
+    if args.urls:
+        import requests
+        return [(requests.get(u, timeout=10).content, u) for u in args.urls]
+    return [(generate_page(i), f'https://www.example.com/list/{i}.html') for i in range(args.pages)]
+
+
+def bench(name, func, pages, rounds):
+    """返回 (页面/秒, 最后一轮的链接总数)"""
+    total = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        total = 0
+        for content, base_url in pages:
+            total += len(func(content, base_url) or ())
+    elapsed = time.perf_counter() - started
+    rate = len(pages) * rounds / elapsed
+    print(f"{name:<24} {rate:>10.1f} 页/秒   链接数 {total}")
+    return rate, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='链接提取基准测试')
+    parser.add_argument('--pages', type=int, default=50, help='生成的测试页面数')
+    parser.add_argument('--rounds', type=int, default=3, help='重复轮数')
+    parser.add_argument('--files', nargs='*', help='本地 HTML 文件')
+    parser.add_argument('--urls', nargs='*', help='在线页面 url')
+    args = parser.parse_args()
+
+    pages = load_pages(args)
+    size = sum(len(c) for c, _ in pages)
+    print(f"页面数 {len(pages)}，总大小 {size / 1024:.0f} KB，轮数 {args.rounds}")
+
+    legacy_rate, legacy_links = bench('BeautifulSoup find_all', legacy_extract, pages, args.rounds)
+    lxml_rate, lxml_links = bench('lxml 单次遍历', extract_links, pages, args.rounds)
+    print(f"加速比 {lxml_rate / legacy_rate:.1f}x")
+    if lxml_links < legacy_links:
+        print("警告: lxml 提取的链接少于原实现")
+
+
+if __name__ == '__main__':
+    main()
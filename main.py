@@ -1,12 +1,12 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from pathlib import Path
 import argparse
 import re
 import time
 import os
-import chardet
+from app.services.http_pool import get_default_pool
+from app.services.link_extractor import INVALID_FILES, VALID_SCHEMES, extract_links
 
 input_url = ""
 result_dir = ""
@@ -26,46 +26,16 @@ result = None
 valid_link_set = set()
 invalid_link_set = set()
 
+# 已保存正文的链接 -> content 目录中的路径（发现阶段下载过的页面不再重复下载）
+stored_paths = {}
+illegal_chars = r'[<>:"/\\|?*\x00-\x1F]'
+
 # 新增：全局浏览器实例（延迟初始化）
 driver = None
 
-def safe_soup(content, content_type=None):
-    try:
-        is_xml = False
-        if content_type:
-            ct = content_type.lower()
-            if 'xml' in ct or 'xhtml' in ct:
-                is_xml = True
-        else:
-            head = content[:200].lstrip() if isinstance(content, (bytes, bytearray)) else str(content)[:200].lstrip()
-            try:
-                if isinstance(head, (bytes, bytearray)):
-                    h = head.lower()
-                    if h.startswith(b'<?xml') or b'<rss' in h or b'<feed' in h:
-                        is_xml = True
-                else:
-                    h = head.lower()
-                    if h.startswith('<?xml') or '<rss' in h or '<feed' in h:
-                        is_xml = True
-            except:
-                pass
-        if is_xml:
-            return BeautifulSoup(content, 'xml')  # 使用 XML 解析器，避免警告
-        return BeautifulSoup(content, 'lxml')
-    except:
-        try:
-            return BeautifulSoup(content, 'html.parser')
-        except:
-            try:
-                encoding = chardet.detect(content)['encoding']
-                decoded = content.decode(encoding or 'utf-8', errors='replace')
-                if content_type and ('xml' in content_type.lower() or 'xhtml' in content_type.lower()):
-                    return BeautifulSoup(decoded, 'xml')
-                return BeautifulSoup(decoded, 'html.parser')
-            except:
-                return None
+# 进程级 HTTP 连接池（复用 keep-alive 连接）
+http_pool = get_default_pool()
 
-# 新增：初始化无头浏览器（Selenium/Chrome）
 def init_driver():
     global driver
     if driver is not None:
@@ -120,7 +90,7 @@ def screenshot_page(url):
 def safe_request(url, headers, timeout=2):
     """带异常处理的请求封装"""
     try:
-        response = requests.get(
+        response = http_pool.get(
             url,
             headers=headers,
             timeout=timeout,
@@ -163,10 +133,15 @@ def get_all_links(url,depth = 2):
             invalid_link.write('\n')
         print(f" {url} 无响应")
         return []
-    
-    base_url = response.url
-    soup = safe_soup(response.content, response.headers.get('Content-Type', ''))
-    if not soup:
+
+    # 正文直接写入 content 目录
+    try:
+        stored_paths[url] = save_content(url, response.content)
+    except OSError as e:
+        print(f"正文保存失败 {url}: {e}")
+
+    links = extract_links(response.content, response.url, response.headers.get('Content-Type', ''))
+    if links is None:
         if url not in invalid_link_set:
             invalid_link_set.add(url)
             invalid_link.write(url)
@@ -174,46 +149,9 @@ def get_all_links(url,depth = 2):
         print(f"无法解析 {url} 的内容")
         return []
     
-    elements_to_check = {
-        'a': ['href'],
-        'img': ['src', 'srcset', 'data-src', 'data-srcset'],
-        'script': ['src'],
-        'link': ['href'],
-        'video': ['src', 'poster', 'data-src'],
-        'audio': ['src', 'data-src'],
-        'iframe': ['src', 'data-src'],
-        'source': ['src', 'srcset', 'data-src'],
-        'embed': ['src', 'data-src'],
-        'track': ['src'],
-        'object': ['data']
-    }
-
-    links = set()
-
-    for tag, attributes in elements_to_check.items():
-        for element in soup.find_all(tag):
-            for attr in attributes:
-                if element.has_attr(attr):
-                    value = element[attr].strip()
-                    if not value:
-                        continue
-
-                    if attr in ['srcset', 'data-srcset']:
-                        parts = [p.strip() for p in value.split(',') if p.strip()]
-                        for part in parts:
-                            url_part = part.split()[0]
-                            absolute_url = urljoin(base_url, url_part)
-                            links.add(absolute_url)
-                    else:
-                        absolute_url = urljoin(base_url, value)
-                        links.add(absolute_url)
-
-    valid_schemes = ['http', 'https']
-    invalid_file = ['.js','.css']
-
     for link in links:
-        if urlparse(link).scheme in valid_schemes:
-            if not any(ext in link for ext in invalid_file):
+        if urlparse(link).scheme in VALID_SCHEMES:
+            if not any(ext in link for ext in INVALID_FILES):
                 if(link not in valid_link_set):
                     valid_link_set.add(link)
                     valid_link.write(link)
@@ -226,33 +164,36 @@ def get_all_links(url,depth = 2):
 
     return []
 
+def save_content(link, data):
+    """正文写入 content 目录（按 url 命名，先写临时文件再改名），返回文件路径"""
+    save_path = download_path + re.sub(illegal_chars, '', link)
+    tmp_path = save_path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, save_path)
+    return save_path
+
 def download_all_content():
+    """保存所有有效链接的正文到 content 目录：发现阶段已下载的直接复用，其余下载一次"""
     success = 0.0
     fail = 0.0
     precision = 0.0
-    illegal_chars = r'[<>:"/\\|?*\x00-\x1F]'
 
-    for link in valid_link_set:
-        print(link)
-        save_path = download_path + re.sub(illegal_chars,'',link)
-        try:
-            response = requests.get(link, stream=True, proxies=requests_proxies)  # 新增：代理
-            with open(save_path, 'wb') as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
-                    print(f"文件已下载到: {save_path}")
-                    success = success + 1.0
-        except:
-            try:
-                response = requests.get(link, proxies=requests_proxies)  # 新增：代理
-                with open(save_path, 'wb') as file:
-                    file.write(response.text)
-                    print(f"文件已下载到: {save_path}")
-                    success = success + 1.0
-            except:
-                print(f"下载失败")
-                fail = fail + 1.0
-    
+    with open(download_path + "index.txt", "w", encoding='utf-8') as index:
+        for link in valid_link_set:
+            save_path = stored_paths.get(link)
+            if save_path is None:
+                try:
+                    response = http_pool.get(link, proxies=requests_proxies)  # 新增：代理
+                    save_path = save_content(link, response.content)
+                except Exception as e:
+                    print(f"下载失败 {link}: {e}")
+                    fail = fail + 1.0
+                    continue
+            print(f"文件已保存到: {save_path}")
+            index.write(f"{link}\t{save_path}\n")
+            success = success + 1.0
+
     if success != 0:
         precision = success / (success + fail)
 
@@ -313,7 +254,11 @@ if __name__ == "__main__":
 
     precision = download_all_content()
     result.write(f'precision:{precision}\n')
+    pool_stats = http_pool.stats()
+    result.write(f"requests:{pool_stats['requests']} connections:{pool_stats['connections']} "
+                 f"reused_connections:{pool_stats['reused_connections']}\n")
     result.close()
+    http_pool.close()
 
     # 新增：退出浏览器
     try:
@@ -1,15 +1,15 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from pathlib import Path
 import argparse
 import re
 import time
 from pymongo import MongoClient
 from datetime import datetime
-import chardet
 import os
 from dotenv import load_dotenv
+from app.services.http_pool import get_default_pool
+from app.services.link_extractor import INVALID_FILES, VALID_SCHEMES, extract_links
 load_dotenv()
 
 input_url = ""
@@ -26,6 +26,9 @@ result = None
 valid_link_set = set()
 invalid_link_set = set()
 
+# 进程级 HTTP 连接池（复用 keep-alive 连接）
+http_pool = get_default_pool()
+
 # MongoDB 配置
 MONGO_URI = os.environ.get("DATABASE_BASE_URL", "mongodb://localhost:27017/")
 DB_NAME = "data"
@@ -37,28 +40,14 @@ db = client[DB_NAME]
 collection = db[COLLECTION_NAME]
 
 
-def safe_soup(content):
-    try:
-        return BeautifulSoup(content, 'lxml')
-    except:
-        try:
-            return BeautifulSoup(content, 'html.parser')
-        except:
-            try:
-                encoding = chardet.detect(content)['encoding']
-                return BeautifulSoup(content.decode(encoding, errors='replace'), 'html.parser')
-            except:
-                return None
-
-
 def safe_request(url, headers, timeout=2):
     """带异常处理的请求封装"""
     try:
-        response = requests.get(url,
-                                headers=headers,
-                                timeout=timeout,
-                                allow_redirects=True,
-                                verify=True)  # 验证SSL证书
+        response = http_pool.get(url,
+                                 headers=headers,
+                                 timeout=timeout,
+                                 allow_redirects=True,
+                                 verify=True)  # 验证SSL证书
         response.raise_for_status()
         return response
     except requests.exceptions.HTTPError as e:
@@ -96,9 +85,8 @@ def get_all_links(url, depth=3):
         print(f" {url} 无响应")
         return []
 
-    base_url = response.url
-    soup = safe_soup(response.content)
-    if not soup:
+    links = extract_links(response.content, response.url, response.headers.get('Content-Type', ''))
+    if links is None:
         if url not in invalid_link_set:
             invalid_link_set.add(url)
             invalid_link.write(url)
@@ -113,46 +101,9 @@ def get_all_links(url, depth=3):
         print(f"无法解析 {url} 的内容")
         return []
 
-    elements_to_check = {
-        'a': ['href'],
-        'img': ['src', 'srcset', 'data-src', 'data-srcset'],
-        'script': ['src'],
-        'link': ['href'],
-        'video': ['src', 'poster', 'data-src'],
-        'audio': ['src', 'data-src'],
-        'iframe': ['src', 'data-src'],
-        'source': ['src', 'srcset', 'data-src'],
-        'embed': ['src', 'data-src'],
-        'track': ['src'],
-        'object': ['data']
-    }
-
-    links = set()
-
-    for tag, attributes in elements_to_check.items():
-        for element in soup.find_all(tag):
-            for attr in attributes:
-                if element.has_attr(attr):
-                    value = element[attr].strip()
-                    if not value:
-                        continue
-
-                    if attr in ['srcset', 'data-srcset']:
-                        parts = [p.strip() for p in value.split(',') if p.strip()]
-                        for part in parts:
-                            url_part = part.split()[0]
-                            absolute_url = urljoin(base_url, url_part)
-                            links.add(absolute_url)
-                    else:
-                        absolute_url = urljoin(base_url, value)
-                        links.add(absolute_url)
-
-    valid_schemes = ['http', 'https']
-    invalid_file = ['.js', '.css']
-
     for link in links:
-        if urlparse(link).scheme in valid_schemes:
-            if not any(ext in link for ext in invalid_file):
+        if urlparse(link).scheme in VALID_SCHEMES:
+            if not any(ext in link for ext in INVALID_FILES):
                 if link not in valid_link_set:
                     valid_link_set.add(link)
                     valid_link.write(link)
@@ -190,7 +141,7 @@ def download_all_content():
         print(link)
         save_path = download_path + re.sub(illegal_chars, '', link)
         try:
-            response = requests.get(link, stream=True)
+            response = http_pool.get(link, stream=True)
             with open(save_path, 'wb') as file:
                 for chunk in response.iter_content(chunk_size=8192):
                     file.write(chunk)
@@ -209,7 +160,7 @@ def download_all_content():
                 )
         except:
             try:
-                response = requests.get(link)
+                response = http_pool.get(link)
                 with open(save_path, 'wb') as file:
                     file.write(response.text)
                     print(f"文件已下载到: {save_path}")
@@ -323,7 +274,8 @@ if __name__ == "__main__":
                         'valid_links_count': len(valid_link_set),
                         'invalid_links_count': len(invalid_link_set),
                         'valid_rate': validrate,
-                        'download_precision': precision
+                        'download_precision': precision,
+                        'http_pool': http_pool.stats()
                     }}
                 )
             except Exception as e: